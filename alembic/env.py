@@ -28,7 +28,7 @@ if config.config_file_name is not None:
 # 3) 모델 import (반드시! – 메타데이터 등록 목적)
 #    경로는 프로젝트 구조에 맞게 조정하세요
 # ──────────────────────────────────────────────
-from models import users_model, diarys_model  # ← 실제 모듈 경로
+from models import users_model, diarys_model, search_model, emotion_job_model, emotion_cache_model, s3_cleanup_model, emotion_stats_model, thumbnail_model, multipart_upload_model  # ← 실제 모듈 경로
 
 # 4) 메타데이터 연결
 target_metadata = SQLModel.metadata
@@ -0,0 +1,40 @@
+"""add diary user date unique index
+
+Revision ID: 2f6c8a4d9e17
+Revises: 9d4b2e7f1a60
+Create Date: 2025-07-09 16:31:40.227561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6c8a4d9e17'
+down_revision: Union[str, Sequence[str], None] = '9d4b2e7f1a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 동시 작성으로 이미 같은 날짜 일기가 두 편 이상 있으면 유니크 인덱스를 만들 수 없음
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT user_id, diary_date, COUNT(*) AS cnt FROM diary "
+        "GROUP BY user_id, diary_date HAVING COUNT(*) > 1 LIMIT 10"
+    )).fetchall()
+    if rows:
+        values = ", ".join(f"(user_id={row.user_id}, {row.diary_date}: {row.cnt})" for row in rows)
+        raise RuntimeError(f"같은 날짜에 작성된 일기가 중복되어 있습니다: {values}")
+
+    op.create_index('ix_diary_user_id_diary_date', 'diary', ['user_id', 'diary_date'], unique=True)
+    op.create_index('ix_diary_state_created_at', 'diary', ['state', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_diary_state_created_at', table_name='diary')
+    op.drop_index('ix_diary_user_id_diary_date', table_name='diary')
@@ -0,0 +1,29 @@
+"""add diary feed keyset index
+
+Revision ID: 3a7c1e9b5d24
+Revises: dfc094eddb7b
+Create Date: 2025-07-01 10:12:41.503912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7c1e9b5d24'
+down_revision: Union[str, Sequence[str], None] = 'dfc094eddb7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 피드 키셋 페이지네이션 (created_at DESC, id DESC) 용
+    op.create_index('ix_diary_created_at_id', 'diary', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_diary_created_at_id', table_name='diary')
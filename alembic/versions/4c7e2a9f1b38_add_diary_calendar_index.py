@@ -0,0 +1,28 @@
+"""add diary calendar index
+
+Revision ID: 4c7e2a9f1b38
+Revises: b83d5f0a2c64
+Create Date: 2025-07-11 10:12:54.318206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e2a9f1b38'
+down_revision: Union[str, Sequence[str], None] = 'b83d5f0a2c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_diary_calendar', 'diary', ['user_id', 'diary_date', 'emotion', 'title', 'image'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_diary_calendar', table_name='diary')
@@ -0,0 +1,33 @@
+"""add emotion cache
+
+Revision ID: 5b9e3f2d7a16
+Revises: c41d7a0e9f52
+Create Date: 2025-07-05 16:47:33.102754
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9e3f2d7a16'
+down_revision: Union[str, Sequence[str], None] = 'c41d7a0e9f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('emotion_cache',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('emotion', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('emotion_cache')
@@ -0,0 +1,28 @@
+"""add diary version
+
+Revision ID: 6a1e9c3b7d45
+Revises: 2f6c8a4d9e17
+Create Date: 2025-07-10 10:12:03.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1e9c3b7d45'
+down_revision: Union[str, Sequence[str], None] = '2f6c8a4d9e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('diary', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('diary', 'version')
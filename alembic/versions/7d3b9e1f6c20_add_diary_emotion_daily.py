@@ -0,0 +1,35 @@
+"""add diary emotion daily
+
+Revision ID: 7d3b9e1f6c20
+Revises: 4c7e2a9f1b38
+Create Date: 2025-07-11 17:05:41.582930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3b9e1f6c20'
+down_revision: Union[str, Sequence[str], None] = '4c7e2a9f1b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 기존 일기 집계는 배포 후 python -m utils.emotion_stats backfill 로 채움
+    op.create_table('diary_emotion_daily',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('emotion', sa.String(length=64), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'emotion')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('diary_emotion_daily')
@@ -0,0 +1,85 @@
+"""add diary search token index
+
+Revision ID: 8e2f4b6a1c93
+Revises: 3a7c1e9b5d24
+Create Date: 2025-07-02 14:31:07.218840
+
+"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2f4b6a1c93'
+down_revision: Union[str, Sequence[str], None] = '3a7c1e9b5d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 500
+
+
+# 이 migration 시점의 utils.search 토크나이저 사본 (고정)
+# 앱 코드를 import 하면 이후 토크나이저 변경/이동이 과거 backfill 결과를 바꾸므로 복사해 둠
+NGRAM_SIZE = 2
+TITLE_WEIGHT = 3
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokenize(text: str) -> Counter:
+    tokens: Counter = Counter()
+    for word in _WORD_RE.findall(unicodedata.normalize("NFKC", text or "").lower()):
+        if len(word) <= NGRAM_SIZE:
+            tokens[word] += 1
+            continue
+        for i in range(len(word) - NGRAM_SIZE + 1):
+            tokens[word[i:i + NGRAM_SIZE]] += 1
+    return tokens
+
+
+def diary_tokens(title: str, content: str) -> Counter:
+    tokens = _tokenize(content)
+    for token, count in _tokenize(title).items():
+        tokens[token] += count * TITLE_WEIGHT
+    return tokens
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    token_table = op.create_table('diary_search_token',
+    sa.Column('token', sa.String(length=32).with_variant(mysql.VARCHAR(length=32, collation='utf8mb4_bin'), 'mysql'), nullable=False),
+    sa.Column('diary_id', sa.Integer(), nullable=False),
+    sa.Column('tf', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['diary_id'], ['diary.id'], ),
+    sa.PrimaryKeyConstraint('token', 'diary_id')
+    )
+    op.create_index(op.f('ix_diary_search_token_diary_id'), 'diary_search_token', ['diary_id'], unique=False)
+
+    # 기존 일기 색인 (id 순으로 배치 처리)
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT id, title, content FROM diary WHERE id > :last_id ORDER BY id LIMIT :size"),
+            {"last_id": last_id, "size": BACKFILL_BATCH},
+        ).fetchall()
+        if not rows:
+            break
+        tokens = [
+            {"token": token, "diary_id": row.id, "tf": tf}
+            for row in rows
+            for token, tf in diary_tokens(row.title, row.content).items()
+        ]
+        if tokens:
+            op.bulk_insert(token_table, tokens)
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_diary_search_token_diary_id'), table_name='diary_search_token')
+    op.drop_table('diary_search_token')
@@ -0,0 +1,43 @@
+"""add user unique indexes
+
+Revision ID: 9d4b2e7f1a60
+Revises: e7a2c5f8b031
+Create Date: 2025-07-09 14:05:12.418903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b2e7f1a60'
+down_revision: Union[str, Sequence[str], None] = 'e7a2c5f8b031'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _assert_no_duplicates(conn, column: str) -> None:
+    # 이미 중복된 값이 있으면 유니크 인덱스를 만들 수 없으므로 먼저 정리해야 함
+    rows = conn.execute(sa.text(
+        f"SELECT {column}, COUNT(*) AS cnt FROM user GROUP BY {column} HAVING COUNT(*) > 1 LIMIT 10"
+    )).fetchall()
+    if rows:
+        values = ", ".join(f"{row[0]!r}({row.cnt})" for row in rows)
+        raise RuntimeError(f"user.{column} 에 중복 값이 있습니다: {values}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    _assert_no_duplicates(conn, 'email')
+    _assert_no_duplicates(conn, 'username')
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_username'), table_name='user')
+    op.drop_index(op.f('ix_user_email'), table_name='user')
@@ -0,0 +1,48 @@
+"""add s3 multipart upload
+
+Revision ID: a6f3d8c2e519
+Revises: e15a8c4d2b97
+Create Date: 2025-07-16 10:42:37.208154
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f3d8c2e519'
+down_revision: Union[str, Sequence[str], None] = 'e15a8c4d2b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('s3_multipart_upload',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('object_key', sa.String(length=255), nullable=False),
+    sa.Column('upload_id', sa.String(length=1024), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content_type', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('part_size', sa.Integer(), nullable=False),
+    sa.Column('part_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_s3_multipart_upload_expires_at'), 's3_multipart_upload', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_s3_multipart_upload_object_key'), 's3_multipart_upload', ['object_key'], unique=True)
+    op.create_index(op.f('ix_s3_multipart_upload_user_id'), 's3_multipart_upload', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_s3_multipart_upload_user_id'), table_name='s3_multipart_upload')
+    op.drop_index(op.f('ix_s3_multipart_upload_object_key'), table_name='s3_multipart_upload')
+    op.drop_index(op.f('ix_s3_multipart_upload_expires_at'), table_name='s3_multipart_upload')
+    op.drop_table('s3_multipart_upload')
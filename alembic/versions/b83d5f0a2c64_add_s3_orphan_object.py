@@ -0,0 +1,38 @@
+"""add s3 orphan object
+
+Revision ID: b83d5f0a2c64
+Revises: 6a1e9c3b7d45
+Create Date: 2025-07-10 15:48:27.905133
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83d5f0a2c64'
+down_revision: Union[str, Sequence[str], None] = '6a1e9c3b7d45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('s3_orphan_object',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('object_key', sa.String(length=1024), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_s3_orphan_object_available_at'), 's3_orphan_object', ['available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_s3_orphan_object_available_at'), table_name='s3_orphan_object')
+    op.drop_table('s3_orphan_object')
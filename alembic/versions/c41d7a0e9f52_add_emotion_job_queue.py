@@ -0,0 +1,47 @@
+"""add emotion job queue
+
+Revision ID: c41d7a0e9f52
+Revises: 8e2f4b6a1c93
+Create Date: 2025-07-04 11:05:19.640215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7a0e9f52'
+down_revision: Union[str, Sequence[str], None] = '8e2f4b6a1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('diary', sa.Column('emotion_status', sa.String(length=16), nullable=True))
+    # 이미 분석 결과가 있는 일기는 완료 상태로 표시
+    op.execute("UPDATE diary SET emotion_status = 'done' WHERE emotion IS NOT NULL")
+
+    op.create_table('emotion_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('diary_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['diary_id'], ['diary.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_emotion_job_diary_id'), 'emotion_job', ['diary_id'], unique=False)
+    op.create_index('ix_emotion_job_status_available_at', 'emotion_job', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_emotion_job_status_available_at', table_name='emotion_job')
+    op.drop_index(op.f('ix_emotion_job_diary_id'), table_name='emotion_job')
+    op.drop_table('emotion_job')
+    op.drop_column('diary', 'emotion_status')
@@ -0,0 +1,91 @@
+"""reindex diary search tokens with word-final characters
+
+Revision ID: c5e1a7d3f826
+Revises: f2b7e4c9a315
+Create Date: 2025-07-17 09:26:51.730412
+
+"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1a7d3f826'
+down_revision: Union[str, Sequence[str], None] = 'f2b7e4c9a315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REINDEX_BATCH = 500
+
+
+# 이 migration 시점의 utils.search 토크나이저 사본 (고정)
+# upgrade: 어절 마지막 글자를 한 글자 토큰으로 추가 (한 글자 검색어를 앞부분 일치로 찾음)
+# downgrade: 8e2f4b6a1c93 의 토크나이저
+NGRAM_SIZE = 2
+TITLE_WEIGHT = 3
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _words(text: str) -> list[str]:
+    return _WORD_RE.findall(unicodedata.normalize("NFKC", text or "").lower())
+
+
+def _tokenize(text: str, tails: bool) -> Counter:
+    tokens: Counter = Counter()
+    for word in _words(text):
+        if tails and len(word) > 1:
+            tokens[word[-1]] += 1
+        if len(word) <= NGRAM_SIZE:
+            tokens[word] += 1
+            continue
+        for i in range(len(word) - NGRAM_SIZE + 1):
+            tokens[word[i:i + NGRAM_SIZE]] += 1
+    return tokens
+
+
+def diary_tokens(title: str, content: str, tails: bool) -> Counter:
+    tokens = _tokenize(content, tails)
+    for token, count in _tokenize(title, tails).items():
+        tokens[token] += count * TITLE_WEIGHT
+    return tokens
+
+
+def _reindex(tails: bool) -> None:
+    """모든 일기의 토큰을 id 순 배치로 다시 만듦 (배치마다 지우고 다시 넣음)"""
+    conn = op.get_bind()
+    token_table = sa.table(
+        'diary_search_token',
+        sa.column('token', sa.String), sa.column('diary_id', sa.Integer), sa.column('tf', sa.Integer),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT id, title, content FROM diary WHERE id > :last_id ORDER BY id LIMIT :size"),
+            {"last_id": last_id, "size": REINDEX_BATCH},
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(token_table.delete().where(token_table.c.diary_id.in_([row.id for row in rows])))
+        tokens = [
+            {"token": token, "diary_id": row.id, "tf": tf}
+            for row in rows
+            for token, tf in diary_tokens(row.title, row.content, tails).items()
+        ]
+        if tokens:
+            op.bulk_insert(token_table, tokens)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _reindex(tails=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _reindex(tails=False)
@@ -0,0 +1,45 @@
+"""add thumbnails
+
+Revision ID: e15a8c4d2b97
+Revises: 7d3b9e1f6c20
+Create Date: 2025-07-14 11:26:09.774512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e15a8c4d2b97'
+down_revision: Union[str, Sequence[str], None] = '7d3b9e1f6c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('diary', sa.Column('thumbnail', sa.String(length=255), nullable=True))
+    op.create_index('ix_diary_image', 'diary', ['image'], unique=False)
+    op.create_table('thumbnail_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('object_key', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_thumbnail_job_available_at'), 'thumbnail_job', ['available_at'], unique=False)
+    op.create_index(op.f('ix_thumbnail_job_object_key'), 'thumbnail_job', ['object_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_thumbnail_job_object_key'), table_name='thumbnail_job')
+    op.drop_index(op.f('ix_thumbnail_job_available_at'), table_name='thumbnail_job')
+    op.drop_table('thumbnail_job')
+    op.drop_index('ix_diary_image', table_name='diary')
+    op.drop_column('diary', 'thumbnail')
@@ -0,0 +1,32 @@
+"""add diary emotion source
+
+Revision ID: e7a2c5f8b031
+Revises: 5b9e3f2d7a16
+Create Date: 2025-07-07 09:22:58.771306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c5f8b031'
+down_revision: Union[str, Sequence[str], None] = '5b9e3f2d7a16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('diary', sa.Column('emotion_source', sa.String(length=16), nullable=True))
+    op.create_index(op.f('ix_diary_emotion_source'), 'diary', ['emotion_source'], unique=False)
+    # 기존 결과는 모두 Clova 가 만든 것
+    op.execute("UPDATE diary SET emotion_source = 'clova' WHERE emotion IS NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_diary_emotion_source'), table_name='diary')
+    op.drop_column('diary', 'emotion_source')
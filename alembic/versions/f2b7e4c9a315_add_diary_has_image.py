@@ -0,0 +1,33 @@
+"""add diary has_image, drop image from calendar index
+
+Revision ID: f2b7e4c9a315
+Revises: a6f3d8c2e519
+Create Date: 2025-07-16 11:04:37.512903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7e4c9a315'
+down_revision: Union[str, Sequence[str], None] = 'a6f3d8c2e519'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # VIRTUAL 생성 컬럼은 테이블을 다시 쓰지 않음 (값은 인덱스에만 저장)
+    op.add_column('diary', sa.Column('has_image', sa.Boolean(), sa.Computed("image <> ''", persisted=False), nullable=True))
+    op.drop_index('ix_diary_calendar', table_name='diary')
+    op.create_index('ix_diary_calendar', 'diary', ['user_id', 'diary_date', 'emotion', 'title', 'has_image'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_diary_calendar', table_name='diary')
+    op.create_index('ix_diary_calendar', 'diary', ['user_id', 'diary_date', 'emotion', 'title', 'image'], unique=False)
+    op.drop_column('diary', 'has_image')
@@ -1,36 +1,95 @@
+from dataclasses import dataclass
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
-from auth.jwt_handler import verify_jwt_token
+from auth.jwt_handler import verify_active_jwt_token
 
-from sqlmodel import Session, select
-from database.connection import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database.connection import get_async_session
 from models.users_model import User
+from utils.cache import TTLCache
 
 # 요청이 들어올 때 Authorization 헤더의 토큰 값을 추출
-# tokenUrl : 클라이언트가 토큰을 요청할 때 사용할 엔드포인트로, 
+# tokenUrl : 클라이언트가 토큰을 요청할 때 사용할 엔드포인트로,
 #            FastAPI의 자동 문서화에 사용되는 정보
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/signin")
+# 로그인하지 않아도 되는 엔드포인트용 (토큰이 없으면 None)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/signin", auto_error=False)
+
+# role 클레임이 없는 (예전에 발급된) 토큰을 위한 사용자 정보 캐시
+# user_id → (role, email)
+# 역할 변경/탈퇴 API 가 없어 명시적 무효화는 하지 않음 → DB 에서 직접 바꾼 값은 TTL 뒤에 반영
+# (role 클레임이 있는 토큰은 exp 까지 발급 당시 역할을 그대로 사용)
+USER_CACHE_TTL = 300 # 초
+user_cache = TTLCache(maxsize=10000, ttl=USER_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """검증된 토큰에서 얻은 현재 사용자 정보"""
+    user_id: int
+    role: str
+    email: Optional[str] = None
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
 
-async def authenticate(token: str = Depends(oauth2_scheme)):
+async def load_user(session: AsyncSession, user_id: int) -> tuple[str, str]:
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = (await session.exec(select(User.role, User.email).where(User.id == user_id))).first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="사용자를 찾을 수 없습니다.")
+    cached = (user.role, user.email)
+    user_cache.set(user_id, cached)
+    return cached
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session)
+) -> Principal:
+    """
+    토큰을 요청당 한 번만 검증하고, 역할은 서명된 클레임에서 가져옵니다.
+    (같은 요청 안에서는 FastAPI 가 의존성 결과를 재사용)
+    """
     if not token:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="액세스 토큰이 누락되었습니다.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    payload = verify_jwt_token(token)
-    return payload["user_id"]
-
-async def get_current_user_role(
-    user_id: int = Depends(authenticate), # authenticate 함수가 반환하는 user_id에 의존
-    session: Session = Depends(get_session)
-) -> str:
+
+    payload = await verify_active_jwt_token(token)
+    user_id = payload["user_id"]
+    role = payload.get("role")
+    email = payload.get("user")
+    if role is None:
+        role, email = await load_user(session, user_id)
+    return Principal(user_id=user_id, role=role, email=email)
+
+
+async def get_optional_principal(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session)
+) -> Optional[Principal]:
+    """토큰이 없으면 익명(None), 있으면 get_current_principal 과 같이 검증"""
+    if not token:
+        return None
+    return await get_current_principal(token, session)
+
+
+async def authenticate(principal: Principal = Depends(get_current_principal)):
+    return principal.user_id
+
+async def get_current_user_role(principal: Principal = Depends(get_current_principal)) -> str:
     """
-    인증된 사용자의 ID를 기반으로 데이터베이스에서 사용자 역할을 조회하여 반환합니다.
+    인증된 사용자의 역할을 반환합니다. (DB 조회 없이 토큰 클레임 사용)
     """
-    user = session.exec(select(User).where(User.id == user_id)).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="사용자를 찾을 수 없습니다.")
-    return user.role # 사용자의 role 반환
\ No newline at end of file
+    return principal.role # 사용자의 role 반환
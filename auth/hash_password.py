@@ -1,9 +1,41 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+# ───────────────────────────────────────
+# 비밀번호 해시 (bcrypt)
+#   - bcrypt 한 번에 수백 ms 가 걸리므로 이벤트 루프가 아닌 전용 스레드 풀에서 실행
+#   - 대기 중인 작업이 상한을 넘으면 무한히 쌓지 않고 429 로 거절
+#   - cost 를 바꾸면 로그인 시 기존 해시를 새 cost 로 다시 해시
+# ───────────────────────────────────────
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2")) # 동시에 실행하는 bcrypt 수
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32")) # 실행 중 + 대기 중 상한
+
 
 class HashPassword:
-    def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    def __init__(self, rounds: int = BCRYPT_ROUNDS,
+                 max_workers: int = PASSWORD_HASH_WORKERS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        # min/max 를 같은 값으로 두어 cost 가 다른 해시는 모두 needs_update 대상이 됨
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0 # 이벤트 루프 스레드에서만 변경
+
+        self.rejected = 0
+        self.rehashed = 0
 
 
     def hash_password(self, password: str):
@@ -11,4 +43,49 @@ class HashPassword:
 
     def verify_password(self, plain_password: str, hashed_password: str):
         return self.pwd_context.verify(plain_password, hashed_password)
-        
\ No newline at end of file
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """(일치 여부, cost 가 바뀌었으면 새 해시 / 아니면 None)"""
+        return self.pwd_context.verify_and_update(plain_password, hashed_password)
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="요청이 많습니다. 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash_password_async(self, password: str) -> str:
+        return await self._run(self.hash_password, password)
+
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.verify_password, plain_password, hashed_password)
+
+    async def verify_and_update_async(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        verified, new_hash = await self._run(self.verify_and_update, plain_password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return verified, new_hash
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+
+hash_password = HashPassword()
@@ -1,11 +1,91 @@
+import hashlib
+import logging
+import os
 from time import time
 from fastapi import HTTPException, status
 from jose import jwt
 from database.connection import Settings
+from utils.cache import TTLCache
+from utils.response_cache import RESPONSE_CACHE_PREFIX, shared_backend
 
+logger = logging.getLogger("uvicorn.error")
 
 settings = Settings()
 
+# 검증이 끝난 토큰의 payload 캐시 (토큰 digest → payload, exp 까지만 유지)
+# 같은 토큰이 반복해서 들어오면 서명 검증과 JSON 파싱을 건너뜀
+verified_token_cache = TTLCache(maxsize=20000)
+# 공유 저장소에서 "폐기되지 않음" 을 확인한 결과를 재사용하는 시간 (초)
+# 다른 replica 에서 폐기한 토큰은 최대 이 시간 동안 통과할 수 있음 (폐기한 프로세스에서는 즉시 거절)
+REVOCATION_CHECK_TTL = float(os.getenv("JWT_REVOCATION_CHECK_TTL", "5"))
+
+
+# ───────────────────────────────────────
+# 폐기된 토큰 목록 (원래 exp 까지만 유지하면 충분)
+#   - 응답 캐시와 같은 공유 저장소에 두어 모든 replica / 재시작 후에도 거절
+#     (RESPONSE_CACHE_URL 이 없으면 프로세스 내 저장소 → 폐기한 프로세스에서만 적용)
+#   - 이 프로세스에서 폐기한 토큰은 메모리에도 두어 저장소 장애 중에도 거절
+#   - "폐기되지 않음" 확인 결과는 토큰별로 check_ttl 동안 메모리에서 재사용
+#     → 같은 토큰의 반복 요청은 저장소 왕복 없이 처리 (check_ttl 마다 한 번만 조회)
+# ───────────────────────────────────────
+class RevokedTokens:
+    def __init__(self, backend, check_ttl: float = REVOCATION_CHECK_TTL):
+        self.backend = backend
+        self.check_ttl = check_ttl
+        self.local = TTLCache(maxsize=20000)
+        self.checked = TTLCache(maxsize=20000) # 최근 조회에서 폐기되지 않았던 토큰
+        self.lookups = 0
+        self.errors = 0
+
+    @staticmethod
+    def _key(digest: str) -> str:
+        return f"{RESPONSE_CACHE_PREFIX}jwt:revoked:{digest}"
+
+    async def add(self, digest: str, ttl: float) -> None:
+        self.local.set(digest, True, ttl=ttl)
+        self.checked.pop(digest)
+        try:
+            await self.backend.set(self._key(digest), b"1", ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"토큰 폐기 저장 실패: {e}")
+
+    async def contains(self, digest: str) -> bool:
+        if self.local.get(digest):
+            return True
+        if self.checked.get(digest):
+            return False
+        self.lookups += 1
+        try:
+            raw, = await self.backend.get_many([self._key(digest)])
+        except Exception as e:
+            # 저장소 장애로 모든 요청이 실패하지 않도록 로컬 목록만으로 판단 (결과는 재사용하지 않음)
+            self.errors += 1
+            logger.warning(f"토큰 폐기 조회 실패: {e}")
+            return False
+        if raw is not None:
+            self.local.set(digest, True, ttl=self.check_ttl) # 만료 시각을 모르므로 다음 확인까지만
+            return True
+        if self.check_ttl > 0:
+            self.checked.set(digest, True, ttl=self.check_ttl)
+        return False
+
+    def clear(self) -> None:
+        self.local.clear()
+        self.checked.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "local": len(self.local),
+            "checked": len(self.checked),
+            "lookups": self.lookups,
+            "errors": self.errors,
+        }
+
+
+revoked_tokens = RevokedTokens(shared_backend)
+
 
 # JWT 토큰 생성
 def create_jwt_token(email: str, user_id: int, role: str) -> str:
@@ -21,15 +101,60 @@ def create_jwt_token(email: str, user_id: int, role: str) -> str:
     return token
 
 
-# JWT 토큰 검증
-def verify_jwt_token(token: str):
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# JWT 토큰 검증 (캐시 없이 매번 서명 검증)
+def decode_jwt_token(token: str):
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         exp = payload.get("exp")
-        if exp is None: 
+        if exp is None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
         if time() > exp:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token expired")
         return payload
     except:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
+
+
+# JWT 토큰 검증 (서명/만료만, 폐기 여부는 verify_active_jwt_token)
+def verify_jwt_token(token: str):
+    digest = _token_digest(token)
+    payload = verified_token_cache.get(digest)
+    if payload is not None:
+        return payload
+
+    payload = decode_jwt_token(token)
+    remaining = payload["exp"] - time()
+    if remaining > 0:
+        verified_token_cache.set(digest, payload, ttl=remaining)
+    return payload
+
+
+# 요청 인증용 JWT 토큰 검증 (폐기된 토큰 거절)
+async def verify_active_jwt_token(token: str):
+    if await revoked_tokens.contains(_token_digest(token)):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    return verify_jwt_token(token)
+
+
+# JWT 토큰 폐기 (로그아웃 등)
+async def revoke_jwt_token(token: str) -> None:
+    digest = _token_digest(token)
+    verified_token_cache.pop(digest)
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp") or 0
+    except Exception:
+        return  # 형식이 잘못된 토큰은 어차피 검증을 통과하지 못함
+    remaining = exp - time()
+    if remaining > 0:
+        await revoked_tokens.add(digest, remaining)
+
+
+def jwt_cache_stats() -> dict:
+    return {
+        "verified": verified_token_cache.stats(),
+        "revoked": revoked_tokens.stats(),
+    }
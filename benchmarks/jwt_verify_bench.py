@@ -0,0 +1,43 @@
+"""
+JWT 검증 마이크로벤치마크 (캐시 사용 vs 매번 서명 검증)
+
+    python -m benchmarks.jwt_verify_bench [반복 횟수]
+
+.env 가 없어도 실행되도록 필요한 설정값은 임시 값으로 채움
+"""
+import os
+import sys
+import timeit
+
+for name in (
+    "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_S3_BUCKET", "AWS_REGION",
+    "GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET", "GOOGLE_REDIRECT_URI",
+    "CLOVA_API_KEY", "ROLE_ARN", "BASTION_HOST", "BASTION_USER", "BASTION_KEY_PATH", "RDS_HOST",
+):
+    os.environ.setdefault(name, "bench")
+for name in ("RDS_PORT", "LOCAL_PORT"):
+    os.environ.setdefault(name, "0")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from auth.jwt_handler import (  # noqa: E402
+    create_jwt_token, decode_jwt_token, verified_token_cache, verify_jwt_token,
+)
+
+
+def run(number: int) -> None:
+    token = create_jwt_token("bench@example.com", 1, "user")
+    verified_token_cache.clear()
+    verify_jwt_token(token)  # 캐시 채우기
+
+    uncached = min(timeit.repeat(lambda: decode_jwt_token(token), number=number, repeat=3))
+    cached = min(timeit.repeat(lambda: verify_jwt_token(token), number=number, repeat=3))
+
+    print(f"반복 횟수         : {number}")
+    print(f"uncached (jose)   : {number / uncached:12,.0f} ops/s  ({uncached / number * 1e6:7.2f} us/op)")
+    print(f"cached            : {number / cached:12,.0f} ops/s  ({cached / number * 1e6:7.2f} us/op)")
+    print(f"speedup           : {uncached / cached:12.1f}x")
+    print(f"cache stats       : {verified_token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
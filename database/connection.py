@@ -1,7 +1,10 @@
 from typing import Optional
 from pydantic_settings import BaseSettings
 from sshtunnel import SSHTunnelForwarder
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pathlib import Path
 
 class Settings(BaseSettings):
@@ -27,6 +30,12 @@ class Settings(BaseSettings):
     RDS_HOST : str
     RDS_PORT : int
     LOCAL_PORT : int
+
+    # 비동기 엔진 커넥션 풀 설정
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800 # 초, RDS wait_timeout 보다 짧게
+    DB_POOL_TIMEOUT: int = 30 # 초, 풀에서 커넥션을 기다리는 최대 시간
     
     class Config:
         env_file = ".env"
@@ -37,8 +46,13 @@ settings = Settings()
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # 프로젝트 루트 (Vagrantfile 위치)
 KEY_PATH = "/app/keys/MyKeyPair.pem" 
+
+ssh_server = None
+engine_url = None
+async_engine = None
+
 def start_ssh_tunnel_and_connect():
-    global ssh_server, engine_url
+    global ssh_server
 
     ssh_server = SSHTunnelForwarder(
         (settings.BASTION_HOST, 22),
@@ -51,16 +65,55 @@ def start_ssh_tunnel_and_connect():
     ssh_server.start()
 
     # SSH 터널된 로컬 포트로 DB 연결
+    connect_database(settings.DATABASE_URL)  # ← 이미 LOCAL_PORT 기반임
+
+# 동기 드라이버 URL → 같은 DB를 가리키는 비동기 드라이버 URL
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+def connect_database(database_url: str):
+    """동기/비동기 엔진 생성 및 테이블 생성 (테스트에서는 sqlite URL로 직접 호출)"""
+    global engine_url, async_engine
+
+    is_sqlite = database_url.startswith("sqlite")
+
     engine_url = create_engine(
-        settings.DATABASE_URL,  # ← 이미 LOCAL_PORT 기반임
+        database_url,
         echo=True,
         pool_pre_ping=True,
-        connect_args={"connect_timeout":10},
+        connect_args={} if is_sqlite else {"connect_timeout":10},
+    )
+
+    # 핸들러에서 사용하는 비동기 엔진 (aiomysql / aiosqlite)
+    pool_options = {} if is_sqlite else {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "connect_args": {"connect_timeout": 10},
+    }
+    async_engine = create_async_engine(
+        to_async_url(database_url),
+        pool_pre_ping=True,
+        **pool_options,
     )
 
     # 테이블 생성
     SQLModel.metadata.create_all(engine_url)
 
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
 def stop_ssh_tunnel():
     global ssh_server
     if ssh_server:
@@ -69,3 +122,8 @@ def stop_ssh_tunnel():
 def get_session():
     with Session(engine_url) as session:
         yield session
+
+async def get_async_session():
+    # commit 후에도 응답 직렬화 시 속성 접근이 추가 쿼리를 만들지 않도록 expire 하지 않음
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
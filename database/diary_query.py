@@ -0,0 +1,96 @@
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.diarys_model import Diary, DiaryCalendarDay, DiaryList
+from models.users_model import User
+
+UNKNOWN_USERNAME = "알 수 없음" # 작성자가 없거나 탈퇴한 경우 표시할 이름
+
+# DiaryList 응답에 필요한 컬럼만 조회 (ORM 객체/identity map을 거치지 않음)
+DIARY_LIST_COLUMNS = (
+    Diary.id,
+    Diary.title,
+    Diary.content,
+    Diary.image,
+    Diary.state,
+    Diary.emotion,
+    Diary.emotion_status,
+    Diary.emotion_source,
+    Diary.created_at,
+    Diary.diary_date,
+    Diary.user_id,
+    Diary.version,
+    Diary.thumbnail,
+    User.username,
+)
+
+
+# 캘린더 월 보기 컬럼 (모두 ix_diary_calendar 에 있어 테이블 행을 읽지 않음)
+DIARY_CALENDAR_COLUMNS = (
+    Diary.id,
+    Diary.diary_date,
+    Diary.emotion,
+    Diary.has_image,
+    Diary.title,
+)
+
+
+def diary_calendar_statement(user_id: int, first_day, next_month_first_day):
+    """한 사용자의 한 달치 일기 (user_id, diary_date) 인덱스 범위 스캔"""
+    return (
+        select(*DIARY_CALENDAR_COLUMNS)
+        .where(
+            Diary.user_id == user_id,
+            Diary.diary_date >= first_day,
+            Diary.diary_date < next_month_first_day,
+        )
+        .order_by(Diary.diary_date)
+    )
+
+
+def row_to_calendar_day(row) -> DiaryCalendarDay:
+    # MySQL/SQLite 는 비교 결과를 0/1 로 반환
+    return DiaryCalendarDay.model_construct(
+        id=row.id, diary_date=row.diary_date, emotion=row.emotion,
+        has_image=bool(row.has_image), title=row.title,
+    )
+
+
+def diary_list_statement():
+    """Diary + 작성자 username을 한 번의 쿼리로 가져오는 기본 SELECT"""
+    return (
+        select(*DIARY_LIST_COLUMNS)
+        .select_from(Diary)
+        .join(User, Diary.user_id == User.id, isouter=True)
+    )
+
+
+def row_to_diary_dict(row) -> dict:
+    """DB 행을 DiaryList 와 같은 모양의 dict 로 변환 (스트리밍 응답에서 바로 인코딩)"""
+    data = row._asdict()
+    if data["username"] is None:
+        data["username"] = UNKNOWN_USERNAME
+    data["image_url"] = None
+    data["thumbnail_url"] = None
+    return data
+
+
+def row_to_diary_list(row) -> DiaryList:
+    """DB 행을 검증 없이 DiaryList로 변환 (값은 이미 DB 타입이 보장됨)"""
+    return DiaryList.model_construct(**row_to_diary_dict(row))
+
+
+def is_duplicate_diary_date(e: IntegrityError) -> bool:
+    """(user_id, diary_date) 유니크 인덱스 위반인지 (FK 위반 등 다른 오류와 구분)"""
+    # MySQL: "for key 'diary.ix_diary_user_id_diary_date'", SQLite: "diary.user_id, diary.diary_date"
+    return "diary_date" in str(e.orig)
+
+
+async def fetch_diary_list(session: AsyncSession, statement) -> list[DiaryList]:
+    return [row_to_diary_list(row) for row in await session.exec(statement)]
+
+
+async def fetch_diary_list_one(session: AsyncSession, statement) -> DiaryList | None:
+    row = (await session.exec(statement)).first()
+    return row_to_diary_list(row) if row else None
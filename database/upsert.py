@@ -0,0 +1,17 @@
+from typing import Callable
+
+from sqlalchemy.dialects import mysql, sqlite
+
+
+def upsert_statement(dialect_name: str, model, rows: list[dict], keys: list[str],
+                     on_conflict: Callable[[object], dict]):
+    """INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT DO UPDATE (SQLite)
+
+    on_conflict 는 "새로 넣으려던 값" 접근자(inserted/excluded)를 받아 갱신할 값을 반환
+    예) lambda new: {"count": Model.count + new.count}
+    """
+    if dialect_name == "mysql":
+        statement = mysql.insert(model).values(rows)
+        return statement.on_duplicate_key_update(on_conflict(statement.inserted))
+    statement = sqlite.insert(model).values(rows)
+    return statement.on_conflict_do_update(index_elements=keys, set_=on_conflict(statement.excluded))
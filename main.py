@@ -1,8 +1,20 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from routes.users import user_router
 from routes.diary import diary_router
-from database.connection import start_ssh_tunnel_and_connect,stop_ssh_tunnel
+from routes.metrics import metrics_router
+from database.connection import start_ssh_tunnel_and_connect,stop_ssh_tunnel,dispose_async_engine
+from utils.clova import start_clova_client, close_clova_client
+from utils.emotion_worker import emotion_worker
+from utils.multipart_uploads import multipart_uploads
+from utils.s3 import s3_provider, s3_uploader
+from utils.s3_cleanup import s3_cleanup_worker
+from utils.thumbnails import thumbnail_worker
+from auth.hash_password import hash_password
+from utils.bloom import user_filter
+from utils.response_cache import feed_cache
+from utils.compression import CompressionMiddleware
 from starlette.middleware.sessions import SessionMiddleware  
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.proxy_headers import ProxyHeadersMiddleware
@@ -14,20 +26,41 @@ async def lifespan(app: FastAPI):
     print("애플리케이션 시작")
     
     start_ssh_tunnel_and_connect()
+    await s3_provider.start()
+    await user_filter.start()
+    await start_clova_client()
+    await emotion_worker.start()
+    await s3_cleanup_worker.start()
+    await thumbnail_worker.start()
+    await multipart_uploads.start()
     yield
     
+    await user_filter.stop()
+    await emotion_worker.stop()
+    await s3_cleanup_worker.stop()
+    await thumbnail_worker.stop()
+    await multipart_uploads.stop()
+    await close_clova_client()
+    await feed_cache.close()
+    await dispose_async_engine()
     stop_ssh_tunnel()
+    hash_password.shutdown()
+    s3_uploader.shutdown()
+    s3_provider.stop()
     # 애플리케이션이 종료될 때 실행 코드
     print("애플리케이션 종료")
 
-app = FastAPI(lifespan=lifespan)
+# 기본 응답 인코딩은 orjson (stdlib json 보다 빠르고 datetime 을 바로 처리)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(CompressionMiddleware) # br/gzip, 작은 응답은 그대로
 app.add_middleware(ProxyHeadersMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173","https://fc0b-58-120-204-126.ngrok-free.app","http://mybucket-mini3.s3-website.ap-northeast-2.amazonaws.com"],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type", "X-Requested-With"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With", "If-None-Match"],
+    expose_headers=["ETag"], # 브라우저가 ETag 를 읽어 조건부 GET (If-None-Match → 304) 에 사용
 )
 app.add_middleware(
     SessionMiddleware,
@@ -36,6 +69,7 @@ app.add_middleware(
 
 app.include_router(user_router, prefix="/users")
 app.include_router(diary_router, prefix="/diarys")
+app.include_router(metrics_router, prefix="/metrics")
 
 
 if __name__ == "__main__":
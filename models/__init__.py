@@ -2,3 +2,10 @@
 
 from .users_model import User
 from .diarys_model import Diary
+from .search_model import DiarySearchToken
+from .emotion_job_model import EmotionJob
+from .emotion_cache_model import EmotionCache
+from .s3_cleanup_model import S3OrphanObject
+from .emotion_stats_model import DiaryEmotionDaily
+from .thumbnail_model import ThumbnailJob
+from .multipart_upload_model import MultipartUpload
@@ -1,9 +1,10 @@
 from typing import TYPE_CHECKING, List, Optional
 from datetime import datetime, timedelta, date
-from sqlmodel import JSON, Column, Field, Relationship, SQLModel
+from sqlalchemy import Boolean, Computed
+from sqlmodel import JSON, Column, Field, Index, Relationship, SQLModel
 
 # from models.users_model import User
-# from pydantic import BaseModel
+from pydantic import BaseModel
 
 if TYPE_CHECKING:
     from models.users_model_model import User
@@ -13,16 +14,47 @@ def korea_now():                                                        #캘린
 
 
 class Diary(SQLModel, table=True):
+    # 피드 키셋 페이지네이션 (created_at DESC, id DESC) 용 인덱스
+    # 사용자당 하루 한 편 (중복 확인/생성 경쟁을 DB 가 보장)
+    # 공개 피드 (state 필터 + created_at 정렬) 용 인덱스
+    # 캘린더 월 보기용 커버링 인덱스 (id 는 InnoDB 보조 인덱스에 포함, content 는 읽지 않음)
+    #   image 대신 has_image 를 넣어 utf8mb4 에서도 키 길이 3072 바이트 제한에 여유 (약 2KB)
+    # 썸네일 완료 시 원본을 참조하는 일기 조회용 인덱스
+    __table_args__ = (
+        Index("ix_diary_created_at_id", "created_at", "id"),
+        Index("ix_diary_user_id_diary_date", "user_id", "diary_date", unique=True),
+        Index("ix_diary_state_created_at", "state", "created_at"),
+        Index("ix_diary_calendar", "user_id", "diary_date", "emotion", "title", "has_image"),
+        Index("ix_diary_image", "image"),
+    )
+
     id: int = Field(default=None, primary_key=True)
     title: str
     content: str
     image: str
     state: bool
     emotion: Optional[str] = None
+    emotion_status: Optional[str] = Field(default=None, max_length=16) # pending / done / failed
+    emotion_source: Optional[str] = Field(default=None, max_length=16, index=True) # clova / local
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
     user: Optional["User"] = Relationship(back_populates="diarys")
     created_at: datetime = Field(default_factory=korea_now, nullable=False) # 현재 시간으로 기본값 설정
     diary_date: date = Field(nullable=False)
+    version: int = Field(default=1, nullable=False, sa_column_kwargs={"server_default": "1"}) # 수정될 때마다 증가 (ETag)
+    thumbnail: Optional[str] = Field(default=None, max_length=255) # 목록용 WebP 썸네일 키 (생성 전이면 None)
+    # image 로 DB 가 계산하는 가상 컬럼 (쓰기 경로에서 따로 관리하지 않음, 응답에는 포함하지 않음)
+    has_image: Optional[bool] = Field(
+        default=None, exclude=True,
+        sa_column=Column(Boolean, Computed("image <> ''", persisted=False)),
+    )
+
+# 일기 작성 요청 (NDJSON 가져오기의 각 행도 같은 형식)
+class DiaryCreate(BaseModel):
+    title: str
+    content: str
+    state: bool = True
+    image: Optional[str] = None # S3에 업로드된 경우 파일 키(경로) 또는 URL
+    diary_date: date # YYYY-MM-DD 형식으로 받을 예정
 
 # 일기장 수정 시 전달되는 데이터 모델
 class DiaryUpdate(SQLModel):
@@ -40,7 +72,37 @@ class DiaryList(SQLModel):
     image: str
     state: bool
     emotion: Optional[str] = None
+    emotion_status: Optional[str] = None
+    emotion_source: Optional[str] = None
     created_at: datetime # datetime 타입으로 추가
     diary_date: date
     user_id: Optional[int] = None
-    username: Optional[str] = None # 작성자 이름 필드
\ No newline at end of file
+    username: Optional[str] = None # 작성자 이름 필드
+    version: Optional[int] = None # ETag 용 일기 버전
+    thumbnail: Optional[str] = None # 목록용 WebP 썸네일 키 (없으면 원본 사용)
+    image_url: Optional[str] = None # include_image_urls=true 일 때만 채워지는 이미지 GET URL
+    thumbnail_url: Optional[str] = None # include_image_urls=true 이고 썸네일이 있을 때만
+
+# 커서 페이지네이션 응답 모델 (limit/cursor 사용 시)
+class DiaryPage(SQLModel):
+    items: List[DiaryList]
+    next_cursor: Optional[str] = None # 다음 페이지가 없으면 None
+
+# 캘린더 월 보기의 하루 (본문 없이 달력 칸에 필요한 값만)
+class DiaryCalendarDay(SQLModel):
+    id: int
+    diary_date: date
+    emotion: Optional[str] = None
+    has_image: bool
+    title: str
+
+# presigned PUT 업로드 완료 알림 (썸네일 생성 요청)
+class ImageUploadComplete(BaseModel):
+    key: str # presigned-url 응답의 key
+
+# 감정 분석 진행 상태 조회 응답
+class DiaryEmotionStatus(SQLModel):
+    diary_id: int
+    emotion: Optional[str] = None
+    emotion_status: Optional[str] = None
+    emotion_source: Optional[str] = None # clova 가 아니면 나중에 재분석되어 바뀔 수 있음
@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+from models.diarys_model import korea_now
+
+
+# 정규화된 일기 내용 해시 → 감정 분석 결과 (replica 간 공유, 재시작 후에도 유지)
+class EmotionCache(SQLModel, table=True):
+    __tablename__ = "emotion_cache"
+
+    content_hash: str = Field(primary_key=True, max_length=64) # sha256 hex
+    emotion: str = Field(max_length=64)
+    created_at: datetime = Field(default_factory=korea_now, nullable=False)
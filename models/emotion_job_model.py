@@ -0,0 +1,29 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field, Index, SQLModel
+
+from models.diarys_model import korea_now
+
+# 감정 분석 작업 상태
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+# 감정 분석 작업 큐 (DB 테이블이므로 재시작/여러 replica 에서도 유지됨)
+class EmotionJob(SQLModel, table=True):
+    __tablename__ = "emotion_job"
+    # 워커가 "지금 처리 가능한 작업"을 찾는 조회용 인덱스
+    __table_args__ = (
+        Index("ix_emotion_job_status_available_at", "status", "available_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    diary_id: int = Field(foreign_key="diary.id", index=True)
+    status: str = Field(default=JOB_PENDING, max_length=16)
+    attempts: int = Field(default=0, nullable=False)
+    # pending: 이 시각 이후 처리 (재시도 backoff) / running: lease 만료 시각 (워커가 죽으면 재처리)
+    available_at: datetime = Field(default_factory=korea_now, nullable=False)
+    created_at: datetime = Field(default_factory=korea_now, nullable=False)
+    last_error: Optional[str] = Field(default=None, max_length=255)
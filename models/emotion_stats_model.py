@@ -0,0 +1,38 @@
+from datetime import date
+from typing import Dict
+from sqlmodel import Field, SQLModel
+
+NO_EMOTION = "" # 아직 분석되지 않은 (또는 분석 실패한) 일기
+
+
+# 사용자별 하루 감정 집계 (일기 생성/수정/삭제, 감정 결과 기록과 같은 트랜잭션에서 증감)
+# (user_id, day, emotion) 가 PK 이므로 한 사용자의 기간 집계는 PK 범위 스캔 한 번
+class DiaryEmotionDaily(SQLModel, table=True):
+    __tablename__ = "diary_emotion_daily"
+
+    user_id: int = Field(primary_key=True)
+    day: date = Field(primary_key=True) # Diary.diary_date
+    emotion: str = Field(primary_key=True, max_length=64)
+    count: int = Field(default=0, nullable=False) # 0 이 된 행은 남겨 두고 조회 시 제외
+
+
+# 기간 하나의 감정 분포
+class EmotionDistribution(SQLModel):
+    start: date
+    end: date # 포함
+    total: int
+    emotions: Dict[str, int] # 감정 → 일기 수
+    unanalyzed: int # 감정이 아직 없는 일기 수
+
+# 연속 작성 일수
+class EmotionStreak(SQLModel):
+    current: int # 기준일 (또는 전날) 까지 이어진 일수
+    longest: int
+
+# 감정 통계 응답
+class EmotionStats(SQLModel):
+    date: date
+    week: EmotionDistribution
+    month: EmotionDistribution
+    year: EmotionDistribution
+    streak: EmotionStreak
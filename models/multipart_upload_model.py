@@ -0,0 +1,55 @@
+from typing import List, Optional
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+from models.diarys_model import korea_now
+
+
+# 클라이언트가 part 를 직접 올리는 중인 S3 multipart 업로드
+# 완료/중단되면 행을 지우고, expires_at 이 지나면 정리 워커가 S3 업로드를 중단
+class MultipartUpload(SQLModel, table=True):
+    __tablename__ = "s3_multipart_upload"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    object_key: str = Field(max_length=255, unique=True) # Diary.image 와 같은 길이
+    upload_id: str = Field(max_length=1024)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    content_type: str = Field(max_length=64)
+    size: int # 클라이언트가 알린 파일 크기
+    part_size: int
+    part_count: int
+    created_at: datetime = Field(default_factory=korea_now, nullable=False)
+    # 이 시각 이후 정리 (정리 실패 시 backoff 만큼 뒤로 미룸)
+    expires_at: datetime = Field(nullable=False, index=True)
+    last_error: Optional[str] = Field(default=None, max_length=255)
+
+
+# multipart 업로드 시작 요청
+class MultipartUploadStart(SQLModel):
+    content_type: str # image/jpeg 등
+    size: int = Field(gt=0) # 바이트
+
+# 실패/만료된 part 의 URL 재발급 요청
+class MultipartPartUrlsRequest(SQLModel):
+    part_numbers: List[int] = Field(min_length=1, max_length=1000)
+
+# part 업로드 URL
+class MultipartPartUrl(SQLModel):
+    part_number: int
+    url: str
+
+# 올라간 part
+class MultipartUploadedPart(SQLModel):
+    part_number: int
+    size: int
+    etag: str
+
+# 업로드 상태 (시작/조회 응답)
+class MultipartUploadStatus(SQLModel):
+    key: str
+    part_size: int
+    part_count: int
+    expires_at: datetime
+    uploaded: List[MultipartUploadedPart] = []
+    missing: List[int] = [] # 아직 올라가지 않은 part 번호
+    urls: List[MultipartPartUrl] = [] # 시작 응답에서는 전체 part, 조회 응답에서는 빈 목록
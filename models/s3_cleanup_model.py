@@ -0,0 +1,18 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+from models.diarys_model import korea_now
+
+
+# 삭제된 일기가 참조하던 S3 객체 (백그라운드에서 일괄 삭제)
+class S3OrphanObject(SQLModel, table=True):
+    __tablename__ = "s3_orphan_object"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    object_key: str = Field(max_length=1024)
+    attempts: int = Field(default=0, nullable=False)
+    # 이 시각 이후 처리 (재시도 backoff / 처리 중 lease 만료 시각)
+    available_at: datetime = Field(default_factory=korea_now, nullable=False, index=True)
+    created_at: datetime = Field(default_factory=korea_now, nullable=False)
+    last_error: Optional[str] = Field(default=None, max_length=255)
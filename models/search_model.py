@@ -0,0 +1,16 @@
+from sqlalchemy import String
+from sqlalchemy.dialects import mysql
+from sqlmodel import Column, Field, SQLModel
+
+# 토큰은 정규화된 값을 그대로 비교해야 하므로 MySQL 에서는 binary collation 사용
+TOKEN_TYPE = String(32).with_variant(mysql.VARCHAR(32, collation="utf8mb4_bin"), "mysql")
+
+
+# 일기 전문 검색용 역색인 (토큰 → 일기 posting list)
+# (token, diary_id) 가 PK 이므로 토큰 하나의 posting list는 인덱스 범위 스캔 한 번으로 읽힘
+class DiarySearchToken(SQLModel, table=True):
+    __tablename__ = "diary_search_token"
+
+    token: str = Field(sa_column=Column(TOKEN_TYPE, primary_key=True))
+    diary_id: int = Field(primary_key=True, foreign_key="diary.id", index=True)
+    tf: int = Field(default=1, nullable=False) # 가중치가 반영된 출현 빈도 (제목은 가중)
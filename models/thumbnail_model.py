@@ -0,0 +1,25 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+from models.diarys_model import korea_now
+
+# 썸네일 작업 상태
+THUMBNAIL_PENDING = "pending"
+THUMBNAIL_DONE = "done"
+THUMBNAIL_FAILED = "failed"
+
+
+# 업로드된 원본 이미지의 썸네일 생성 작업
+# 완료된 행은 남겨 두어, 썸네일이 먼저 만들어진 뒤 작성된 일기도 썸네일 키를 찾을 수 있게 함
+class ThumbnailJob(SQLModel, table=True):
+    __tablename__ = "thumbnail_job"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    object_key: str = Field(max_length=255, unique=True) # Diary.image 와 같은 길이
+    status: str = Field(default=THUMBNAIL_PENDING, max_length=16)
+    attempts: int = Field(default=0, nullable=False)
+    # pending: 이 시각 이후 처리 (재시도 backoff / 처리 중 lease 만료 시각)
+    available_at: datetime = Field(default_factory=korea_now, nullable=False, index=True)
+    created_at: datetime = Field(default_factory=korea_now, nullable=False)
+    last_error: Optional[str] = Field(default=None, max_length=255)
@@ -8,9 +8,9 @@ if TYPE_CHECKING:
 
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    email: EmailStr
+    email: EmailStr = Field(unique=True, index=True)
     password: str
-    username: str
+    username: str = Field(unique=True, index=True)
     role: str
     diarys: Optional[List["Diary"]] = Relationship(back_populates="user")
 
@@ -1,18 +1,40 @@
+import asyncio
 import json
-from typing import List, Optional
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Path, UploadFile, status, Body, Query
+import time
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Path, UploadFile, status, Body, Query, Request, Response
+from fastapi.responses import StreamingResponse
 # from fastapi.responses import FileResponse # S3 사용으로 FileResponse는 주석 처리 또는 제거
-from sqlmodel import select, Session
-from pydantic import BaseModel # DiaryCreate 모델을 위해 추가
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from pydantic import BaseModel, TypeAdapter # DiaryCreate 모델을 위해 추가
 from datetime import datetime, date # date 타입 사용을 위해 추가
 
-from auth.authenticate import authenticate, get_current_user_role
-from database.connection import get_session
+from auth.authenticate import Principal, authenticate, get_current_principal, get_optional_principal
+from database.connection import get_async_session
+from database.diary_query import diary_calendar_statement, diary_list_statement, row_to_calendar_day, fetch_diary_list, fetch_diary_list_one, is_duplicate_diary_date, row_to_diary_dict
 
-from models.diarys_model import Diary, DiaryUpdate, DiaryList # DiaryList 모델이 username, user_id, state 필드를 포함해야 함
+from models.diarys_model import Diary, DiaryCalendarDay, DiaryCreate, DiaryUpdate, DiaryList, DiaryPage, DiaryEmotionStatus, ImageUploadComplete, korea_now # DiaryList 모델이 username, user_id, state 필드를 포함해야 함
+from models.emotion_stats_model import EmotionStats
+from models.multipart_upload_model import MultipartPartUrl, MultipartPartUrlsRequest, MultipartUploadStart, MultipartUploadStatus
 from models.users_model import User
-from utils.s3 import get_presigned_url, BUCKET_NAME,get_s3_client
-from utils.clova import analyze_emotion_async
+from utils.s3 import DOWNLOAD_URL_REUSE_MARGIN, get_presigned_url, generate_presigned_download_url, head_object, image_object_key, new_upload_key, owned_object_key, presign_download_urls, s3_uploader, uploaded_object_url
+from utils.clova import SOURCE_CLOVA
+from utils.diary_bulk import import_diaries, iter_ndjson, stream_diary_export
+from utils.emotion_cache import content_hash, emotion_cache
+from utils.emotion_stats import EmotionStatDelta, emotion_stats
+from utils.emotion_worker import EMOTION_DONE, emotion_worker, enqueue_emotion_job, remove_emotion_jobs
+from utils.pagination import apply_keyset, encode_cursor
+from utils.json_stream import stream_json_array
+from utils.multipart_uploads import multipart_uploads
+from utils.image_owner import ensure_image_owner
+from utils.etag import PRIVATE_CACHE_CONTROL, PUBLIC_CACHE_CONTROL, diary_etag, etag_matches, list_etag, not_modified, set_etag
+from utils.response_cache import calendar_cache, diary_list_version, feed_cache, invalidate_diary_views
+from utils.s3_cleanup import queue_object_cleanup, s3_cleanup_worker
+from utils.thumbnails import THUMBNAIL_MAX_SOURCE_BYTES, find_thumbnails, request_thumbnails, thumbnail_worker
+from utils.search import index_diary, query_tokens, ranked_match_subquery, remove_diary_index
 
 # pathlib 모듈의 Path 클래스를 FilePath 이름으로 사용
 from pathlib import Path as FilePath
@@ -21,20 +43,39 @@ from pathlib import Path as FilePath
 
 diary_router = APIRouter(tags=["Diary"])
 
-# --- Pydantic 모델 정의 (필요시 models/diarys.py 로 이동) ---
-class DiaryCreate(BaseModel):
-    title: str
-    content: str
-    state: bool = True
-    image: Optional[str] = None # S3에 업로드된 경우 파일 키(경로) 또는 URL
-    diary_date: date # YYYY-MM-DD 형식으로 받을 예정
+DEFAULT_PAGE_SIZE = 20 # cursor만 주어지고 limit이 없을 때의 페이지 크기
+BULK_DELETE_CHUNK = 1000 # 전체 삭제 시 한 번에 지우는 일기 수
+
+def image_download_urls(images: List[Optional[str]]) -> List[Optional[str]]:
+    """페이지에 포함된 모든 이미지의 다운로드 URL을 한 번에 서명"""
+    keys = [image_object_key(image) for image in images]
+    urls = presign_download_urls(key for key in keys if key)
+    return [urls[key] if key else None for key in keys]
+
+def attach_image_urls(diaries: List[DiaryList]) -> None:
+    for diary, url in zip(diaries, image_download_urls([diary.image for diary in diaries])):
+        diary.image_url = url
+    for diary, url in zip(diaries, image_download_urls([diary.thumbnail for diary in diaries])):
+        diary.thumbnail_url = url
+
+def diary_rows_to_dicts(include_image_urls: bool):
+    """스트리밍 응답용 행 묶음 변환 (DiaryList 모델을 거치지 않음)"""
+    def transform(rows) -> List[dict]:
+        items = [row_to_diary_dict(row) for row in rows]
+        if include_image_urls:
+            for item, url in zip(items, image_download_urls([item["image"] for item in items])):
+                item["image_url"] = url
+            for item, url in zip(items, image_download_urls([item["thumbnail"] for item in items])):
+                item["thumbnail_url"] = url
+        return items
+    return transform
 
 # --- API 엔드포인트 ---
 
 @diary_router.get("/presigned-url")
 async def generate_presigned_url_for_upload(file_type: str, user_id: int = Depends(authenticate)):
     try:
-        url_data = get_presigned_url(file_type) # 이 함수는 S3 업로드용 URL과 파일 키(key)를 반환해야 함
+        url_data = get_presigned_url(file_type, user_id) # 이 함수는 S3 업로드용 URL과 파일 키(key)를 반환해야 함
         return url_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Presigned URL 생성 실패: {str(e)}")
@@ -42,44 +83,272 @@ async def generate_presigned_url_for_upload(file_type: str, user_id: int = Depen
 @diary_router.get("/download-url")
 async def generate_presigned_url_for_download(file_key: str, user_id: int = Depends(authenticate)):
     try:
-        s3 = get_s3_client()
-        url = s3.generate_presigned_url(
-            ClientMethod='get_object',
-            Params={
-                'Bucket': BUCKET_NAME,
-                'Key': file_key
-            },
-            ExpiresIn=3600  # 유효기간 1시간
-        )
+        url = generate_presigned_download_url(file_key)  # 유효기간 1시간, 공유 S3 클라이언트 사용
         return {"download_url": url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"다운로드 URL 생성 실패: {str(e)}")
 
+@diary_router.post("/images", status_code=status.HTTP_201_CREATED, summary="이미지 업로드 (서버 경유)")
+async def upload_image(
+    request: Request,
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """요청 본문이 이미지 그대로 (Content-Type: image/*) - 받는 대로 S3 multipart 로 전송"""
+    # multipart/form-data 는 핸들러 실행 전에 전체를 임시 파일로 받으므로 원본 본문을 직접 스트리밍
+    content_type = request.headers.get("content-type")
+    content_length = request.headers.get("content-length")
+    declared_size = int(content_length) if content_length and content_length.isdigit() else None
+    ext = s3_uploader.check(content_type, declared_size) # 본문을 읽기 전에 415/413
+
+    key = new_upload_key(user_id, ext)
+    result = await s3_uploader.upload(request.stream(), key, content_type, declared_size)
+
+    thumbnail = await request_thumbnails(session, key)
+    await session.commit()
+    thumbnail_worker.notify()
+    return {**result, "url": uploaded_object_url(key), "thumbnail": thumbnail}
+
+@diary_router.post("/images/complete", status_code=status.HTTP_202_ACCEPTED, summary="presigned PUT 업로드 완료 알림")
+async def complete_image_upload(
+    payload: ImageUploadComplete,
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """업로드된 원본을 확인하고 썸네일 생성을 예약 (일기 작성 전/후 어느 때나 호출 가능)"""
+    key = owned_object_key(payload.key)
+    if key is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="이 버킷의 이미지 키가 아닙니다.")
+    await ensure_image_owner(session, user_id, [key])
+    try:
+        head = await asyncio.to_thread(head_object, key)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"업로드 확인 실패: {str(e)}")
+    if head is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="업로드된 이미지를 찾을 수 없습니다.")
+    if not head.get("ContentType", "").startswith("image/"):
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="이미지 파일만 처리할 수 있습니다.")
+    if head.get("ContentLength", 0) > THUMBNAIL_MAX_SOURCE_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="이미지가 너무 큽니다.")
+
+    thumbnail = await request_thumbnails(session, key)
+    await session.commit()
+    thumbnail_worker.notify()
+    return {"key": key, "thumbnail": thumbnail}
+
+@diary_router.post("/images/multipart", status_code=status.HTTP_201_CREATED, response_model=MultipartUploadStatus, summary="multipart 업로드 시작 (part 별 presigned PUT URL)")
+async def start_multipart_image_upload(
+    payload: MultipartUploadStart,
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """큰 이미지를 part 로 나눠 동시에 올림 - 모든 part 를 올린 뒤 complete 호출 (ETag 는 서버가 S3 에서 직접 확인)"""
+    result = await multipart_uploads.begin(session, user_id, payload.content_type, payload.size)
+    await session.commit()
+    return result
+
+@diary_router.get("/images/multipart/{key}", response_model=MultipartUploadStatus, summary="multipart 업로드 상태 (이어 올리기)")
+async def retrieve_multipart_image_upload(
+    key: str,
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """올라간 part 와 빠진 part 번호 - 빠진 part 는 /parts 로 URL 을 다시 받아 올림"""
+    upload = await multipart_uploads.get(session, user_id, key)
+    return await multipart_uploads.status(session, upload)
+
+@diary_router.post("/images/multipart/{key}/parts", response_model=List[MultipartPartUrl], summary="part 업로드 URL 재발급")
+async def renew_multipart_part_urls(
+    key: str,
+    payload: MultipartPartUrlsRequest,
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    upload = await multipart_uploads.get(session, user_id, key)
+    return multipart_uploads.part_urls(upload, payload.part_numbers)
+
+@diary_router.post("/images/multipart/{key}/complete", summary="multipart 업로드 완료")
+async def complete_multipart_image_upload(
+    key: str,
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """빠진 part 가 있으면 409 (detail.missing) - 해당 part 만 다시 올린 뒤 재시도"""
+    upload = await multipart_uploads.get(session, user_id, key, for_update=True) # 동시 완료/중단 요청 직렬화
+    size = await multipart_uploads.complete(session, upload)
+    thumbnail = await request_thumbnails(session, key) if size <= THUMBNAIL_MAX_SOURCE_BYTES else None
+    await session.commit()
+    if thumbnail:
+        thumbnail_worker.notify()
+    return {"key": key, "size": size, "url": uploaded_object_url(key), "thumbnail": thumbnail}
+
+@diary_router.delete("/images/multipart/{key}", status_code=status.HTTP_204_NO_CONTENT, summary="multipart 업로드 중단")
+async def abort_multipart_image_upload(
+    key: str,
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    upload = await multipart_uploads.get(session, user_id, key, for_update=True)
+    await multipart_uploads.abort(session, upload)
+    await session.commit()
+
 @diary_router.get("/check-duplicate", response_model=dict)
 async def check_duplicate_diary_exists(
     diary_date: date = Query(..., description="YYYY-MM-DD 형식의 날짜"),
     user_id: int = Depends(authenticate),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    statement = select(Diary).where(
+    # (user_id, diary_date) 유니크 인덱스만 읽음
+    statement = select(Diary.id).where(
         Diary.user_id == user_id,
         Diary.diary_date == diary_date
     )
-    existing_diary = session.exec(statement).first()
+    existing_diary = (await session.exec(statement)).first()
     if existing_diary:
         return {"exists": True}
     return {"exists": False}
 
-@diary_router.get("/", response_model=List[DiaryList])
+_calendar_adapter = TypeAdapter(List[DiaryCalendarDay])
+
+@diary_router.get("/calendar", response_model=List[DiaryCalendarDay], summary="캘린더 월 보기")
+async def retrieve_diary_calendar(
+    request: Request,
+    year: int = Query(..., ge=1900, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """본인 일기의 한 달치 (id, 날짜, 감정, 이미지 여부, 제목) - 본문은 읽지 않음"""
+    # 사용자별 버전으로 ETag/캐시 무효화 (그 사용자의 일기가 바뀌면 증가)
+    version = await calendar_cache.version(scope=user_id)
+    headers = {}
+    if version is not None:
+        etag = list_etag(version, "calendar", user_id, year, month)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        headers = {"ETag": etag, "Cache-Control": PRIVATE_CACHE_CONTROL}
+
+    async def compute() -> bytes:
+        first_day = date(year, month, 1)
+        next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        rows = await session.exec(diary_calendar_statement(user_id, first_day, next_month))
+        return _calendar_adapter.dump_json([row_to_calendar_day(row) for row in rows])
+
+    body = await calendar_cache.get_or_compute(f"{year}-{month:02d}", compute, scope=user_id)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@diary_router.get("/stats/emotions", response_model=EmotionStats, summary="감정 통계 (주/월/년 분포, 연속 작성 일수)")
+async def retrieve_emotion_stats(
+    day: Optional[date] = Query(None, alias="date", description="기준일 YYYY-MM-DD (생략 시 오늘)"),
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    # 일기를 세지 않고 diary_emotion_daily 집계만 읽음
+    return await emotion_stats(session, user_id, day or korea_now().date())
+
+@diary_router.get("/export", summary="일기 NDJSON 내보내기")
+async def export_diaries(
+    user_id: Optional[int] = Query(None, description="관리자만: 내보낼 사용자 (생략 시 본인)"),
+    principal: Principal = Depends(get_current_principal)
+):
+    target_user_id = principal.user_id
+    if user_id is not None and user_id != principal.user_id:
+        if not principal.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="다른 사용자의 일기를 내보낼 권한이 없습니다."
+            )
+        target_user_id = user_id
+
+    statement = diary_list_statement().where(Diary.user_id == target_user_id).order_by(Diary.id)
+    return StreamingResponse(
+        stream_diary_export(statement),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="diaries-{target_user_id}.ndjson"'},
+    )
+
+@diary_router.post("/import", summary="일기 NDJSON 가져오기")
+async def import_diaries_ndjson(
+    request: Request,
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """한 줄에 일기 하나 (POST / 와 같은 형식, 내보내기 파일도 그대로 사용 가능)"""
+    summary = await import_diaries(session, user_id, iter_ndjson(request.stream()))
+    public = summary.pop("public")
+    if summary["emotion_jobs"]:
+        emotion_worker.notify()
+    if summary["imported"]:
+        await invalidate_diary_views(public=public, user_ids=[user_id])
+    return summary
+
+@diary_router.get("/", response_model=Union[List[DiaryList], DiaryPage])
 async def retrieve_all_diaries(
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
     state: Optional[bool] = None,
-    current_user_id: Optional[int] = Depends(authenticate), # authenticate가 None을 반환할 수 있도록 authenticate 수정 필요 또는 별도 의존성 사용
-    user_role: Optional[str] = Depends(get_current_user_role)
+    limit: Optional[int] = Query(None, ge=1, le=100, description="커서 페이지네이션 시 페이지 크기"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    include_image_urls: bool = Query(False, description="이미지 다운로드 URL을 응답에 포함"),
+    stream: bool = Query(False, description="전체 목록을 DB 커서에서 읽는 대로 JSON 배열로 전송 (limit/cursor 없을 때)"),
+    principal: Optional[Principal] = Depends(get_optional_principal) # 토큰 검증 1회, 역할은 토큰 클레임에서 (없으면 익명)
 ):
-    statement = select(Diary).join(User, isouter=True).order_by(Diary.created_at.desc()) # User 정보를 함께 가져오기 위함
+    anonymous_public = principal is None and state is not False
+    cache_control = PUBLIC_CACHE_CONTROL if anonymous_public else PRIVATE_CACHE_CONTROL
+
+    # 목록 버전으로 ETag 를 만들어 조회 전에 비교 (바뀐 게 없으면 본문 없이 304)
+    version = await (feed_cache.version() if anonymous_public else diary_list_version.get())
+    headers = {}
+    if version is not None:
+        viewer = (principal.user_id, principal.role) if principal else None
+        etag = list_etag(version, viewer, state, limit, cursor, image_url_epoch(include_image_urls))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag, cache_control)
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if anonymous_public:
+        # 익명 사용자의 공개 피드는 누구에게나 같으므로 직렬화된 응답을 공유 캐시에서 반환
+        key = f"limit={limit}:cursor={cursor}:img={int(include_image_urls)}"
+
+        async def compute() -> bytes:
+            return serialize_feed(await query_feed(session, state, limit, cursor, include_image_urls, principal))
+
+        body = await feed_cache.get_or_compute(key, compute)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    if stream and limit is None and cursor is None:
+        statement = feed_statement(state, principal)
+        if statement is None:
+            return Response(content=b"[]", media_type="application/json", headers=headers)
+        return StreamingResponse(
+            stream_json_array(statement.order_by(Diary.created_at.desc(), Diary.id.desc()), diary_rows_to_dicts(include_image_urls)),
+            media_type="application/json",
+            headers=headers,
+        )
+
+    # 이미 DB 타입이 보장된 모델이므로 response_model 재검증 없이 바로 직렬화
+    result = await query_feed(session, state, limit, cursor, include_image_urls, principal)
+    return Response(content=serialize_feed(result), media_type="application/json", headers=headers)
+
+
+def image_url_epoch(include_image_urls: bool) -> int:
+    """이미지 URL 을 포함한 응답은 URL 재사용 주기마다 ETag 를 바꿔 만료된 URL 이 계속 쓰이지 않도록 함"""
+    return int(time.time() // DOWNLOAD_URL_REUSE_MARGIN) if include_image_urls else 0
+
+
+_diary_list_adapter = TypeAdapter(List[DiaryList])
+
+def serialize_feed(result: Union[List[DiaryList], DiaryPage]) -> bytes:
+    if isinstance(result, DiaryPage):
+        return result.model_dump_json().encode()
+    return _diary_list_adapter.dump_json(result)
+
+def feed_statement(state: Optional[bool], principal: Optional[Principal]):
+    """보는 사람 권한에 맞춘 목록 SELECT (정렬 전), 볼 수 있는 일기가 없으면 None"""
+    current_user_id = principal.user_id if principal else None
+    statement = diary_list_statement() # 필요한 컬럼 + 작성자 username을 한 번에 조회
     
-    is_admin = (user_role == "admin")
+    is_admin = principal.is_admin if principal else False
 
     if state is not None:
         statement = statement.where(Diary.state == state)
@@ -92,7 +361,7 @@ async def retrieve_all_diaries(
                 statement = statement.where(Diary.user_id == current_user_id)
             else:
                 # 로그인하지 않은 경우 비공개 일기는 볼 수 없습니다.
-                return []
+                return None
         # state=True (공개 일기)인 경우, 누구나 볼 수 있으므로 추가 필터링이 필요 없습니다.
     else:
         # state 파라미터가 없을 때 (전체 목록, 기본 필터링)
@@ -118,100 +387,173 @@ async def retrieve_all_diaries(
     #     else:
     #         # 로그인하지 않은 사용자: 모든 공개 일기
     #         statement = statement.where(Diary.state == True)
+    return statement
+
+async def query_feed(
+    session: AsyncSession,
+    state: Optional[bool],
+    limit: Optional[int],
+    cursor: Optional[str],
+    include_image_urls: bool,
+    principal: Optional[Principal],
+) -> Union[List[DiaryList], DiaryPage]:
+    # limit 또는 cursor가 주어지면 커서(키셋) 페이지네이션 모드로 동작
+    paginate = limit is not None or cursor is not None
+    page_size = limit or DEFAULT_PAGE_SIZE
+
+    statement = feed_statement(state, principal)
+    if statement is None:
+        return DiaryPage(items=[]) if paginate else []
+
+    if paginate:
+        # (created_at, id) 기준으로 커서 이후만 조회 → OFFSET 없이 깊이와 무관하게 일정한 비용
+        # 다음 페이지 존재 여부 확인을 위해 한 건 더 조회
+        statement = apply_keyset(statement, Diary.created_at, Diary.id, cursor).limit(page_size + 1)
+    else:
+        statement = statement.order_by(Diary.created_at.desc(), Diary.id.desc())
     
-    diary_results = session.exec(statement).unique().all()
-    
-    response_diaries = []
-    for diary in diary_results:
-        diary_data = diary.model_dump() # Diary 모델의 데이터
-        # DiaryList에 필요한 추가 정보 (username, user_id, state)
-        diary_data["username"] = diary.user.username if diary.user else "알 수 없음"
-        diary_data["user_id"] = diary.user_id
-        # diary_data["state"] = diary.state # 이미 model_dump에 포함되어 있을 것임 (Diary 모델 필드라면)
-        
-        # DiaryList 모델에 맞게 response_diaries에 추가
-        # 이 부분은 DiaryList 모델의 정의에 따라 조정될 수 있습니다.
-        # 예를 들어, DiaryList가 Diary 모델을 상속하고 username만 추가한다면:
-        # response_diaries.append(DiaryList(**diary_data, username=diary_data["username"]))
-        # 현재 코드에서는 DiaryList가 모든 필드를 직접 받는다고 가정합니다.
-        response_diaries.append(DiaryList(**diary_data))
-        
+    response_diaries = await fetch_diary_list(session, statement)
+
+    next_cursor = None
+    if paginate and len(response_diaries) > page_size:
+        response_diaries = response_diaries[:page_size]
+        last = response_diaries[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    if include_image_urls:
+        attach_image_urls(response_diaries)
+
+    if paginate:
+        return DiaryPage(items=response_diaries, next_cursor=next_cursor)
     return response_diaries
 
 @diary_router.get("/{diary_id}", response_model=DiaryList)
 async def retrieve_diary(
     diary_id: int,
-    session: Session = Depends(get_session),
-    current_user_id: Optional[int] = Depends(authenticate), # 위와 동일하게 Optional 처리
-    user_role: Optional[str] = Depends(get_current_user_role)
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+    principal: Principal = Depends(get_current_principal)
 ):
-    # join(User)를 사용하여 작성자 정보도 함께 로드
-    statement = select(Diary).where(Diary.id == diary_id).join(User, isouter=True)
-    diary = session.exec(statement).first()
+    # 먼저 content 없이 버전/권한 정보만 조회 → 클라이언트가 최신이면 304
+    meta = (await session.exec(
+        select(Diary.version, Diary.user_id, Diary.state).where(Diary.id == diary_id)
+    )).first()
 
-    if not diary:
+    if not meta:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="일치하는 일기를 찾을 수 없습니다."
         )
         
-    is_admin = (user_role == "admin")
-    
-    if not diary.state: # 비공개 일기인 경우
-        if not is_admin and (not current_user_id or diary.user_id != current_user_id):
+    if not meta.state: # 비공개 일기인 경우
+        if not principal.is_admin and meta.user_id != principal.user_id:
             # 관리자가 아니고, 로그인하지 않았거나 일기 작성자가 아닌 경우 접근 금지
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="이 일기에 접근할 권한이 없습니다."
             )
-            
-    diary_data = diary.model_dump()
-    diary_data["username"] = diary.user.username if diary.user else "알 수 없음"
-    # user_id, state는 diary.model_dump()에 이미 포함되어 있다고 가정 (Diary 모델의 필드)
-    
-    return DiaryList(**diary_data)
+
+    etag = diary_etag(diary_id, meta.version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    # 작성자 username까지 한 번의 쿼리로 로드
+    statement = diary_list_statement().where(Diary.id == diary_id)
+    diary = await fetch_diary_list_one(session, statement)
+    if not diary: # 두 조회 사이에 삭제됨
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="일치하는 일기를 찾을 수 없습니다."
+        )
+
+    set_etag(response, diary_etag(diary_id, diary.version)) # 두 조회 사이에 수정됐을 수 있으므로 본문 기준
+    return diary
+
+@diary_router.get("/{diary_id}/emotion", response_model=DiaryEmotionStatus)
+async def retrieve_diary_emotion_status(
+    diary_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    principal: Principal = Depends(get_current_principal)
+):
+    """감정 분석 진행 상태 조회 (pending → done / failed)"""
+    statement = select(
+        Diary.user_id, Diary.state, Diary.emotion, Diary.emotion_status, Diary.emotion_source
+    ).where(Diary.id == diary_id)
+    diary = (await session.exec(statement)).first()
+    if not diary:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="일치하는 일기를 찾을 수 없습니다."
+        )
+
+    if not diary.state and not principal.is_admin and diary.user_id != principal.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="이 일기에 접근할 권한이 없습니다."
+        )
+
+    return DiaryEmotionStatus(
+        diary_id=diary_id,
+        emotion=diary.emotion,
+        emotion_status=diary.emotion_status,
+        emotion_source=diary.emotion_source,
+    )
 
 @diary_router.post("/", status_code=status.HTTP_201_CREATED, response_model=Diary) # 반환 타입을 Diary로 명시 (또는 DiaryList)
 async def create_diary(
     payload: DiaryCreate, # Pydantic 모델로 요청 본문 받기
     user_id: int = Depends(authenticate),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    # 중복 체크: 같은 날짜에 같은 사용자가 이미 쓴 일기 있는지 확인
-    statement = select(Diary).where(
-        Diary.user_id == user_id,
-        Diary.diary_date == payload.diary_date
-    )
-    existing_diary = session.exec(statement).first()
-
-    if existing_diary:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, # 400 대신 409 Conflict가 더 적절할 수 있음
-            detail="같은 날짜에 이미 작성한 일기가 있습니다."
-        )
+    # 다른 사용자가 올린 객체는 연결하지 않음 (이 일기를 지울 때 남의 이미지가 정리되지 않도록)
+    await ensure_image_owner(session, user_id, [payload.image])
 
     # Diary 객체 생성 준비
+    # 중복 체크는 별도 SELECT 없이 (user_id, diary_date) 유니크 인덱스로 처리
     diary_data = payload.model_dump()
     diary_data["user_id"] = user_id
-    
-    # 감정 분석 (content가 비어있지 않을 때만 수행)
-    if payload.content:
-        try:
-            emotion = await analyze_emotion_async(payload.content)
-            diary_data["emotion"] = emotion
-        except Exception as e:
-            # 감정 분석 실패 시 로깅하고 계속 진행하거나, 오류 처리 (여기서는 일단 None으로 둘 수 있음)
-            print(f"감정 분석 실패: {e}")
-            diary_data["emotion"] = None # 또는 기본값
-    else:
-        diary_data["emotion"] = None
+    diary_data["emotion"] = None
+    # 업로드 완료 알림으로 썸네일이 이미 만들어졌으면 바로 연결 (아직이면 워커가 완료 시 기록)
+    diary_data["thumbnail"] = (await find_thumbnails(session, [payload.image])).get(payload.image)
 
 
     new_diary = Diary(**diary_data)
     
     session.add(new_diary)
-    session.commit()
-    session.refresh(new_diary)
+    try:
+        await session.flush() # id 확보 후 같은 트랜잭션에서 검색 색인
+    except IntegrityError as e:
+        await session.rollback()
+        if not is_duplicate_diary_date(e):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, # 400 대신 409 Conflict가 더 적절할 수 있음
+            detail="같은 날짜에 이미 작성한 일기가 있습니다."
+        )
+    await index_diary(session, new_diary.id, new_diary.title, new_diary.content)
+
+    # 같은 내용의 분석 결과가 캐시에 있으면 바로 사용, 없으면 워커가 비동기로 분석
+    enqueued = False
+    if new_diary.content:
+        cached_emotion = await emotion_cache.get(session, content_hash(new_diary.content))
+        if cached_emotion:
+            new_diary.emotion = cached_emotion
+            new_diary.emotion_status = EMOTION_DONE
+            new_diary.emotion_source = SOURCE_CLOVA
+        else:
+            await enqueue_emotion_job(session, new_diary)
+            enqueued = True
+
+    stat_delta = EmotionStatDelta()
+    stat_delta.add(user_id, new_diary.diary_date, new_diary.emotion)
+    await stat_delta.apply(session)
+
+    await session.commit()
+    await session.refresh(new_diary)
+    if enqueued:
+        emotion_worker.notify()
+    await invalidate_diary_views(public=new_diary.state, user_ids=[user_id])
 
     return new_diary # 생성된 Diary 객체 반환
 
@@ -219,90 +561,147 @@ async def create_diary(
 async def update_diary_entry( # 함수 이름 변경 (PEP8, CRUD 느낌 살려서)
     diary_id: int,
     payload: DiaryUpdate, # DiaryUpdate 모델은 title, content, state 등 변경 가능한 필드만 포함해야 함
-    user_id: int = Depends(authenticate),
-    session: Session = Depends(get_session),
-    user_role: str = Depends(get_current_user_role)
+    session: AsyncSession = Depends(get_async_session),
+    principal: Principal = Depends(get_current_principal)
 ):
-    diary = session.get(Diary, diary_id)
+    # 감정 통계 증감이 정확하도록 이전 감정을 읽는 시점부터 행을 잠금
+    diary = await session.get(Diary, diary_id, with_for_update=True)
     if not diary:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="일치하는 일기를 찾을 수 없습니다."
         )
 
-    if user_role != "admin" and diary.user_id != user_id:
+    if not principal.is_admin and diary.user_id != principal.user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="이 일기를 수정할 권한이 없습니다."
         )
 
     diary_update_data = payload.model_dump(exclude_unset=True) # 값이 제공된 필드만 업데이트
+    if diary_update_data.get('image') and diary_update_data['image'] != diary.image:
+        # 관리자가 수정해도 이미지는 작성자의 업로드여야 함
+        await ensure_image_owner(session, diary.user_id, [diary_update_data['image']])
+    previous_hash = content_hash(diary.content)
+    previous_emotion = diary.emotion
+    was_public = diary.state
 
     for key, value in diary_update_data.items():
         setattr(diary, key, value)
+    if 'image' in diary_update_data:
+        diary.thumbnail = (await find_thumbnails(session, [diary.image])).get(diary.image)
+    diary.version = Diary.version + 1 # UPDATE ... SET version = version + 1 (동시 수정에도 값이 겹치지 않음)
 
-    # 내용이 수정되었다면 감정 재분석
+    # 내용이 실제로 바뀐 경우에만 감정 재분석 (캐시에 있으면 바로 사용, 없으면 작업 등록)
+    reanalyze = False
     if 'content' in diary_update_data and diary.content:
-        try:
-            emotion = await analyze_emotion_async(diary.content)
-            diary.emotion = emotion
-        except Exception as e:
-            print(f"감정 재분석 실패: {e}")
-            # 오류 발생 시 이전 감정 유지 또는 기본값 설정
+        new_hash = content_hash(diary.content)
+        if new_hash != previous_hash:
+            cached_emotion = await emotion_cache.get(session, new_hash)
+            if cached_emotion:
+                diary.emotion = cached_emotion
+                diary.emotion_status = EMOTION_DONE
+                diary.emotion_source = SOURCE_CLOVA
+            else:
+                # 결과가 나올 때까지 이전 감정 유지
+                await enqueue_emotion_job(session, diary)
+                reanalyze = True
             
+    # 제목/내용이 바뀌었으면 검색 색인 갱신
+    if 'title' in diary_update_data or 'content' in diary_update_data:
+        await index_diary(session, diary.id, diary.title, diary.content)
+
     # diary_date가 변경되는 경우는 중복 체크를 다시 해야 할 수도 있으나,
     # DiaryUpdate 모델에 diary_date를 포함하지 않거나, 포함 시 별도 로직 필요
 
+    stat_delta = EmotionStatDelta()
+    stat_delta.move(diary.user_id, diary.diary_date, previous_emotion, diary.emotion)
+    await stat_delta.apply(session)
+
     session.add(diary)
-    session.commit()
-    session.refresh(diary)
+    await session.commit()
+    await session.refresh(diary)
+    if reanalyze:
+        emotion_worker.notify()
+    await invalidate_diary_views(public=was_public or diary.state, user_ids=[diary.user_id]) # 공개 피드에 보이거나 보였던 일기
     return diary
 
 @diary_router.delete("/{diary_id}", status_code=status.HTTP_204_NO_CONTENT) # 성공 시 204 No Content 반환
 async def delete_diary_entry( # 함수 이름 변경
     diary_id: int,
-    user_id: int = Depends(authenticate),
-    session: Session = Depends(get_session),
-    user_role: str = Depends(get_current_user_role)
+    session: AsyncSession = Depends(get_async_session),
+    principal: Principal = Depends(get_current_principal)
 ):
-    diary = session.get(Diary, diary_id)
+    diary = await session.get(Diary, diary_id, with_for_update=True)
     if not diary:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="일치하는 일기를 찾을 수 없습니다."
         )
     
-    if user_role != "admin" and diary.user_id != user_id:
+    if not principal.is_admin and diary.user_id != principal.user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="이 일기를 삭제할 권한이 없습니다."
         )
         
-    session.delete(diary)
-    session.commit()
+    stat_delta = EmotionStatDelta()
+    stat_delta.remove(diary.user_id, diary.diary_date, diary.emotion)
+    await stat_delta.apply(session)
+    await remove_diary_index(session, diary.id)
+    await remove_emotion_jobs(session, diary.id)
+    queued = await queue_object_cleanup(session, [diary.image]) # 이미지는 백그라운드에서 S3 일괄 삭제
+    await session.delete(diary)
+    await session.commit()
+    await invalidate_diary_views(public=diary.state, user_ids=[diary.user_id])
+    if queued:
+        s3_cleanup_worker.notify()
     # 204 No Content는 본문을 반환하지 않으므로 return 문 없음
     # return {"message": "일기장 삭제가 완료되었습니다."} # 대신 status_code=204 사용
 
 @diary_router.delete("/", summary="모든 일기 삭제 (주의 요망!)")
 async def delete_all_user_diaries( # 함수 이름 구체화, 현재는 특정 사용자 일기만 삭제하도록 변경
     user_id: int = Depends(authenticate), # 관리자 기능이 아니라면 해당 사용자 일기만 삭제
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # 주의: 이 작업은 해당 사용자의 모든 일기를 삭제합니다.
     # 만약 '모든 사용자'의 모든 일기를 삭제하는 기능이라면 별도의 관리자 권한 확인이 필요합니다.
     
-    statement = select(Diary).where(Diary.user_id == user_id)
-    diaries_to_delete = session.exec(statement).all()
-    
-    if not diaries_to_delete:
+    # ORM 객체를 하나씩 지우지 않고 id 묶음 단위 DELETE (묶음마다 commit 해서 트랜잭션/락을 짧게 유지)
+    # 이미지 객체는 정리 테이블에 등록하고 S3 삭제는 워커가 1000개씩 처리
+    deleted = 0
+    queued = 0
+    public = False
+    while True:
+        rows = (await session.exec(
+            select(Diary.id, Diary.state, Diary.image, Diary.diary_date, Diary.emotion)
+            .where(Diary.user_id == user_id)
+            .limit(BULK_DELETE_CHUNK)
+            .with_for_update()
+        )).all()
+        if not rows:
+            break
+        diary_ids = [row.id for row in rows]
+        stat_delta = EmotionStatDelta()
+        for row in rows:
+            stat_delta.remove(user_id, row.diary_date, row.emotion)
+        await stat_delta.apply(session)
+        await remove_diary_index(session, *diary_ids)
+        await remove_emotion_jobs(session, *diary_ids)
+        queued += await queue_object_cleanup(session, [row.image for row in rows])
+        await session.exec(delete(Diary).where(Diary.id.in_(diary_ids)))
+        await session.commit()
+        deleted += len(diary_ids)
+        public = public or any(row.state for row in rows)
+
+    if not deleted:
         # raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="삭제할 일기가 없습니다.")
         return {"message": "삭제할 일기가 없습니다."} # 또는 204
 
-    for diary in diaries_to_delete:
-        session.delete(diary)
-    
-    session.commit()
-    return {"message": f"사용자 ID {user_id}의 일기 {len(diaries_to_delete)}개가 삭제되었습니다."}
+    await invalidate_diary_views(public=public, user_ids=[user_id])
+    if queued:
+        s3_cleanup_worker.notify()
+    return {"message": f"사용자 ID {user_id}의 일기 {deleted}개가 삭제되었습니다."}
 
 
 # S3 연동을 가정하고, 로컬 파일 직접 다운로드 대신 Presigned URL 생성 방식으로 변경
@@ -310,9 +709,9 @@ async def delete_all_user_diaries( # 함수 이름 구체화, 현재는 특정 
 async def get_s3_image_download_url(
     diary_id: int,
     user_id: int = Depends(authenticate), # 접근 권한 확인용
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    diary = session.get(Diary, diary_id)
+    diary = await session.get(Diary, diary_id)
     if not diary:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="일기를 찾을 수 없습니다.")
 
@@ -324,11 +723,7 @@ async def get_s3_image_download_url(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="이미지 파일 키를 찾을 수 없습니다.")
 
     try:
-        url = s3.generate_presigned_url(
-            ClientMethod='get_object',
-            Params={'Bucket': BUCKET_NAME, 'Key': diary.image},
-            ExpiresIn=3600  # 1시간 동안 유효한 URL
-        )
+        url = generate_presigned_download_url(diary.image)  # 1시간 동안 유효한 URL
         return {"download_url": url, "file_key": diary.image}
     except Exception as e:
         # 실제 운영 환경에서는 에러 로깅 권장
@@ -337,31 +732,53 @@ async def get_s3_image_download_url(
 
 @diary_router.get("/list/search", response_model=List[DiaryList])
 async def search_diarys(
-        session: Session = Depends(get_session),
+        request: Request,
+        session: AsyncSession = Depends(get_async_session),
         search: Optional[str] = None,  # 검색어
-) -> List[DiaryList]:
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+        include_image_urls: bool = Query(False, description="이미지 다운로드 URL을 응답에 포함"),
+        stream: bool = Query(False, description="결과를 DB 커서에서 읽는 대로 JSON 배열로 전송"),
+):
 
     if not search:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="검색어를 입력해주세요.")
-    
-    statement = select(Diary).join(User, isouter=True)
+
+    tokens = query_tokens(search)
+    if not tokens:
+        return []
+
+    # 공개 일기만 검색하므로 공개 피드 버전으로 ETag
+    version = await feed_cache.version()
+    headers = {}
+    if version is not None:
+        etag = list_etag(version, "search", tokens, limit, offset, image_url_epoch(include_image_urls))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag, PUBLIC_CACHE_CONTROL)
+        headers = {"ETag": etag, "Cache-Control": PUBLIC_CACHE_CONTROL}
+
+    # 제목 + 본문 역색인에서 모든 검색 토큰을 포함하는 일기만 점수순으로 조회
+    matches = ranked_match_subquery(tokens)
+    statement = diary_list_statement().join(matches, matches.c.diary_id == Diary.id)
 
     # 공개된 글만 조회 (state=1)
     statement = statement.where(Diary.state == 1)  # 공개된 글만
 
-    # 검색어가 있을 경우 제목을 필터링
-    if search:
-        statement = statement.where(Diary.title.ilike(f"%{search}%"))
-
-    diary_results = session.exec(statement).unique().all()
+    statement = (
+        statement.order_by(matches.c.score.desc(), Diary.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
 
-    response_diarys = []
-    for diary in diary_results:
-        diary_data = diary.model_dump()
-        diary_data["username"] = diary.user.username if diary.user else "알 수 없음"
-        diary_data["user_id"] = diary.user_id
-        diary_data["state"] = diary.state
-        response_diarys.append(DiaryList(**diary_data))
+    if stream:
+        return StreamingResponse(
+            stream_json_array(statement, diary_rows_to_dicts(include_image_urls)),
+            media_type="application/json",
+            headers=headers,
+        )
 
-    return response_diarys
+    response_diarys = await fetch_diary_list(session, statement)
+    if include_image_urls:
+        attach_image_urls(response_diarys)
+    return Response(content=serialize_feed(response_diarys), media_type="application/json", headers=headers)
 
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from auth.authenticate import Principal, get_current_principal, user_cache
+from auth.hash_password import hash_password
+from auth.jwt_handler import jwt_cache_stats
+from database.connection import get_async_session
+from utils.bloom import user_filter
+from utils.emotion_cache import emotion_cache
+from utils.emotion_worker import emotion_worker
+from utils.multipart_uploads import multipart_uploads
+from utils.response_cache import calendar_cache, feed_cache
+from utils.s3_cleanup import s3_cleanup_worker
+from utils.thumbnails import thumbnail_worker
+from utils.s3 import download_url_cache, s3_provider, s3_uploader
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+async def require_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if not principal.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="관리자만 접근할 수 있습니다.")
+    return principal
+
+
+# 캐시/클라이언트 재사용이 실제로 동작하는지 확인하기 위한 내부 카운터
+@metrics_router.get("/", dependencies=[Depends(require_admin)])
+async def get_metrics(session: AsyncSession = Depends(get_async_session)):
+    return {
+        "jwt_cache": jwt_cache_stats(),
+        "user_cache": user_cache.stats(),
+        "password_hash": hash_password.stats(),
+        "user_filter": user_filter.stats(),
+        "s3_credentials": s3_provider.stats(),
+        "download_url_cache": download_url_cache.stats(),
+        "s3_upload": s3_uploader.stats(),
+        "s3_multipart": await multipart_uploads.stats(session),
+        "emotion_worker": await emotion_worker.stats(session),
+        "emotion_cache": emotion_cache.stats(),
+        "feed_cache": feed_cache.stats(),
+        "calendar_cache": calendar_cache.stats(),
+        "s3_cleanup": await s3_cleanup_worker.stats(session),
+        "thumbnails": await thumbnail_worker.stats(session),
+    }
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status,Request
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
-from auth.hash_password import HashPassword
-from auth.jwt_handler import create_jwt_token
-from database.connection import get_session
+from auth.hash_password import hash_password
+from auth.authenticate import oauth2_scheme
+from auth.jwt_handler import create_jwt_token, revoke_jwt_token
+from database.connection import get_async_session
 from models.users_model import User, UserSignIn, UserSignUp
+from utils.bloom import user_filter
 from utils.oauth import oauth
 import os
+import secrets
 import logging
 
 
@@ -15,9 +19,17 @@ user_router = APIRouter(tags=["User"])
 
 # users = {}
 
-hash_password = HashPassword()
 logger = logging.getLogger("uvicorn.error")
 
+GOOGLE_USERNAME_ATTEMPTS = 5
+
+
+def _conflict_detail(e: IntegrityError) -> str:
+    # 어느 유니크 인덱스에 걸렸는지 (MySQL: "for key 'user.ix_user_username'", SQLite: "user.username")
+    if "username" in str(e.orig):
+        return "이미 등록된 닉네임입니다."
+    return "동일한 사용자가 존재합니다."
+
 # 구글 OAuth 로그인
 @user_router.get("/google/login")
 async def google_login(request: Request):
@@ -26,7 +38,7 @@ async def google_login(request: Request):
 
 # 구글 OAuth 인증 후 콜백
 @user_router.get("/google/callback")
-async def google_callback(request: Request, session=Depends(get_session)):
+async def google_callback(request: Request, session=Depends(get_async_session)):
     token = await oauth.google.authorize_access_token(request)
     userinfo = token.get("userinfo")
     if not userinfo:
@@ -34,19 +46,38 @@ async def google_callback(request: Request, session=Depends(get_session)):
 
     # 1. DB에서 사용자 조회 또는 생성
     statement = select(User).where(User.email == userinfo["email"])
-    user = session.exec(statement).first()
-    if not user:
+    user = (await session.exec(statement)).first()
+    username = userinfo.get("name")
+    for _ in range(GOOGLE_USERNAME_ATTEMPTS):
+        if user:
+            break
         user = User(
             email=userinfo["email"],
-            username=userinfo.get("name"),
+            username=username,
             password="",  # 소셜 로그인은 패스워드 없음
             hobby="",
             role="user",
             diarys=[]
         )
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        try:
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            user = None
+            if "username" in str(e.orig):
+                # 구글 이름은 겹칠 수 있으므로 접미사를 붙여 다시 시도
+                username = f"{userinfo.get('name')}#{secrets.randbelow(10000):04d}"
+            else:
+                # 같은 이메일로 동시에 가입된 경우
+                user = (await session.exec(statement)).first()
+            continue
+        await session.refresh(user)
+        user_filter.add(user.email, user.username)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="사용자를 생성할 수 없습니다.")
 
     # 2. JWT 발급
     jwt_token = create_jwt_token(user.email, user.id, user.role)
@@ -57,24 +88,25 @@ async def google_callback(request: Request, session=Depends(get_session)):
 
 # 회원 가입(등록)
 @user_router.post("/signup", status_code=status.HTTP_201_CREATED)
-async def sign_new_user(data: UserSignUp, session = Depends(get_session)) -> dict:
-    statement = select(User).where(User.email == data.email)
-    user = session.exec(statement).first()
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="동일한 사용자가 존재합니다.")
-    
+async def sign_new_user(data: UserSignUp, session = Depends(get_async_session)) -> dict:
+    # 중복 확인은 email/username 유니크 인덱스에 맡기고 INSERT 한 번으로 처리
     new_user = User(
         email=data.email,
-        password=hash_password.hash_password(data.password),
+        password=await hash_password.hash_password_async(data.password),
         username=data.username,
         role=data.role,
         diarys=[]
     )
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    try:
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=_conflict_detail(e))
+    await session.refresh(new_user)
+    user_filter.add(new_user.email, new_user.username)
     return {
         "message": "사용자 등록이 완료되었습니다.",
         "user": new_user
@@ -82,19 +114,26 @@ async def sign_new_user(data: UserSignUp, session = Depends(get_session)) -> dic
 
 # 로그인
 @user_router.post("/signin")
-async def sign_in(data: OAuth2PasswordRequestForm = Depends(), session = Depends(get_session)) -> dict:
+async def sign_in(data: OAuth2PasswordRequestForm = Depends(), session = Depends(get_async_session)) -> dict:
     statement = select(User).where(User.email == data.username)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="사용자를 찾을 수 없습니다.")    
 
     # if user.password != data.password:
-    if hash_password.verify_password(data.password, user.password) == False:
+    # bcrypt 는 스레드 풀에서 실행 (cost 가 바뀌었으면 새 해시도 함께 반환)
+    verified, new_hash = await hash_password.verify_and_update_async(data.password, user.password)
+    if verified == False:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="패스워드가 일치하지 않습니다.")
+
+    if new_hash:
+        user.password = new_hash
+        session.add(user)
+        await session.commit()
     
     return {
         "message": "로그인에 성공했습니다.",
@@ -110,10 +149,19 @@ async def sign_in(data: OAuth2PasswordRequestForm = Depends(), session = Depends
     #     }
     # )
 
+# 로그아웃 (현재 토큰을 만료 시각까지 폐기)
+@user_router.post("/signout")
+async def sign_out(token: str = Depends(oauth2_scheme)) -> dict:
+    await revoke_jwt_token(token)
+    return {"message": "로그아웃되었습니다."}
+
 @user_router.get("/checkemail/{email}", response_model=dict)
-async def check_email(email: str, session = Depends(get_session)):
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+async def check_email(email: str, session = Depends(get_async_session)):
+    # 필터에 없으면 DB 조회 없이 사용 가능 (필터 동기화는 백그라운드 작업)
+    if not user_filter.might_exist_email(email):
+        return {"message" : "Email available"}
+    statement = select(User.id).where(User.email == email)
+    user = (await session.exec(statement)).first()
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -123,9 +171,11 @@ async def check_email(email: str, session = Depends(get_session)):
 
 
 @user_router.get("/checkusername/{username}")
-async def check_nickname(username: str, session = Depends(get_session)):
-    statement = select(User).where(User.username == username)  
-    user = session.exec(statement).first()
+async def check_nickname(username: str, session = Depends(get_async_session)):
+    if not user_filter.might_exist_username(username):
+        return {"message": "Username available"}
+    statement = select(User.id).where(User.username == username)  
+    user = (await session.exec(statement)).first()
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
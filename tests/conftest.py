@@ -0,0 +1,133 @@
+"""
+테스트 공통 설정
+
+- SSH 터널/RDS 대신 connect_database("sqlite:///...") 로 테스트마다 새 aiosqlite DB 사용
+- main.app 대신 라우터만 올린 앱 (lifespan 의 터널/워커/외부 클라이언트를 띄우지 않음)
+"""
+import os
+
+# database.connection.Settings 가 import 시점에 읽는 필수 환경 변수 (.env 없이 실행)
+for name, value in {
+    "SECRET_KEY": "test-secret",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_S3_BUCKET": "diary-bucket",
+    "AWS_REGION": "ap-northeast-2",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "GOOGLE_REDIRECT_URI": "http://localhost/callback",
+    "CLOVA_API_KEY": "test",
+    "ROLE_ARN": "arn:aws:iam::123456789012:role/diary-s3",
+    "BASTION_HOST": "localhost",
+    "BASTION_USER": "test",
+    "BASTION_KEY_PATH": "/dev/null",
+    "RDS_HOST": "localhost",
+    "RDS_PORT": "3306",
+    "LOCAL_PORT": "3307",
+}.items():
+    os.environ.setdefault(name, value)
+
+import asyncio
+from datetime import date
+
+import boto3
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from sqlmodel import Session
+
+import models # noqa: F401 (모든 테이블/관계 등록)
+from auth.authenticate import user_cache
+from auth.jwt_handler import create_jwt_token, revoked_tokens, verified_token_cache
+from database import connection
+from models.diarys_model import Diary
+from models.users_model import User
+from utils import response_cache
+from utils.bloom import UserExistenceFilter
+from utils.s3 import AWS_REGION, BUCKET_NAME, s3_provider
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state(monkeypatch):
+    """프로세스 내 캐시/카운터가 테스트 사이에 남지 않도록 초기화"""
+    backend = response_cache.MemoryBackend()
+    monkeypatch.setattr(revoked_tokens, "backend", backend)
+    for cache in (response_cache.feed_cache, response_cache.calendar_cache):
+        monkeypatch.setattr(cache, "backend", backend)
+        monkeypatch.setattr(cache.counter, "backend", backend)
+    monkeypatch.setattr(response_cache.diary_list_version, "backend", backend)
+    monkeypatch.setattr("utils.bloom.user_filter", UserExistenceFilter())
+    monkeypatch.setattr("routes.users.user_filter", UserExistenceFilter())
+    for cache in (user_cache, verified_token_cache, revoked_tokens):
+        cache.clear()
+
+
+@pytest.fixture
+def database(tmp_path):
+    connection.connect_database(f"sqlite:///{tmp_path / 'test.db'}")
+    connection.engine_url.echo = False
+    yield connection
+    asyncio.run(connection.dispose_async_engine())
+    connection.engine_url.dispose()
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    """moto 로 STS AssumeRole + S3 버킷 (테스트마다 새 자격증명/클라이언트)"""
+    with mock_aws():
+        monkeypatch.setattr(s3_provider, "_sts", None)
+        monkeypatch.setattr(s3_provider, "_client", None)
+        monkeypatch.setattr(s3_provider, "_expiration", None)
+        monkeypatch.setattr(s3_provider, "_next_attempt_at", 0.0)
+        monkeypatch.setattr(s3_provider, "_consecutive_failures", 0)
+        s3_provider.get_client() # lifespan 의 s3_provider.start() 와 같이 미리 AssumeRole
+        s3 = boto3.client("s3", region_name=AWS_REGION)
+        s3.create_bucket(Bucket=BUCKET_NAME, CreateBucketConfiguration={"LocationConstraint": AWS_REGION})
+        yield s3
+        s3_provider.stop()
+
+
+@pytest.fixture
+def app(database):
+    from routes.diary import diary_router
+    from routes.users import user_router
+
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.include_router(user_router, prefix="/users")
+    app.include_router(diary_router, prefix="/diarys")
+    return app
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_jwt_token(user.email, user.id, user.role)}"}
+
+
+@pytest.fixture
+def users(database) -> dict[str, User]:
+    """alice (user), bob (user), admin"""
+    with Session(database.engine_url, expire_on_commit=False) as session:
+        users = {
+            name: User(email=f"{name}@example.com", password="x", username=name, role=role)
+            for name, role in (("alice", "user"), ("bob", "user"), ("admin", "admin"))
+        }
+        session.add_all(users.values())
+        session.commit()
+    return users
+
+
+def add_diary(database, user: User, day: date, **values) -> Diary:
+    """DB 에 직접 일기 추가 (API 를 거치지 않는 준비 데이터)"""
+    values = {"title": "title", "content": "content", "image": "", "state": True, **values}
+    with Session(database.engine_url, expire_on_commit=False) as session:
+        diary = Diary(user_id=user.id, diary_date=day, **values)
+        session.add(diary)
+        session.commit()
+    return diary
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from auth.authenticate import get_current_principal, user_cache
+from auth.jwt_handler import settings
+from models.users_model import User
+
+
+def legacy_token(user: User) -> str:
+    """role 클레임이 없는 예전 형식의 토큰"""
+    return jwt.encode({"user": user.email, "user_id": user.id, "exp": 2**31}, settings.SECRET_KEY, algorithm="HS256")
+
+
+def principal(database, token):
+    async def resolve():
+        async with AsyncSession(database.async_engine) as session:
+            return await get_current_principal(token, session)
+    return asyncio.run(resolve())
+
+
+def test_role_without_claim_is_cached_until_ttl(database, users):
+    admin = users["admin"]
+    token = legacy_token(admin)
+    assert principal(database, token).role == "admin"
+
+    # 역할을 DB 에서 바꿔도 TTL 동안은 캐시된 역할, 만료되면 새 역할
+    with Session(database.engine_url) as session:
+        user = session.get(User, admin.id)
+        user.role = "user"
+        session.add(user)
+        session.commit()
+    assert principal(database, token).role == "admin"
+    user_cache.clear() # TTL 만료와 같음
+    assert principal(database, token).role == "user"
+
+
+def test_deleted_user_without_claim_is_not_found(database, users):
+    token = legacy_token(users["bob"])
+    with Session(database.engine_url) as session:
+        session.delete(session.get(User, users["bob"].id))
+        session.commit()
+    with pytest.raises(HTTPException) as error:
+        principal(database, token)
+    assert error.value.status_code == 404
+
+
+def test_revocation_is_shared_across_processes(client, users):
+    from auth.jwt_handler import revoked_tokens, verified_token_cache
+    from tests.conftest import auth_headers
+
+    headers = auth_headers(users["alice"])
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 200
+    assert client.post("/users/signout", headers=headers).status_code == 200
+
+    # 다른 replica / 재시작한 프로세스: 메모리 상태 없이 공유 저장소만 남음
+    revoked_tokens.clear()
+    verified_token_cache.clear()
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 401
+
+
+def test_revocation_survives_backend_outage_in_revoking_process(client, users, monkeypatch):
+    from auth.jwt_handler import revoked_tokens
+    from tests.conftest import auth_headers
+
+    class Down:
+        name = "down"
+
+        async def get_many(self, keys):
+            raise ConnectionError("down")
+
+        async def set(self, key, value, ttl):
+            raise ConnectionError("down")
+
+    monkeypatch.setattr(revoked_tokens, "backend", Down())
+    headers = auth_headers(users["alice"])
+    assert client.post("/users/signout", headers=headers).status_code == 200
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 401
+    other = auth_headers(users["bob"])
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=other).status_code == 200
+
+
+def test_revocation_check_is_cached_locally(client, users, monkeypatch):
+    from auth.jwt_handler import _token_digest, revoked_tokens
+    from tests.conftest import auth_headers
+
+    calls = []
+    get_many = revoked_tokens.backend.get_many
+
+    async def counting_get_many(keys):
+        calls.append(keys)
+        return await get_many(keys)
+    monkeypatch.setattr(revoked_tokens.backend, "get_many", counting_get_many)
+
+    headers = auth_headers(users["alice"])
+    for _ in range(10):
+        assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 200
+    assert len(calls) == 1 # check_ttl 동안은 공유 저장소를 다시 조회하지 않음
+
+    # 다른 replica 가 폐기 → 이 프로세스는 확인 결과가 만료된 뒤 거절
+    token = headers["Authorization"].removeprefix("Bearer ")
+    asyncio.run(revoked_tokens.backend.set(revoked_tokens._key(_token_digest(token)), b"1", 60))
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 200
+    revoked_tokens.checked.clear() # check_ttl 만료와 같음
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 401
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 401
+    assert len(calls) == 2
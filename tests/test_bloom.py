@@ -0,0 +1,96 @@
+import asyncio
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.users_model import User
+from utils.bloom import UserExistenceFilter
+
+
+def add_user(database, name, user_id=None):
+    with Session(database.engine_url) as session:
+        session.add(User(id=user_id, email=f"{name}@example.com", password="x", username=name, role="user"))
+        session.commit()
+
+
+def run(database, filter_method):
+    async def main():
+        async with AsyncSession(database.async_engine) as session:
+            await filter_method(session)
+    asyncio.run(main())
+
+
+def test_sync_picks_up_new_users(database):
+    add_user(database, "u1")
+    user_filter = UserExistenceFilter(min_capacity=1000, sync_interval=0)
+    run(database, user_filter.warm)
+    assert user_filter.might_exist_username("u1")
+    assert not user_filter.might_exist_username("u2")
+
+    add_user(database, "u2")
+    run(database, user_filter.sync)
+    assert user_filter.might_exist_username("u2")
+    assert user_filter.might_exist_email("u2@example.com")
+
+
+def test_sync_picks_up_rows_committed_out_of_id_order(database):
+    # id 5 가 먼저 commit 된 뒤 동기화, 그 후 더 작은 id 3 이 commit
+    add_user(database, "first", user_id=1)
+    add_user(database, "fast", user_id=5)
+    user_filter = UserExistenceFilter(min_capacity=1000, sync_interval=0)
+    run(database, user_filter.warm)
+
+    add_user(database, "slow", user_id=3)
+    run(database, user_filter.sync)
+    assert user_filter.might_exist_username("slow")
+    # 다시 읽은 행은 포화 판단용 count 를 늘리지 않음
+    assert user_filter.emails.count == 3
+
+
+def test_periodic_rebuild_picks_up_rows_below_overlap(database):
+    add_user(database, "first", user_id=1)
+    add_user(database, "fast", user_id=100)
+    user_filter = UserExistenceFilter(min_capacity=1000, sync_interval=0, sync_overlap=10, rebuild_interval=3600)
+    run(database, user_filter.warm)
+
+    add_user(database, "very-slow", user_id=2)
+    run(database, user_filter.sync)
+    assert not user_filter.might_exist_username("very-slow") # 범위 밖
+
+    user_filter.rebuild_interval = 0
+    run(database, user_filter.sync)
+    assert user_filter.might_exist_username("very-slow")
+
+
+def test_background_task_syncs_out_of_order_signup(database):
+    add_user(database, "fast", user_id=5)
+    user_filter = UserExistenceFilter(min_capacity=1000, sync_interval=0.01)
+
+    async def main():
+        await user_filter.start() # 시작 시 전체 읽기
+        assert user_filter.ready and not user_filter.might_exist_username("slow")
+        add_user(database, "slow", user_id=3)
+        for _ in range(200):
+            if user_filter.might_exist_username("slow"):
+                break
+            await asyncio.sleep(0.01)
+        await user_filter.stop()
+
+    asyncio.run(main())
+    assert user_filter.might_exist_username("slow")
+
+
+def test_check_routes_do_not_sync_inline(client, database, monkeypatch):
+    user_filter = UserExistenceFilter(min_capacity=1000)
+    monkeypatch.setattr("routes.users.user_filter", user_filter)
+    add_user(database, "taken")
+    run(database, user_filter.warm)
+
+    async def no_inline_sync(session):
+        raise AssertionError("요청 경로에서 동기화하면 안 됨")
+    monkeypatch.setattr(user_filter, "sync", no_inline_sync)
+
+    assert client.get("/users/checkusername/free").status_code == 200
+    assert client.get("/users/checkemail/free@example.com").status_code == 200
+    assert client.get("/users/checkusername/taken").status_code == 409
+    assert user_filter.negatives == 2 and user_filter.lookups == 1
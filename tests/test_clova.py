@@ -0,0 +1,159 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils import clova
+from utils.circuit_breaker import CircuitBreaker
+
+
+def ok(emotion="긍정"):
+    return httpx.Response(200, json={"result": {"message": {"content": f" {emotion} "}}})
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """재시도 대기 없이 실행하고, jitter 범위(random.uniform 인자)와 대기 시간을 기록"""
+    calls = {"uniform": [], "sleep": []}
+
+    def uniform(low, high):
+        calls["uniform"].append((low, high))
+        return high / 2
+
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args):
+        calls["sleep"].append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(clova.random, "uniform", uniform)
+    monkeypatch.setattr(clova.asyncio, "sleep", sleep)
+    monkeypatch.setattr(clova, "clova_breaker", CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    return calls
+
+
+def run_with(handler, coro):
+    """가짜 Clova 서버(MockTransport) 를 주입한 클라이언트로 coro() 실행 → (결과 또는 예외, 요청 수)"""
+    requests = []
+
+    async def recording(request):
+        requests.append(request)
+        result = handler(len(requests))
+        return await result if asyncio.iscoroutine(result) else result
+
+    async def main():
+        await clova.start_clova_client(transport=httpx.MockTransport(recording))
+        try:
+            return await coro()
+        except Exception as e:
+            return e
+        finally:
+            await clova.close_clova_client()
+
+    return asyncio.run(main()), requests
+
+
+def test_success_parses_emotion():
+    result, requests = run_with(lambda n: ok("슬픔"), lambda: clova.analyze_emotion_async("눈물이 난다"))
+    assert result == "슬픔"
+    assert len(requests) == 1
+    assert requests[0].headers["Authorization"] == clova.CLOVA_API_KEY
+
+
+def test_retryable_status_is_retried_with_jitter(no_backoff):
+    result, requests = run_with(
+        lambda n: httpx.Response(503) if n < 3 else ok(),
+        lambda: clova.analyze_emotion_async("좋다"),
+    )
+    assert result == "긍정"
+    assert len(requests) == 3
+    # full jitter: 0 ~ backoff * 2^attempt 사이에서 무작위
+    assert no_backoff["uniform"] == [(0, clova.CLOVA_RETRY_BACKOFF), (0, clova.CLOVA_RETRY_BACKOFF * 2)]
+    assert no_backoff["sleep"] == [clova.CLOVA_RETRY_BACKOFF / 2, clova.CLOVA_RETRY_BACKOFF]
+
+
+def test_retryable_status_gives_up_after_max_retries():
+    result, requests = run_with(lambda n: httpx.Response(429), lambda: clova.analyze_emotion_async("좋다"))
+    assert isinstance(result, httpx.HTTPStatusError)
+    assert result.response.status_code == 429
+    assert len(requests) == clova.CLOVA_MAX_RETRIES + 1
+
+
+def test_non_retryable_status_fails_immediately(no_backoff):
+    result, requests = run_with(lambda n: httpx.Response(401), lambda: clova.analyze_emotion_async("좋다"))
+    assert isinstance(result, httpx.HTTPStatusError)
+    assert result.response.status_code == 401
+    assert len(requests) == 1
+    assert no_backoff["sleep"] == []
+
+
+def test_timeout_is_retried():
+    def handler(n):
+        if n == 1:
+            raise httpx.ReadTimeout("timed out")
+        return ok("놀람")
+
+    result, requests = run_with(handler, lambda: clova.analyze_emotion_async("헐"))
+    assert result == "놀람"
+    assert len(requests) == 2
+
+
+def test_timeout_on_every_attempt_raises():
+    def handler(n):
+        raise httpx.ConnectTimeout("timed out")
+
+    result, requests = run_with(handler, lambda: clova.analyze_emotion_async("헐"))
+    assert isinstance(result, httpx.ConnectTimeout)
+    assert len(requests) == clova.CLOVA_MAX_RETRIES + 1
+
+
+def test_latency_budget_falls_back_to_local():
+    async def slow(n):
+        await asyncio.Event().wait() # 응답하지 않는 서버
+    result, _ = run_with(
+        lambda n: slow(n),
+        lambda: clova.analyze_emotion_with_fallback("기분 진짜 좋다", budget=0.05),
+    )
+    emotion, source = result
+    assert source == clova.SOURCE_LOCAL
+    assert emotion == clova.classify_emotion_locally("기분 진짜 좋다")
+    # 예산 초과는 실패 1회로 기록되지만 threshold(2) 전이므로 닫힌 상태 유지
+    stats = clova.clova_breaker.stats()
+    assert stats["state"] == "closed"
+    assert stats["consecutive_failures"] == 1
+
+
+def test_cancelled_trial_releases_half_open_breaker():
+    breaker = clova.clova_breaker
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker._opened_at -= breaker.reset_timeout # reset_timeout 경과 → HALF_OPEN
+
+    started = asyncio.Event()
+
+    async def slow(n):
+        started.set()
+        await asyncio.Event().wait()
+
+    async def cancel_trial():
+        task = asyncio.create_task(clova.analyze_emotion_with_fallback("좋다", budget=10))
+        await started.wait() # 시험 호출이 Clova 응답을 기다리는 중에 취소
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run_with(slow, cancel_trial)
+    # 취소는 실패로 세지 않고 시험 호출 자리만 반납 → 다음 요청이 다시 시험 호출
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_breaker_opens_and_skips_clova():
+    async def analyze_three():
+        return [await clova.analyze_emotion_with_fallback("좋다") for _ in range(3)]
+
+    result, requests = run_with(lambda n: httpx.Response(500), analyze_three)
+    assert [source for _, source in result] == [clova.SOURCE_LOCAL] * 3
+    # 실패 2번(threshold)으로 열린 뒤에는 요청하지 않음
+    assert clova.clova_breaker.state == "open"
+    assert len(requests) == 2 * (clova.CLOVA_MAX_RETRIES + 1)
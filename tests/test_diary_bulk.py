@@ -0,0 +1,124 @@
+import json
+from datetime import date
+
+from sqlmodel import Session, select
+
+from models.diarys_model import Diary
+from models.emotion_job_model import EmotionJob
+from tests.conftest import add_diary, auth_headers
+from utils import diary_bulk
+from utils.s3 import upload_key_prefix
+
+
+def ndjson(*rows: dict) -> bytes:
+    return "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+
+
+def row(day: str, **values) -> dict:
+    return {"title": f"제목 {day}", "content": f"내용 {day}", "image": "", "diary_date": day, **values}
+
+
+def diary_dates(database, user) -> list[date]:
+    with Session(database.engine_url) as session:
+        return session.exec(
+            select(Diary.diary_date).where(Diary.user_id == user.id).order_by(Diary.diary_date)
+        ).all()
+
+
+def test_export_then_import_round_trip(client, database, users):
+    alice = users["alice"]
+    headers = auth_headers(alice)
+    image = f"{upload_key_prefix(alice.id)}photo.jpg"
+    add_diary(database, alice, date(2025, 4, 1), title="첫날", content="맑음", image=image)
+    add_diary(database, alice, date(2025, 4, 2), title="둘째 날", content="", state=False)
+    add_diary(database, users["bob"], date(2025, 4, 1))
+
+    response = client.get("/diarys/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    exported = response.content
+    lines = [json.loads(line) for line in exported.splitlines()]
+    assert [(line["title"], line["diary_date"]) for line in lines] == [("첫날", "2025-04-01"), ("둘째 날", "2025-04-02")]
+
+    for line in lines:
+        assert client.delete(f"/diarys/{line['id']}", headers=headers).status_code == 204
+
+    summary = client.post("/diarys/import", content=exported, headers=headers).json()
+    assert summary == {
+        "imported": 2, "skipped_duplicates": 0, "invalid": 0, "errors": [], "emotion_jobs": 1, "truncated": False,
+    }
+    with Session(database.engine_url) as session:
+        restored = session.exec(select(Diary).where(Diary.user_id == alice.id).order_by(Diary.diary_date)).all()
+        assert [(d.title, d.content, d.image, d.state) for d in restored] == [
+            ("첫날", "맑음", image, True), ("둘째 날", "", "", False),
+        ]
+        # 내용이 있는 일기만 감정 분석 작업 등록
+        assert session.exec(select(EmotionJob.diary_id)).all() == [restored[0].id]
+
+    # 다시 가져오면 모두 중복 날짜로 건너뜀
+    summary = client.post("/diarys/import", content=exported, headers=headers).json()
+    assert (summary["imported"], summary["skipped_duplicates"]) == (0, 2)
+
+
+def test_import_of_other_users_export_rejects_their_images(client, database, users):
+    alice, bob = users["alice"], users["bob"]
+    add_diary(database, alice, date(2025, 4, 1), image=f"{upload_key_prefix(alice.id)}photo.jpg")
+    add_diary(database, alice, date(2025, 4, 2))
+    exported = client.get("/diarys/export", headers=auth_headers(alice)).content
+
+    summary = client.post("/diarys/import", content=exported, headers=auth_headers(bob)).json()
+    assert (summary["imported"], summary["invalid"]) == (1, 1)
+    assert summary["errors"] == [{"line": 1, "error": "image: 본인이 업로드한 이미지만 사용할 수 있습니다."}]
+    assert diary_dates(database, bob) == [date(2025, 4, 2)]
+
+
+def test_import_rejects_too_long_line(client, users, monkeypatch):
+    monkeypatch.setattr(diary_bulk, "IMPORT_MAX_LINE_BYTES", 64)
+    body = ndjson(row("2025-04-01", content="가" * 100))
+    response = client.post("/diarys/import", content=body, headers=auth_headers(users["alice"]))
+    assert response.status_code == 413
+    assert response.json()["detail"] == "한 줄이 너무 깁니다."
+
+
+def test_import_skips_duplicate_dates(client, database, users):
+    alice = users["alice"]
+    add_diary(database, alice, date(2025, 4, 1))
+    body = ndjson(
+        row("2025-04-01"), # 이미 있는 날짜
+        row("2025-04-02"),
+        row("2025-04-02", title="같은 파일 안의 중복"),
+        {"title": "날짜 없음"},
+    )
+    summary = client.post("/diarys/import", content=body, headers=auth_headers(alice)).json()
+    assert (summary["imported"], summary["skipped_duplicates"], summary["invalid"]) == (1, 2, 1)
+    assert summary["errors"][0]["line"] == 4
+    assert diary_dates(database, alice) == [date(2025, 4, 1), date(2025, 4, 2)]
+
+
+def test_conflict_in_later_batch_returns_partial_summary(client, database, users, monkeypatch):
+    alice = users["alice"]
+    monkeypatch.setattr(diary_bulk, "IMPORT_BATCH_SIZE", 3)
+    # 중복 확인과 INSERT 사이에 다른 요청이 같은 날짜 일기를 씀 (두 번째 묶음, 재시도, 한 행씩 저장할 때마다)
+    races = {2: date(2025, 4, 4), 3: date(2025, 4, 5), 4: date(2025, 4, 6)}
+    find_thumbnails = diary_bulk.find_thumbnails
+    calls = []
+
+    async def racing_find_thumbnails(session, images):
+        calls.append(images)
+        if len(calls) in races:
+            add_diary(database, alice, races[len(calls)], title="동시에 작성")
+        return await find_thumbnails(session, images)
+
+    monkeypatch.setattr(diary_bulk, "find_thumbnails", racing_find_thumbnails)
+    body = ndjson(*(row(f"2025-04-0{day}") for day in range(1, 7)))
+    response = client.post("/diarys/import", content=body, headers=auth_headers(alice))
+
+    # 이미 commit 된 첫 묶음을 두고 409 로 끝내지 않음
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["imported"], summary["skipped_duplicates"]) == (3, 3)
+    assert len(calls) == 4
+    assert diary_dates(database, alice) == [date(2025, 4, day) for day in range(1, 7)]
+    with Session(database.engine_url) as session:
+        titles = session.exec(select(Diary.title).where(Diary.diary_date >= date(2025, 4, 4))).all()
+    assert titles == ["동시에 작성"] * 3
@@ -0,0 +1,127 @@
+from datetime import date
+
+from tests.conftest import add_diary, auth_headers
+
+
+def create(client, user, **values):
+    payload = {"title": "제목", "content": "오늘은 좋은 날", "image": "", "diary_date": "2025-03-01", **values}
+    return client.post("/diarys/", json=payload, headers=auth_headers(user))
+
+
+def test_create_and_retrieve(client, users):
+    response = create(client, users["alice"])
+    assert response.status_code == 201
+    diary = response.json()
+    assert diary["user_id"] == users["alice"].id
+    assert diary["emotion_status"] == "pending"
+
+    response = client.get(f"/diarys/{diary['id']}", headers=auth_headers(users["alice"]))
+    assert response.status_code == 200
+    assert response.json()["title"] == "제목"
+    assert response.json()["username"] == "alice"
+
+
+def test_create_same_date_is_conflict(client, users):
+    assert create(client, users["alice"]).status_code == 201
+    assert create(client, users["alice"]).status_code == 409
+    # 다른 사용자는 같은 날짜에 쓸 수 있음
+    assert create(client, users["bob"]).status_code == 201
+
+
+def test_update_and_delete_owner_only(client, users):
+    diary_id = create(client, users["alice"]).json()["id"]
+
+    response = client.put(f"/diarys/{diary_id}", json={"title": "수정"}, headers=auth_headers(users["bob"]))
+    assert response.status_code == 403
+    response = client.put(f"/diarys/{diary_id}", json={"title": "수정"}, headers=auth_headers(users["alice"]))
+    assert response.status_code == 200
+    assert response.json()["title"] == "수정"
+
+    assert client.delete(f"/diarys/{diary_id}", headers=auth_headers(users["bob"])).status_code == 403
+    assert client.delete(f"/diarys/{diary_id}", headers=auth_headers(users["alice"])).status_code == 204
+    assert client.get(f"/diarys/{diary_id}", headers=auth_headers(users["alice"])).status_code == 404
+
+
+def test_feed_visibility(client, database, users):
+    add_diary(database, users["alice"], date(2025, 1, 1), title="alice 공개")
+    add_diary(database, users["alice"], date(2025, 1, 2), title="alice 비공개", state=False)
+    add_diary(database, users["bob"], date(2025, 1, 1), title="bob 비공개", state=False)
+
+    def titles(headers=None):
+        return sorted(item["title"] for item in client.get("/diarys/", headers=headers or {}).json())
+
+    assert titles() == ["alice 공개"]
+    assert titles(auth_headers(users["alice"])) == ["alice 공개", "alice 비공개"]
+    assert titles(auth_headers(users["admin"])) == ["alice 공개", "alice 비공개", "bob 비공개"]
+
+
+def test_private_diary_hidden_from_others(client, database, users):
+    diary = add_diary(database, users["alice"], date(2025, 1, 2), state=False)
+    assert client.get(f"/diarys/{diary.id}", headers=auth_headers(users["bob"])).status_code == 403
+    assert client.get(f"/diarys/{diary.id}", headers=auth_headers(users["alice"])).status_code == 200
+
+
+def test_keyset_pagination(client, database, users):
+    for day in range(1, 6):
+        add_diary(database, users["alice"], date(2025, 1, day), title=f"t{day}")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/diarys/", params=params).json()
+        seen += [item["title"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == [f"t{day}" for day in range(1, 6)]
+    assert len(set(seen)) == 5
+
+
+def test_list_etag_not_modified(client, users):
+    create(client, users["alice"])
+    headers = auth_headers(users["alice"])
+    response = client.get("/diarys/", headers=headers)
+    etag = response.headers["etag"]
+    assert client.get("/diarys/", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    create(client, users["alice"], diary_date="2025-03-02")
+    assert client.get("/diarys/", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+
+def test_list_etag_changes_after_counter_restart(client, users, monkeypatch):
+    from utils import response_cache
+
+    headers = auth_headers(users["alice"])
+    create(client, users["alice"])
+    old_etag = client.get("/diarys/", headers=headers).headers["etag"]
+
+    # 재시작: 프로세스 내 카운터가 0 부터 다시 셈 → 같은 횟수만큼 써도 이전 ETag 와 달라야 함
+    backend = response_cache.MemoryBackend()
+    for counter in (response_cache.diary_list_version, response_cache.feed_cache.counter):
+        monkeypatch.setattr(counter, "backend", backend)
+    monkeypatch.setattr(response_cache.feed_cache, "backend", backend)
+    client.put(f"/diarys/{client.get('/diarys/', headers=headers).json()[0]['id']}", json={"title": "다른 내용"}, headers=headers)
+
+    response = client.get("/diarys/", headers={**headers, "If-None-Match": old_etag})
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "다른 내용"
+    assert response.headers["etag"] != old_etag
+
+
+def test_calendar_has_image(client, database, users):
+    alice = users["alice"]
+    headers = auth_headers(alice)
+    with_image = add_diary(database, alice, date(2025, 3, 1), image="photo.jpg")
+    add_diary(database, alice, date(2025, 3, 2))
+    add_diary(database, alice, date(2025, 4, 1), image="photo.jpg")
+
+    response = client.get("/diarys/calendar?year=2025&month=3", headers=headers)
+    assert [(day["diary_date"], day["has_image"]) for day in response.json()] == [
+        ("2025-03-01", True), ("2025-03-02", False),
+    ]
+
+    # has_image 는 DB 가 계산 (수정 응답에는 포함하지 않음)
+    response = client.put(f"/diarys/{with_image.id}", json={"image": ""}, headers=headers)
+    assert "has_image" not in response.json()
+    response = client.get("/diarys/calendar?year=2025&month=3", headers=headers)
+    assert [day["has_image"] for day in response.json()] == [False, False]
@@ -0,0 +1,152 @@
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, update
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.emotion_stats_model import NO_EMOTION, DiaryEmotionDaily
+from tests.conftest import add_diary, auth_headers
+from utils import emotion_stats as stats_module
+from utils import emotion_worker as worker_module
+from utils.clova import SOURCE_CLOVA
+from utils.emotion_cache import EmotionResultCache
+from utils.emotion_stats import _streaks, check_user_stats, rebuild_user_stats
+from utils.emotion_worker import EmotionWorkerPool
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Clova 대신 emotions[content] (기본 "긍정") 를 돌려주는 워커"""
+    cache = EmotionResultCache()
+    monkeypatch.setattr(worker_module, "emotion_cache", cache)
+    monkeypatch.setattr("routes.diary.emotion_cache", cache)
+    worker = EmotionWorkerPool(concurrency=2)
+    worker.emotions = {}
+
+    async def analyze(content):
+        return worker.emotions.get(content, "긍정"), SOURCE_CLOVA
+
+    monkeypatch.setattr(worker, "_analyze", analyze)
+    return worker
+
+
+def mismatches(database, users) -> list[dict]:
+    async def check():
+        async with AsyncSession(database.async_engine) as session:
+            return await check_user_stats(session, [user.id for user in users.values()])
+    return asyncio.run(check())
+
+
+def stats(client, user, day: str) -> dict:
+    response = client.get("/diarys/stats/emotions", params={"date": day}, headers=auth_headers(user))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_incremental_counts_match_full_recount(client, database, users, worker):
+    alice, bob = users["alice"], users["bob"]
+    headers = auth_headers(alice)
+    ids = []
+    for day, content in (("2025-03-03", "월요일"), ("2025-03-04", "화요일"), ("2025-03-05", "")):
+        response = client.post("/diarys/", headers=headers, json={
+            "title": "t", "content": content, "image": "", "diary_date": day,
+        })
+        ids.append(response.json()["id"])
+    assert mismatches(database, users) == []
+    assert stats(client, alice, "2025-03-05")["week"]["unanalyzed"] == 3
+
+    # 분석 결과 기록 (없음 → 감정)
+    worker.emotions["화요일"] = "슬픔"
+    assert asyncio.run(worker.run_once()) == 2
+    assert mismatches(database, users) == []
+
+    # 내용 수정 → 재분석 결과로 감정 이동
+    client.put(f"/diarys/{ids[0]}", json={"content": "바뀐 월요일"}, headers=headers)
+    worker.emotions["바뀐 월요일"] = "슬픔"
+    assert asyncio.run(worker.run_once()) == 1
+    assert mismatches(database, users) == []
+    week = stats(client, alice, "2025-03-05")["week"]
+    assert (week["total"], week["emotions"], week["unanalyzed"]) == (3, {"슬픔": 2}, 1)
+
+    # 삭제 (하나 / 전체)
+    assert client.delete(f"/diarys/{ids[1]}", headers=headers).status_code == 204
+    for day in ("2025-03-03", "2025-03-04"):
+        client.post("/diarys/", headers=auth_headers(bob), json={
+            "title": "t", "content": "", "image": "", "diary_date": day,
+        })
+    assert client.delete("/diarys/", headers=auth_headers(bob)).status_code == 200
+    assert mismatches(database, users) == []
+    week = stats(client, alice, "2025-03-05")["week"]
+    assert (week["total"], week["emotions"], week["unanalyzed"]) == (2, {"슬픔": 1}, 1)
+    assert stats(client, bob, "2025-03-05")["week"]["total"] == 0
+
+
+@pytest.mark.parametrize("reference, current, longest", [
+    (date(2025, 3, 4), 2, 3), # 오늘 (3/4) 까지 연속
+    (date(2025, 3, 5), 2, 3), # 오늘은 아직 안 썼지만 어제까지 연속이면 이어지는 중
+    (date(2025, 3, 6), 0, 3), # 어제도 안 씀 → 끊김
+    (date(2025, 3, 1), 3, 3), # 기준일 이후의 일기는 현재 연속에 넣지 않음 (월 경계 2/27 ~ 3/1)
+    (date(2025, 3, 2), 3, 3),
+    (date(2025, 2, 26), 0, 3),
+])
+def test_streaks(reference, current, longest):
+    days = [date(2025, 2, 27), date(2025, 2, 28), date(2025, 3, 1), date(2025, 3, 3), date(2025, 3, 4)]
+    streak = _streaks(days, reference)
+    assert (streak.current, streak.longest) == (current, longest)
+
+
+def test_streaks_without_diaries():
+    streak = _streaks([], date(2025, 3, 1))
+    assert (streak.current, streak.longest) == (0, 0)
+
+
+def test_check_and_repair_cli(database, users, monkeypatch, capsys):
+    alice, bob = users["alice"], users["bob"]
+    add_diary(database, alice, date(2025, 3, 3), emotion="긍정")
+    add_diary(database, alice, date(2025, 3, 4))
+    add_diary(database, bob, date(2025, 3, 3), emotion="슬픔")
+    monkeypatch.setattr(database.settings, "DATABASE_URL", str(database.engine_url.url))
+
+    # add_diary 는 집계를 갱신하지 않음 → backfill 로 처음 만들기
+    assert stats_module.main(["backfill", "--direct"]) == 0
+    assert "집계 재계산 완료: 사용자 3명" in capsys.readouterr().out
+    assert mismatches(database, users) == []
+
+    # alice 의 집계만 어긋나게 만듦
+    with Session(database.engine_url) as session:
+        session.exec(
+            update(DiaryEmotionDaily)
+            .where(DiaryEmotionDaily.user_id == alice.id, DiaryEmotionDaily.emotion == "긍정")
+            .values(count=2)
+        )
+        session.exec(delete(DiaryEmotionDaily).where(DiaryEmotionDaily.emotion == NO_EMOTION))
+        session.commit()
+
+    assert stats_module.main(["check", "--direct"]) == 1
+    out = capsys.readouterr().out
+    assert out.count("불일치: ") == 2
+    assert "불일치 사용자 1명" in out
+    assert len(mismatches(database, users)) == 2
+
+    assert stats_module.main(["check", "--repair", "--direct"]) == 0
+    assert "불일치 사용자 1명, 재계산 1명" in capsys.readouterr().out
+    assert mismatches(database, users) == []
+    assert stats_module.main(["check", "--direct"]) == 0
+
+
+def test_rebuild_only_touches_given_users(database, users):
+    alice, bob = users["alice"], users["bob"]
+    add_diary(database, alice, date(2025, 3, 3), emotion="긍정")
+    add_diary(database, bob, date(2025, 3, 3), emotion="슬픔")
+
+    async def rebuild():
+        async with AsyncSession(database.async_engine) as session:
+            await rebuild_user_stats(session, [alice.id])
+            await session.commit()
+
+    asyncio.run(rebuild())
+    assert mismatches(database, users) == [
+        {"user_id": bob.id, "day": date(2025, 3, 3), "emotion": "슬픔", "expected": 1, "actual": 0},
+    ]
@@ -0,0 +1,173 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from models.diarys_model import Diary, korea_now
+from models.emotion_job_model import JOB_FAILED, JOB_PENDING, JOB_RUNNING, EmotionJob
+from tests.conftest import auth_headers
+from utils import emotion_worker as worker_module
+from utils.clova import SOURCE_CLOVA
+from utils.emotion_cache import EmotionResultCache
+from utils.emotion_worker import (
+    EMOTION_DONE, EMOTION_FAILED, EMOTION_JOB_MAX_ATTEMPTS, EMOTION_PENDING, EmotionWorkerPool,
+)
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Clova 대신 analyzed 에 기록하고 results 의 값(예외면 raise)을 돌려주는 워커"""
+    monkeypatch.setattr(worker_module, "emotion_cache", EmotionResultCache())
+    worker = EmotionWorkerPool(concurrency=2, batch_size=8)
+    worker.analyzed = []
+    worker.results = {}
+
+    async def analyze(content):
+        worker.analyzed.append(content)
+        result = worker.results.get(content, "긍정")
+        if isinstance(result, Exception):
+            raise result
+        return result, SOURCE_CLOVA
+
+    monkeypatch.setattr(worker, "_analyze", analyze)
+    return worker
+
+
+def create(client, user, content="오늘은 좋은 날", diary_date="2025-03-01"):
+    payload = {"title": "제목", "content": content, "image": "", "diary_date": diary_date}
+    response = client.post("/diarys/", json=payload, headers=auth_headers(user))
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def jobs(database) -> list[EmotionJob]:
+    with Session(database.engine_url) as session:
+        return session.exec(select(EmotionJob).order_by(EmotionJob.id)).all()
+
+
+def diary(database, diary_id: int) -> Diary:
+    with Session(database.engine_url) as session:
+        return session.get(Diary, diary_id)
+
+
+def set_job(database, job_id: int, **values) -> None:
+    with Session(database.engine_url) as session:
+        job = session.get(EmotionJob, job_id)
+        for name, value in values.items():
+            setattr(job, name, value)
+        session.add(job)
+        session.commit()
+
+
+def test_enqueued_job_is_analyzed_and_removed(client, database, users, worker):
+    diary_id = create(client, users["alice"])
+    [job] = jobs(database)
+    assert (job.diary_id, job.status, job.attempts) == (diary_id, JOB_PENDING, 0)
+    assert diary(database, diary_id).emotion_status == EMOTION_PENDING
+
+    assert asyncio.run(worker.run_once()) == 1
+    assert asyncio.run(worker.run_once()) == 0
+
+    stored = diary(database, diary_id)
+    assert (stored.emotion, stored.emotion_status, stored.emotion_source) == ("긍정", EMOTION_DONE, SOURCE_CLOVA)
+    assert jobs(database) == []
+    assert worker.analyzed == ["오늘은 좋은 날"]
+    assert worker.processed == 1
+
+
+def test_update_replaces_pending_job(client, database, users, worker):
+    diary_id = create(client, users["alice"])
+    response = client.put(f"/diarys/{diary_id}", json={"content": "바뀐 내용"}, headers=auth_headers(users["alice"]))
+    assert response.status_code == 200
+    # 아직 시작하지 않은 이전 작업은 새 작업으로 대체
+    assert [job.diary_id for job in jobs(database)] == [diary_id]
+
+    asyncio.run(worker.run_once())
+    assert worker.analyzed == ["바뀐 내용"]
+
+
+def test_failure_is_retried_with_backoff(client, database, users, worker):
+    diary_id = create(client, users["alice"])
+    worker.results["오늘은 좋은 날"] = RuntimeError("Clova 오류")
+
+    before = korea_now()
+    assert asyncio.run(worker.run_once()) == 1
+    [job] = jobs(database)
+    assert (job.status, job.attempts, job.last_error) == (JOB_PENDING, 1, "Clova 오류")
+    assert job.available_at >= before + timedelta(seconds=2)
+    assert worker.retried == 1
+    # backoff 가 끝나기 전에는 가져가지 않음
+    assert asyncio.run(worker.run_once()) == 0
+
+    del worker.results["오늘은 좋은 날"]
+    set_job(database, job.id, available_at=korea_now() - timedelta(seconds=1))
+    assert asyncio.run(worker.run_once()) == 1
+    assert diary(database, diary_id).emotion_status == EMOTION_DONE
+    assert jobs(database) == []
+
+
+def test_last_attempt_failure_marks_diary_failed(client, database, users, worker):
+    diary_id = create(client, users["alice"])
+    worker.results["오늘은 좋은 날"] = RuntimeError("Clova 오류")
+    set_job(database, jobs(database)[0].id, attempts=EMOTION_JOB_MAX_ATTEMPTS - 1)
+
+    assert asyncio.run(worker.run_once()) == 1
+    [job] = jobs(database)
+    assert (job.status, job.attempts) == (JOB_FAILED, EMOTION_JOB_MAX_ATTEMPTS)
+    assert diary(database, diary_id).emotion_status == EMOTION_FAILED
+    assert worker.failed == 1
+
+
+def test_expired_lease_is_reclaimed(client, database, users, worker):
+    diary_id = create(client, users["alice"])
+    job_id = jobs(database)[0].id
+    # 처리 중 워커가 죽은 작업: lease 가 남아 있는 동안에는 다른 워커가 가져가지 않음
+    set_job(database, job_id, status=JOB_RUNNING, attempts=1, available_at=korea_now() + timedelta(seconds=60))
+    assert asyncio.run(worker.run_once()) == 0
+
+    set_job(database, job_id, available_at=korea_now() - timedelta(seconds=1))
+    assert asyncio.run(worker.run_once()) == 1
+    assert diary(database, diary_id).emotion_status == EMOTION_DONE
+    assert worker.analyzed == ["오늘은 좋은 날"]
+
+
+def test_expired_lease_after_max_attempts_fails_without_reclaim(client, database, users, worker):
+    diary_id = create(client, users["alice"])
+    other_id = create(client, users["alice"], content="다른 날", diary_date="2025-03-02")
+    job_id = jobs(database)[0].id
+    set_job(database, job_id, status=JOB_RUNNING, attempts=EMOTION_JOB_MAX_ATTEMPTS,
+            available_at=korea_now() - timedelta(seconds=1))
+
+    # 워커를 계속 죽이는 작업은 다시 가져가지 않고 실패 처리, 같은 묶음의 다른 작업은 정상 처리
+    assert asyncio.run(worker.run_once()) == 2
+    assert worker.analyzed == ["다른 날"]
+    [job] = jobs(database)
+    assert (job.id, job.status, job.attempts) == (job_id, JOB_FAILED, EMOTION_JOB_MAX_ATTEMPTS)
+    assert job.last_error == "lease 만료 (처리 중 워커 중단)"
+    assert diary(database, diary_id).emotion_status == EMOTION_FAILED
+    assert diary(database, other_id).emotion_status == EMOTION_DONE
+    assert worker.failed == 1
+    assert asyncio.run(worker.run_once()) == 0
+
+
+def test_result_for_stale_content_is_not_written(client, database, users, worker, monkeypatch):
+    diary_id = create(client, users["alice"])
+    analyze = worker._analyze
+
+    async def edited_while_analyzing(content):
+        # 분석하는 동안 사용자가 내용을 수정 (트랜잭션 밖이므로 다른 세션에서 반영됨)
+        with Session(database.engine_url) as session:
+            stored = session.get(Diary, diary_id)
+            stored.content = "수정된 내용"
+            session.add(stored)
+            session.commit()
+        return await analyze(content)
+
+    monkeypatch.setattr(worker, "_analyze", edited_while_analyzing)
+    assert asyncio.run(worker.run_once()) == 1
+
+    stored = diary(database, diary_id)
+    # 이전 내용의 결과로 덮어쓰지 않음 (내용 수정이 등록한 새 작업이 결과를 기록)
+    assert stored.emotion is None
+    assert stored.emotion_status == EMOTION_PENDING
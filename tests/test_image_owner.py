@@ -0,0 +1,102 @@
+import asyncio
+import json
+from datetime import date
+
+from sqlmodel import Session, select
+
+from models.s3_cleanup_model import S3OrphanObject
+from tests.conftest import add_diary, auth_headers
+from utils.s3 import BUCKET_NAME, thumbnail_keys, upload_key_prefix, uploaded_object_url
+from utils.s3_cleanup import S3CleanupWorker
+
+
+def create(client, user, image, diary_date="2025-05-01"):
+    payload = {"title": "제목", "content": "내용", "image": image, "diary_date": diary_date}
+    return client.post("/diarys/", json=payload, headers=auth_headers(user))
+
+
+def bucket_keys(s3) -> set[str]:
+    return {obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET_NAME).get("Contents", [])}
+
+
+def test_create_rejects_other_users_upload(client, users):
+    alice, bob = users["alice"], users["bob"]
+    bob_key = f"{upload_key_prefix(bob.id)}photo.jpg"
+
+    for image in (bob_key, uploaded_object_url(bob_key), "https://example.com/photo.jpg"):
+        response = create(client, alice, image)
+        assert response.status_code == 403
+        assert response.json()["detail"] == "본인이 업로드한 이미지만 사용할 수 있습니다."
+
+    assert create(client, alice, f"{upload_key_prefix(alice.id)}photo.jpg").status_code == 201
+    assert create(client, alice, "", diary_date="2025-05-02").status_code == 201
+
+
+def test_user_prefix_is_not_a_prefix_of_another_user():
+    # u1- 가 u12- 의 접두사가 되지 않도록 구분자 포함
+    assert not f"{upload_key_prefix(12)}photo.jpg".startswith(upload_key_prefix(1))
+
+
+def test_update_rejects_other_users_upload(client, database, users):
+    alice, bob = users["alice"], users["bob"]
+    diary = add_diary(database, alice, date(2025, 5, 1))
+    headers = auth_headers(alice)
+
+    bob_key = f"{upload_key_prefix(bob.id)}photo.jpg"
+    response = client.put(f"/diarys/{diary.id}", json={"image": bob_key}, headers=headers)
+    assert response.status_code == 403
+
+    # 관리자가 수정해도 작성자(alice)의 업로드만 연결 가능
+    response = client.put(f"/diarys/{diary.id}", json={"image": bob_key}, headers=auth_headers(users["admin"]))
+    assert response.status_code == 403
+
+    # 접두사가 없는 이전 키는 본인 일기가 이미 참조하고 있을 때만 허용
+    add_diary(database, alice, date(2025, 5, 2), image="legacy.jpg")
+    add_diary(database, bob, date(2025, 5, 2), image="bob-legacy.jpg")
+    assert client.put(f"/diarys/{diary.id}", json={"image": "legacy.jpg"}, headers=headers).status_code == 200
+    assert client.put(f"/diarys/{diary.id}", json={"image": "bob-legacy.jpg"}, headers=headers).status_code == 403
+
+
+def test_complete_rejects_other_users_upload(client, users):
+    bob_key = f"{upload_key_prefix(users['bob'].id)}photo.jpg"
+    response = client.post("/diarys/images/complete", json={"key": bob_key}, headers=auth_headers(users["alice"]))
+    assert response.status_code == 403
+
+
+def test_import_skips_rows_with_other_users_upload(client, users):
+    alice, bob = users["alice"], users["bob"]
+    rows = [
+        {"title": "a", "content": "", "diary_date": "2025-05-01", "image": f"{upload_key_prefix(alice.id)}a.jpg"},
+        {"title": "b", "content": "", "diary_date": "2025-05-02", "image": f"{upload_key_prefix(bob.id)}b.jpg"},
+        {"title": "c", "content": "", "diary_date": "2025-05-03", "image": ""},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows).encode()
+    summary = client.post("/diarys/import", content=body, headers=auth_headers(alice)).json()
+    assert summary["imported"] == 2
+    assert summary["invalid"] == 1
+    assert summary["errors"] == [{"line": 2, "error": "image: 본인이 업로드한 이미지만 사용할 수 있습니다."}]
+
+
+def test_cleanup_skips_objects_still_referenced(bucket, client, database, users):
+    alice = users["alice"]
+    headers = auth_headers(alice)
+    key = f"{upload_key_prefix(alice.id)}shared.jpg"
+    for target in (key, *thumbnail_keys(key)):
+        bucket.put_object(Bucket=BUCKET_NAME, Key=target, Body=b"x")
+    # 내보낸 일기를 다른 날짜로 다시 가져오면 두 일기가 같은 객체를 참조 (키 / 서버 업로드 URL)
+    first = add_diary(database, alice, date(2025, 5, 1), image=key)
+    second = add_diary(database, alice, date(2025, 5, 2), image=uploaded_object_url(key))
+    worker = S3CleanupWorker()
+
+    assert client.delete(f"/diarys/{first.id}", headers=headers).status_code == 204
+    assert asyncio.run(worker.run_once()) == 1
+    assert bucket_keys(bucket) == {key, *thumbnail_keys(key)}
+    assert worker.referenced == 1 and worker.deleted == 0 and worker.s3_calls == 0
+
+    assert client.delete(f"/diarys/{second.id}", headers=headers).status_code == 204
+    assert asyncio.run(worker.run_once()) == 1
+    assert bucket_keys(bucket) == set()
+    assert worker.deleted == 1 and worker.s3_calls == 1
+
+    with Session(database.engine_url) as session:
+        assert session.exec(select(S3OrphanObject)).all() == []
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from models.diarys_model import korea_now
+from models.multipart_upload_model import MultipartUpload
+from tests.conftest import auth_headers
+from utils.multipart_uploads import MultipartUploads
+from utils.s3 import BUCKET_NAME, S3_MULTIPART_PART_SIZE
+
+SIZE = S3_MULTIPART_PART_SIZE + 100 # part 2개 (마지막 part 만 작음)
+
+
+def begin(client, user, size: int = SIZE) -> dict:
+    response = client.post("/diarys/images/multipart", headers=auth_headers(user),
+                           json={"content_type": "image/jpeg", "size": size})
+    assert response.status_code == 201
+    return response.json()
+
+
+def upload_row(database, key: str) -> MultipartUpload | None:
+    with Session(database.engine_url) as session:
+        return session.exec(select(MultipartUpload).where(MultipartUpload.object_key == key)).first()
+
+
+def put_part(s3, database, key: str, number: int, size: int) -> None:
+    """클라이언트가 presigned URL 로 올리는 대신 같은 업로드에 직접 part 업로드"""
+    upload_id = upload_row(database, key).upload_id
+    s3.upload_part(Bucket=BUCKET_NAME, Key=key, UploadId=upload_id, PartNumber=number, Body=b"x" * size)
+
+
+def in_progress(s3) -> list[str]:
+    return [upload["Key"] for upload in s3.list_multipart_uploads(Bucket=BUCKET_NAME).get("Uploads", [])]
+
+
+def test_complete_after_missing_part_is_uploaded(bucket, client, database, users):
+    alice = users["alice"]
+    headers = auth_headers(alice)
+    started = begin(client, alice)
+    key = started["key"]
+    assert (started["part_size"], started["part_count"], started["missing"]) == (S3_MULTIPART_PART_SIZE, 2, [1, 2])
+    assert [url["part_number"] for url in started["urls"]] == [1, 2]
+
+    put_part(bucket, database, key, 1, S3_MULTIPART_PART_SIZE)
+    response = client.post(f"/diarys/images/multipart/{key}/complete", headers=headers)
+    assert response.status_code == 409
+    assert response.json()["detail"]["missing"] == [2]
+    assert client.get(f"/diarys/images/multipart/{key}", headers=headers).json()["missing"] == [2]
+
+    put_part(bucket, database, key, 2, 100)
+    put_part(bucket, database, key, 3, 100) # part_count 보다 큰 번호는 합치지 않음
+    response = client.post(f"/diarys/images/multipart/{key}/complete", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["size"] == SIZE
+    assert bucket.head_object(Bucket=BUCKET_NAME, Key=key)["ContentLength"] == SIZE
+    assert upload_row(database, key) is None
+    assert in_progress(bucket) == []
+
+
+@pytest.mark.parametrize("sizes, wrong", [
+    ((S3_MULTIPART_PART_SIZE - 1, 101), [1, 2]), # 합계는 같아도 part 경계가 다름
+    ((S3_MULTIPART_PART_SIZE, 200), [2]),     # 마지막 part 가 알린 크기보다 큼
+    ((S3_MULTIPART_PART_SIZE, 50), [2]),      # 마지막 part 가 알린 크기보다 작음
+])
+def test_complete_rejects_wrong_part_sizes(bucket, client, database, users, sizes, wrong):
+    alice = users["alice"]
+    key = begin(client, alice)["key"]
+    for number, size in enumerate(sizes, start=1):
+        put_part(bucket, database, key, number, size)
+
+    response = client.post(f"/diarys/images/multipart/{key}/complete", headers=auth_headers(alice))
+    assert response.status_code == 400
+    assert response.json()["detail"]["parts"] == wrong
+    # 업로드는 그대로 남아 잘못된 part 만 다시 올릴 수 있음
+    assert upload_row(database, key) is not None
+    assert in_progress(bucket) == [key]
+
+
+def test_other_users_upload_is_not_found(bucket, client, database, users):
+    key = begin(client, users["alice"])["key"]
+    bob = auth_headers(users["bob"])
+
+    assert client.get(f"/diarys/images/multipart/{key}", headers=bob).status_code == 404
+    assert client.post(f"/diarys/images/multipart/{key}/parts", headers=bob, json={"part_numbers": [1]}).status_code == 404
+    assert client.post(f"/diarys/images/multipart/{key}/complete", headers=bob).status_code == 404
+    assert client.delete(f"/diarys/images/multipart/{key}", headers=bob).status_code == 404
+    assert upload_row(database, key) is not None
+    assert in_progress(bucket) == [key]
+
+    assert client.delete(f"/diarys/images/multipart/{key}", headers=auth_headers(users["alice"])).status_code == 204
+    assert upload_row(database, key) is None
+    assert in_progress(bucket) == []
+
+
+def test_janitor_aborts_expired_uploads(bucket, client, database, users):
+    expired = begin(client, users["alice"])["key"]
+    active = begin(client, users["bob"])["key"]
+    with Session(database.engine_url) as session:
+        upload = session.exec(select(MultipartUpload).where(MultipartUpload.object_key == expired)).one()
+        upload.expires_at = korea_now() - timedelta(seconds=1)
+        session.add(upload)
+        session.commit()
+
+    janitor = MultipartUploads()
+    janitor._next_sweep = float("inf") # 버킷 전체 확인은 아래 테스트에서
+    assert asyncio.run(janitor.run_once()) == 1
+    assert janitor.expired == 1 and janitor.swept == 0
+    assert upload_row(database, expired) is None
+    assert upload_row(database, active) is not None
+    assert in_progress(bucket) == [active]
+    assert asyncio.run(janitor.run_once()) == 0
+
+
+def test_janitor_sweep_aborts_uploads_without_row(bucket, database):
+    # 행을 commit 하기 전에 실패해 S3 에만 남은 업로드 (moto 는 Initiated 를 고정된 과거 시각으로 돌려줌 → TTL 경과)
+    bucket.create_multipart_upload(Bucket=BUCKET_NAME, Key="u1-orphan.jpg")
+    janitor = MultipartUploads(sweep_interval=3600)
+
+    assert asyncio.run(janitor.run_once()) == 1
+    assert janitor.swept == 1 and janitor.expired == 0
+    assert in_progress(bucket) == []
+
+    # 다음 확인 주기 전에는 버킷을 다시 보지 않음
+    bucket.create_multipart_upload(Bucket=BUCKET_NAME, Key="u1-orphan-2.jpg")
+    assert asyncio.run(janitor.run_once()) == 0
+    assert in_progress(bucket) == ["u1-orphan-2.jpg"]
+    janitor._next_sweep = 0.0
+    assert asyncio.run(janitor.run_once()) == 1
+    assert in_progress(bucket) == []
@@ -0,0 +1,92 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.s3 import S3ClientProvider, S3CredentialsUnavailable
+
+
+class FakeSTS:
+    def __init__(self, lifetime: timedelta = timedelta(hours=1)):
+        self.lifetime = lifetime
+        self.failing = False
+        self.calls = [] # 호출한 스레드
+
+    def assume_role(self, **kwargs):
+        self.calls.append(threading.current_thread())
+        if self.failing:
+            raise RuntimeError("Throttling")
+        return {"Credentials": {
+            "AccessKeyId": "id", "SecretAccessKey": "secret", "SessionToken": "token",
+            "Expiration": datetime.now(timezone.utc) + self.lifetime,
+        }}
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def sts():
+    return FakeSTS()
+
+
+@pytest.fixture
+def provider(sts):
+    provider = S3ClientProvider("arn:aws:iam::123456789012:role/test", "ap-northeast-2",
+                                retry_interval=60, max_retry_interval=600)
+    provider._sts = sts
+    yield provider
+    provider.stop()
+
+
+def test_refresh_margin_returns_valid_client_without_inline_sts(provider, sts):
+    client = provider.get_client()
+    # 만료 3분 전 (갱신 여유 5분 안), STS 장애 중
+    provider._expiration = datetime.now(timezone.utc) + timedelta(minutes=3)
+    sts.failing = True
+    provider.stop()
+
+    for _ in range(50):
+        assert provider.get_client() is client
+    # 요청 스레드에서는 STS 를 부르지 않고, 백그라운드 갱신 하나만 예약됨
+    assert wait_until(lambda: provider.refresh_failures == 1)
+    assert len(sts.calls) == 2
+    assert sts.calls[-1] is not threading.current_thread()
+    # 갱신이 실패해도 만료 전까지는 계속 같은 클라이언트, 다음 시도는 backoff 뒤
+    assert provider.get_client() is client
+    assert provider.stats()["retry_in"] > 0
+    assert len(sts.calls) == 2
+
+
+def test_failures_back_off_instead_of_retrying_every_call(provider, sts):
+    sts.failing = True
+    with pytest.raises(RuntimeError, match="Throttling"):
+        provider.get_client()
+    # backoff 동안에는 STS 를 부르지 않고 바로 실패
+    for _ in range(20):
+        with pytest.raises(S3CredentialsUnavailable):
+            provider.get_client()
+    assert len(sts.calls) == 1
+    assert provider.unavailable == 20
+
+    # 연속 실패할수록 재시도 간격이 늘어남 (상한 max_retry_interval)
+    provider._next_attempt_at = 0.0
+    with pytest.raises(RuntimeError):
+        provider.get_client()
+    assert 100 < provider.stats()["retry_in"] <= 120
+
+
+def test_non_blocking_callers_never_wait_for_sts(provider, sts):
+    # 이벤트 루프의 로컬 서명 경로: 자격증명이 없으면 기다리지 않고 실패, 갱신은 백그라운드
+    with pytest.raises(S3CredentialsUnavailable):
+        provider.get_credentials(block=False)
+    assert wait_until(lambda: provider.refreshes == 1)
+    assert all(thread is not threading.current_thread() for thread in sts.calls)
+    assert provider.get_credentials(block=False).access_key == "id"
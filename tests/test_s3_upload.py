@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from utils.s3 import S3StreamUploader
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def fake_client(failing: set[str]):
+    calls = []
+
+    def call(method: str, **kwargs):
+        calls.append(method)
+        if method in failing:
+            raise RuntimeError(f"{method} 실패")
+        if method == "create_multipart_upload":
+            return {"UploadId": "upload-1"}
+        if method == "upload_part":
+            return {"ETag": f'"{kwargs["PartNumber"]}"'}
+        return {}
+
+    return call, calls
+
+
+def test_multipart_failure_keeps_original_error_when_abort_fails(monkeypatch):
+    uploader = S3StreamUploader(max_workers=2, part_size=4, parts_in_flight=2)
+    call, calls = fake_client({"upload_part", "abort_multipart_upload"})
+    monkeypatch.setattr(uploader, "_client_call", call)
+
+    with pytest.raises(RuntimeError, match="upload_part 실패"):
+        asyncio.run(uploader.upload(chunks(b"abcdefgh"), "u1/a.jpg", "image/jpeg"))
+
+    assert "abort_multipart_upload" in calls
+    assert uploader.failed == 1
+    assert uploader._progress == {}
+
+
+def test_multipart_upload_completes_in_part_order(monkeypatch):
+    uploader = S3StreamUploader(max_workers=2, part_size=4, parts_in_flight=2)
+    call, calls = fake_client(set())
+    monkeypatch.setattr(uploader, "_client_call", call)
+
+    result = asyncio.run(uploader.upload(chunks(b"abc", b"defgh", b"ij"), "u1/a.jpg", "image/jpeg"))
+
+    assert result["size"] == 10
+    assert calls.count("upload_part") == 3
+    assert calls[-1] == "complete_multipart_upload"
+    assert uploader.completed == 1 and uploader.failed == 0
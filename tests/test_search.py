@@ -0,0 +1,74 @@
+from tests.conftest import auth_headers
+
+
+def create(client, user, title, content, day, state=True):
+    response = client.post("/diarys/", headers=auth_headers(user), json={
+        "title": title, "content": content, "image": "", "state": state, "diary_date": day,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def search(client, query):
+    response = client.get("/diarys/list/search", params={"search": query})
+    assert response.status_code == 200
+    return [item["id"] for item in response.json()]
+
+
+def test_create_update_delete_maintain_index(client, users):
+    alice = users["alice"]
+    diary_id = create(client, alice, "산책", "공원에서 벚꽃을 보았다", "2025-04-01")
+    assert search(client, "벚꽃") == [diary_id]
+
+    # 수정하면 이전 내용의 토큰은 빠지고 새 내용으로 다시 색인
+    response = client.put(f"/diarys/{diary_id}", headers=auth_headers(alice), json={"content": "바다에서 수영을 했다"})
+    assert response.status_code == 200
+    assert search(client, "벚꽃") == []
+    assert search(client, "수영") == [diary_id]
+
+    assert client.delete(f"/diarys/{diary_id}", headers=auth_headers(alice)).status_code == 204
+    assert search(client, "수영") == []
+
+
+def test_every_query_token_must_match(client, users):
+    both = create(client, users["alice"], "일기", "커피와 케이크를 먹었다", "2025-04-01")
+    create(client, users["alice"], "일기", "커피만 마셨다", "2025-04-02")
+    assert search(client, "커피 케이크") == [both]
+
+
+def test_ranking_prefers_title_and_frequency(client, users):
+    alice = users["alice"]
+    in_content = create(client, alice, "하루", "오늘 도서관에 갔다", "2025-04-01")
+    in_title = create(client, alice, "도서관", "책을 빌렸다", "2025-04-02")
+    repeated = create(client, alice, "하루", "도서관 도서관 도서관 도서관", "2025-04-03")
+    # 제목 토큰은 TITLE_WEIGHT(3) 배, 본문 4번 반복이 제목 1번보다 높음
+    assert search(client, "도서관") == [repeated, in_title, in_content]
+
+
+def test_only_public_diaries_are_searchable(client, users):
+    public = create(client, users["alice"], "공개", "비밀 정원 이야기", "2025-04-01")
+    create(client, users["bob"], "비공개", "비밀 정원 이야기", "2025-04-01", state=False)
+    assert search(client, "정원") == [public]
+
+    # 공개 → 비공개로 바꾸면 검색에서 빠짐
+    client.put(f"/diarys/{public}", headers=auth_headers(users["alice"]), json={"state": False})
+    assert search(client, "정원") == []
+
+
+def test_empty_query_is_rejected(client):
+    assert client.get("/diarys/list/search").status_code == 400
+
+
+def test_single_syllable_query_matches_inside_words(client, users):
+    alice = users["alice"]
+    start = create(client, alice, "하루", "기분이 좋다", "2025-04-01")
+    end = create(client, alice, "봄", "공원의 벚꽃", "2025-04-02")
+    middle = create(client, alice, "겨울", "첫눈이 내렸다", "2025-04-03")
+    # 어절 첫 글자 / 마지막 글자 / 가운데 글자
+    assert search(client, "좋") == [start]
+    assert search(client, "꽃") == [end]
+    assert search(client, "눈") == [middle]
+    assert search(client, "좋 기분") == [start]
+    assert search(client, "꽃 좋") == []
+    # LIKE 와일드카드는 글자 그대로 비교
+    assert search(client, "_") == []
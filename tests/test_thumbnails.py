@@ -0,0 +1,95 @@
+import asyncio
+import io
+from datetime import date
+
+import pytest
+from PIL import Image
+from sqlmodel import Session, select
+
+from models.diarys_model import Diary
+from models.thumbnail_model import THUMBNAIL_DONE, THUMBNAIL_FAILED, ThumbnailJob
+from tests.conftest import add_diary, auth_headers
+from utils.s3 import BUCKET_NAME, upload_key_prefix, uploaded_object_url
+from utils.thumbnails import ThumbnailWorker
+
+
+@pytest.fixture
+def worker(database):
+    worker = ThumbnailWorker(workers=1)
+    yield worker
+    asyncio.run(worker.stop())
+
+
+def jpeg(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 100, 50)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def put_image(s3, key: str, body: bytes, content_type: str = "image/jpeg") -> None:
+    s3.put_object(Bucket=BUCKET_NAME, Key=key, Body=body, ContentType=content_type)
+
+
+def test_thumbnail_job_renders_uploads_and_attaches(bucket, worker, client, users, database):
+    alice = users["alice"]
+    key = "photo.jpg" # 업로더 접두사가 없는 이전 키 → 본인 일기가 참조하고 있으므로 허용
+    put_image(bucket, key, jpeg(3000, 1500))
+    # 일기를 먼저 쓰고 (서버 업로드 URL 형식) 업로드 완료 알림은 나중에
+    diary = add_diary(database, alice, date(2025, 6, 1), image=uploaded_object_url(key))
+
+    response = client.post("/diarys/images/complete", headers=auth_headers(alice), json={"key": key})
+    assert response.status_code == 202
+    assert response.json() == {"key": key, "thumbnail": "thumbnails/photo-w640.webp"}
+
+    assert asyncio.run(worker.run_once()) == 1
+    assert asyncio.run(worker.run_once()) == 0
+
+    for width, expected in ((320, (320, 160)), (640, (640, 320)), (1280, (1280, 640))):
+        obj = bucket.get_object(Bucket=BUCKET_NAME, Key=f"thumbnails/photo-w{width}.webp")
+        assert obj["ContentType"] == "image/webp"
+        assert obj["CacheControl"] == "public, max-age=31536000, immutable"
+        assert Image.open(io.BytesIO(obj["Body"].read())).size == expected
+
+    with Session(database.engine_url) as session:
+        stored = session.get(Diary, diary.id)
+        assert stored.thumbnail == "thumbnails/photo-w640.webp"
+        assert stored.version == diary.version + 1
+        assert session.exec(select(ThumbnailJob.status)).all() == [THUMBNAIL_DONE]
+    assert worker.rendered == 1
+
+
+def test_thumbnail_of_finished_job_is_used_on_create(bucket, worker, client, users):
+    alice = users["alice"]
+    headers = auth_headers(alice)
+    key = f"{upload_key_prefix(alice.id)}small.jpg"
+    put_image(bucket, key, jpeg(400, 300))
+    client.post("/diarys/images/complete", headers=headers, json={"key": key})
+    asyncio.run(worker.run_once())
+
+    response = client.post("/diarys/", headers=headers, json={
+        "title": "t", "content": "c", "diary_date": "2025-06-02", "image": key,
+    })
+    assert response.json()["thumbnail"] == f"thumbnails/{upload_key_prefix(alice.id)}small-w640.webp"
+    # 원본보다 큰 크기는 늘리지 않음
+    obj = bucket.get_object(Bucket=BUCKET_NAME, Key=f"thumbnails/{upload_key_prefix(alice.id)}small-w1280.webp")
+    assert Image.open(io.BytesIO(obj["Body"].read())).size == (400, 300)
+
+
+def test_not_an_image_fails_without_retry(bucket, worker, client, users, database):
+    prefix = upload_key_prefix(users["alice"].id)
+    headers = auth_headers(users["alice"])
+    put_image(bucket, f"{prefix}broken.jpg", b"not an image")
+    put_image(bucket, f"{prefix}notes.txt", b"text", content_type="text/plain")
+
+    for key, expected in (("notes.txt", 415), ("missing.jpg", 404), ("broken.jpg", 202)):
+        response = client.post("/diarys/images/complete", headers=headers, json={"key": f"{prefix}{key}"})
+        assert response.status_code == expected
+
+    assert asyncio.run(worker.run_once()) == 1
+    with Session(database.engine_url) as session:
+        job = session.exec(select(ThumbnailJob)).one()
+        assert job.status == THUMBNAIL_FAILED and job.attempts == 1
+    assert worker.failed == 1
+    assert f"thumbnails/{prefix}broken-w640.webp" not in {
+        obj["Key"] for obj in bucket.list_objects_v2(Bucket=BUCKET_NAME).get("Contents", [])
+    }
@@ -0,0 +1,54 @@
+from tests.conftest import auth_headers
+
+
+def sign_up(client, email="carol@example.com", username="carol", password="pw-1234"):
+    return client.post("/users/signup", json={"email": email, "username": username, "password": password})
+
+
+def test_signup_and_signin(client):
+    response = sign_up(client)
+    assert response.status_code == 201
+    assert response.json()["user"]["username"] == "carol"
+
+    response = client.post("/users/signin", data={"username": "carol@example.com", "password": "pw-1234"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+
+    # 발급된 토큰으로 인증이 필요한 엔드포인트 호출
+    response = client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {"exists": False}
+
+
+def test_signin_wrong_password(client):
+    sign_up(client)
+    response = client.post("/users/signin", data={"username": "carol@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_signin_unknown_user(client):
+    response = client.post("/users/signin", data={"username": "nobody@example.com", "password": "pw"})
+    assert response.status_code == 404
+
+
+def test_signup_duplicate_is_conflict(client):
+    assert sign_up(client).status_code == 201
+    response = sign_up(client, username="carol2")
+    assert response.status_code == 409
+    response = sign_up(client, email="carol2@example.com")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "이미 등록된 닉네임입니다."
+
+
+def test_check_email_and_username(client, users):
+    assert client.get("/users/checkemail/alice@example.com").status_code == 409
+    assert client.get("/users/checkemail/new@example.com").json() == {"message": "Email available"}
+    assert client.get("/users/checkusername/alice").status_code == 409
+    assert client.get("/users/checkusername/newbie").json() == {"message": "Username available"}
+
+
+def test_signout_revokes_token(client, users):
+    headers = auth_headers(users["alice"])
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 200
+    assert client.post("/users/signout", headers=headers).status_code == 200
+    assert client.get("/diarys/check-duplicate?diary_date=2025-01-01", headers=headers).status_code == 401
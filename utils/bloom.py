@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import time
+import unicodedata
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import connection
+from models.users_model import User
+
+logger = logging.getLogger("uvicorn.error")
+
+USER_FILTER_MIN_CAPACITY = int(os.getenv("USER_FILTER_MIN_CAPACITY", "100000"))
+USER_FILTER_ERROR_RATE = float(os.getenv("USER_FILTER_ERROR_RATE", "0.01"))
+USER_FILTER_SYNC_INTERVAL = float(os.getenv("USER_FILTER_SYNC_INTERVAL", "5")) # 초, 다른 replica 가입자 반영 주기
+# 동기화 때 마지막 id 아래로 다시 읽는 범위 (id 순서와 다르게 늦게 commit 된 가입 반영)
+USER_FILTER_SYNC_OVERLAP = int(os.getenv("USER_FILTER_SYNC_OVERLAP", "1000"))
+USER_FILTER_REBUILD_INTERVAL = float(os.getenv("USER_FILTER_REBUILD_INTERVAL", "3600")) # 초, 전체 다시 읽기 주기
+USER_FILTER_WARM_BATCH = 5000
+
+
+# ───────────────────────────────────────
+# Bloom filter
+#   - "없다" 는 확실, "있을 수도 있다" 는 오탐 가능 (error_rate)
+#   - 삭제는 지원하지 않음 (지워진 값은 오탐으로 남고 DB 조회로 처리됨)
+# ───────────────────────────────────────
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = USER_FILTER_ERROR_RATE):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        # double hashing: h1 + i*h2 (해시 한 번으로 k 개 위치)
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, value: str) -> None:
+        for pos in self._positions(value):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def add_new(self, value: str) -> None:
+        """이미 있는 (또는 오탐인) 값은 count 를 늘리지 않음 (다시 읽은 행이 포화 판단을 앞당기지 않도록)"""
+        if value not in self:
+            self.add(value)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
+
+
+def _filter_key(value: str) -> str:
+    # MySQL utf8mb4_0900_ai_ci 는 대소문자/악센트를 구분하지 않으므로 같은 기준으로 정규화
+    # (더 넓게 "있을 수도 있다" 로 판단하는 쪽이라 안전)
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+# ───────────────────────────────────────
+# 이메일/닉네임 중복 확인용 부정 필터
+#   - 시작 시 user 테이블로 채우고, 가입 시 추가
+#   - 다른 replica 에서 가입한 사용자는 백그라운드 작업이 id 증가분을 주기적으로 읽어 반영
+#     (요청 경로는 비트 조회만, DB 스캔/재구성 비용을 요청이 부담하지 않음)
+#     AUTO_INCREMENT id 는 commit 순서와 다를 수 있으므로 마지막 id 아래 일정 범위를 다시 읽고,
+#     그보다 늦게 commit 된 행까지 USER_FILTER_REBUILD_INTERVAL 마다 전체를 다시 읽어 반영
+#   - 준비되지 않았거나 포화되면 항상 "있을 수도 있다" (DB 조회)
+# ───────────────────────────────────────
+class UserExistenceFilter:
+    def __init__(self, min_capacity: int = USER_FILTER_MIN_CAPACITY,
+                 sync_interval: float = USER_FILTER_SYNC_INTERVAL,
+                 sync_overlap: int = USER_FILTER_SYNC_OVERLAP,
+                 rebuild_interval: float = USER_FILTER_REBUILD_INTERVAL):
+        self.min_capacity = min_capacity
+        self.sync_interval = sync_interval
+        self.sync_overlap = sync_overlap
+        self.rebuild_interval = rebuild_interval
+        self.emails: BloomFilter | None = None
+        self.usernames: BloomFilter | None = None
+        self._last_id = 0
+        self._built_at = 0.0
+        self._task: asyncio.Task | None = None
+
+        self.negatives = 0 # DB 조회 없이 응답한 횟수
+        self.lookups = 0 # 필터가 "있을 수도 있다" 라서 DB 를 조회한 횟수
+
+    @property
+    def ready(self) -> bool:
+        return self.emails is not None and not self.emails.saturated
+
+    async def warm(self, session: AsyncSession) -> None:
+        """user 테이블 전체로 필터를 새로 만듦"""
+        # 최대 id 로 사용자 수를 넉넉하게 추정 (삭제된 id 포함)
+        max_id = (await session.exec(select(User.id).order_by(User.id.desc()).limit(1))).first() or 0
+        capacity = max(self.min_capacity, max_id * 2)
+        emails, usernames = BloomFilter(capacity), BloomFilter(capacity)
+        last_id = await self._load(session, emails, usernames, 0)
+        self.emails, self.usernames = emails, usernames
+        self._last_id = last_id
+        self._built_at = time.monotonic()
+        logger.info(f"사용자 필터 준비 완료: {emails.count}명, capacity={capacity}")
+
+    async def _load(self, session: AsyncSession, emails: BloomFilter, usernames: BloomFilter, last_id: int) -> int:
+        while True:
+            rows = (await session.exec(
+                select(User.id, User.email, User.username)
+                .where(User.id > last_id)
+                .order_by(User.id)
+                .limit(USER_FILTER_WARM_BATCH)
+            )).all()
+            for _, email, username in rows:
+                emails.add_new(_filter_key(email))
+                usernames.add_new(_filter_key(username))
+            if len(rows) < USER_FILTER_WARM_BATCH:
+                return rows[-1][0] if rows else last_id
+            last_id = rows[-1][0]
+
+    async def sync(self, session: AsyncSession) -> None:
+        """증가분 반영 (준비 전/포화/재구성 주기가 지났으면 전체 다시 읽기)"""
+        if self.emails is None or self.emails.saturated or time.monotonic() - self._built_at >= self.rebuild_interval:
+            await self.warm(session)
+        else:
+            start = max(0, self._last_id - self.sync_overlap)
+            self._last_id = max(self._last_id, await self._load(session, self.emails, self.usernames, start))
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self._sync_once() # 시작 시 전체 읽기 (실패하면 백그라운드에서 재시도)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self._sync_once()
+
+    async def _sync_once(self) -> None:
+        try:
+            async with AsyncSession(connection.async_engine) as session:
+                await self.sync(session)
+        except Exception as e:
+            # 필터 없이도 동작 (준비 전이면 모든 확인이 DB 조회로 처리됨)
+            logger.warning(f"사용자 필터 동기화 실패: {e}")
+
+    def add(self, email: str, username: str) -> None:
+        if self.emails is not None:
+            self.emails.add_new(_filter_key(email))
+            self.usernames.add_new(_filter_key(username))
+
+    def _might_exist(self, bloom: BloomFilter | None, value: str) -> bool:
+        if not self.ready or _filter_key(value) in bloom:
+            self.lookups += 1
+            return True
+        self.negatives += 1
+        return False
+
+    def might_exist_email(self, email: str) -> bool:
+        return self._might_exist(self.emails, email)
+
+    def might_exist_username(self, username: str) -> bool:
+        return self._might_exist(self.usernames, username)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "size": self.emails.count if self.emails else 0,
+            "capacity": self.emails.capacity if self.emails else 0,
+            "negatives": self.negatives,
+            "lookups": self.lookups,
+        }
+
+
+user_filter = UserExistenceFilter()
@@ -0,0 +1,68 @@
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+# ───────────────────────────────────────
+# 서킷 브레이커
+#   - 연속 실패가 failure_threshold 에 도달하면 OPEN → reset_timeout 동안 호출 차단
+#   - reset_timeout 이 지나면 HALF_OPEN 에서 시험 호출 1건만 허용
+#   - 시험 호출이 성공하면 CLOSED, 실패하면 다시 OPEN
+#   - 결과 없이 끝난 호출 (취소 등) 은 release() 로 시험 호출 자리를 반납
+# (이벤트 루프 한 곳에서만 사용하므로 락 없음)
+# ───────────────────────────────────────
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._state = CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """성공/실패로 세지 않고 끝난 호출 (다음 요청이 다시 시험 호출 가능)"""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+            self.opened += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -1,14 +1,85 @@
+import asyncio
 import httpx
+import random
 import uuid
 import os
 from dotenv import load_dotenv
 
+from utils.circuit_breaker import CircuitBreaker
+from utils.emotion_lexicon import classify_emotion_locally, match_emotion_label
+
 load_dotenv()  # .env 파일 읽어서 환경 변수 설정
 
 CLOVA_API_KEY = os.getenv("CLOVA_API_KEY")
+CLOVA_API_URL = os.getenv(
+    "CLOVA_API_URL",
+    "https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/HCX-005"
+)
+
+# 타임아웃/재시도 설정 (초)
+CLOVA_CONNECT_TIMEOUT = float(os.getenv("CLOVA_CONNECT_TIMEOUT", "3"))
+CLOVA_READ_TIMEOUT = float(os.getenv("CLOVA_READ_TIMEOUT", "15"))
+CLOVA_MAX_RETRIES = int(os.getenv("CLOVA_MAX_RETRIES", "2"))
+CLOVA_RETRY_BACKOFF = 0.5 # 재시도 대기 기본값, 시도마다 2배 + jitter
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# 감정 분석 한 건에 허용하는 최대 시간 (재시도 포함, 초)
+EMOTION_LATENCY_BUDGET = float(os.getenv("EMOTION_LATENCY_BUDGET", "5"))
+
+# 결과를 만든 분석기 (Diary.emotion_source)
+SOURCE_CLOVA = "clova"
+SOURCE_LOCAL = "local"
+
+clova_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("CLOVA_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("CLOVA_BREAKER_RESET", "30")),
+)
+
+# ───────────────────────────────────────
+# 애플리케이션 수명 동안 재사용하는 HTTP 클라이언트
+#   - main.py lifespan 에서 start/close
+#   - keep-alive 커넥션 풀 + HTTP/2 로 요청마다 TCP/TLS 핸드셰이크를 하지 않음
+#   - 테스트에서는 transport(예: httpx.ASGITransport)로 가짜 서버 주입
+# ───────────────────────────────────────
+_client: httpx.AsyncClient | None = None
+
+async def start_clova_client(transport: httpx.AsyncBaseTransport | None = None):
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = httpx.AsyncClient(
+        http2=transport is None,
+        transport=transport,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+        timeout=httpx.Timeout(CLOVA_READ_TIMEOUT, connect=CLOVA_CONNECT_TIMEOUT),
+    )
+
+async def close_clova_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def get_clova_client() -> httpx.AsyncClient:
+    # lifespan 밖(스크립트 등)에서 호출된 경우에만 지연 생성
+    if _client is None:
+        await start_clova_client()
+    return _client
+
+async def _post_with_retry(client: httpx.AsyncClient, headers: dict, payload: dict) -> httpx.Response:
+    for attempt in range(CLOVA_MAX_RETRIES + 1):
+        try:
+            response = await client.post(CLOVA_API_URL, headers=headers, json=payload)
+            if response.status_code not in RETRYABLE_STATUS or attempt == CLOVA_MAX_RETRIES:
+                response.raise_for_status()
+                return response
+        except httpx.TransportError:
+            if attempt == CLOVA_MAX_RETRIES:
+                raise
+        # full jitter: 동시에 실패한 요청들이 같은 시점에 몰리지 않도록
+        await asyncio.sleep(random.uniform(0, CLOVA_RETRY_BACKOFF * 2 ** attempt))
 
 async def analyze_emotion_async(content: str) -> str:
-    CLOVA_API_URL = "https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/HCX-005"
     headers = {
         "Authorization": CLOVA_API_KEY,  # .env에서 불러온 값 사용
         "X-NCP-CLOVASTUDIO-REQUEST-ID": str(uuid.uuid4()),
@@ -53,9 +124,33 @@ async def analyze_emotion_async(content: str) -> str:
         "seed": 0
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(CLOVA_API_URL, headers=headers, json=payload)
-        result = response.json()
-        # 응답 예시 구조에 맞게 파싱
-        emotion_text = result["result"]["message"]["content"].strip()
-        return emotion_text
+    client = await get_clova_client()
+    response = await _post_with_retry(client, headers, payload)
+    result = response.json()
+    # 응답 예시 구조에 맞게 파싱
+    emotion_text = result["result"]["message"]["content"].strip()
+    return emotion_text
+
+
+# ───────────────────────────────────────
+# 지연 예산 + 서킷 브레이커 + 로컬 대체 분류기
+#   - 서킷이 열려 있거나 예산 안에 응답이 없으면 로컬 분류기 결과 사용
+#   - 반환값의 source 로 어떤 분석기가 만든 결과인지 기록 (local 은 나중에 재분석 대상)
+# ───────────────────────────────────────
+async def analyze_emotion_with_fallback(content: str, budget: float = EMOTION_LATENCY_BUDGET) -> tuple[str, str]:
+    if clova_breaker.allow():
+        try:
+            emotion_text = await asyncio.wait_for(analyze_emotion_async(content), timeout=budget)
+        except Exception as e:
+            clova_breaker.record_failure()
+            print(f"감정 분석 실패, 로컬 분류기 사용: {e!r}")
+        except BaseException:
+            # 취소 (워커 종료/요청 취소) 는 Clova 실패가 아님 → 시험 호출 자리만 반납하고 전파
+            clova_breaker.release()
+            raise
+        else:
+            clova_breaker.record_success()
+            emotion = match_emotion_label(emotion_text)
+            if emotion:
+                return emotion, SOURCE_CLOVA
+    return classify_emotion_locally(content), SOURCE_LOCAL
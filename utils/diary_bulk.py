@@ -0,0 +1,188 @@
+import os
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import connection
+from database.diary_query import is_duplicate_diary_date, row_to_diary_list
+from models.diarys_model import Diary, DiaryCreate, korea_now
+from utils.clova import SOURCE_CLOVA
+from utils.emotion_cache import content_hash, emotion_cache
+from utils.emotion_stats import EmotionStatDelta
+from utils.image_owner import foreign_images
+from utils.thumbnails import find_thumbnails
+from utils.emotion_worker import EMOTION_DONE, EMOTION_PENDING, enqueue_new_emotion_jobs
+from utils.search import index_new_diaries
+
+EXPORT_FETCH_SIZE = 500 # server-side cursor 에서 한 번에 가져오는 행 수
+IMPORT_BATCH_SIZE = int(os.getenv("DIARY_IMPORT_BATCH_SIZE", "500")) # INSERT/commit 단위
+IMPORT_MAX_ROWS = int(os.getenv("DIARY_IMPORT_MAX_ROWS", "50000"))
+IMPORT_MAX_LINE_BYTES = 1024 * 1024
+IMPORT_MAX_ERRORS = 100 # 응답에 담는 오류 행 수
+
+
+# ───────────────────────────────────────
+# NDJSON 내보내기
+#   - server-side cursor (stream_results) 로 묶음씩 읽어 바로 전송 → 전체 목록을 메모리에 올리지 않음
+#   - 응답을 보내는 동안 쓰는 세션이므로 요청 의존성 세션과 별개로 엶
+# ───────────────────────────────────────
+async def stream_diary_export(statement) -> AsyncIterator[bytes]:
+    async with AsyncSession(connection.async_engine) as session:
+        result = await session.stream(statement.execution_options(yield_per=EXPORT_FETCH_SIZE))
+        async for rows in result.partitions():
+            yield b"".join(row_to_diary_list(row).model_dump_json().encode() + b"\n" for row in rows)
+
+
+# ───────────────────────────────────────
+# NDJSON 가져오기
+#   - 요청 본문을 줄 단위로 읽으며 검증 (본문 전체를 메모리에 올리지 않음)
+#   - IMPORT_BATCH_SIZE 행마다 중복 날짜를 한 번에 확인하고 executemany INSERT
+#   - 감정 분석은 작업 큐에 묶음으로 등록 → 워커가 제한된 동시성으로 처리
+# ───────────────────────────────────────
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    """(줄 번호, 내용) — 빈 줄은 건너뜀"""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > IMPORT_MAX_LINE_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="한 줄이 너무 깁니다.")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc']) or 'line'}: {error['msg']}"
+        for error in e.errors()
+    )
+
+
+async def import_diaries(session: AsyncSession, user_id: int, lines: AsyncIterator[tuple[int, bytes]]) -> dict:
+    summary = {
+        "imported": 0,
+        "skipped_duplicates": 0, # 이미 같은 날짜 일기가 있거나 파일 안에서 날짜가 겹친 행
+        "invalid": 0,
+        "errors": [],
+        "emotion_jobs": 0,
+        "truncated": False, # IMPORT_MAX_ROWS 를 넘어 뒷부분을 가져오지 않음
+        "public": False,
+    }
+    seen_dates = set()
+    batch: list[DiaryCreate] = []
+    rows_read = 0
+
+    async for line_no, line in lines:
+        rows_read += 1
+        if rows_read > IMPORT_MAX_ROWS:
+            # 이미 저장한 묶음은 그대로 두고 나머지는 읽지 않음
+            summary["truncated"] = True
+            break
+        try:
+            row = DiaryCreate.model_validate_json(line)
+        except ValidationError as e:
+            summary["invalid"] += 1
+            if len(summary["errors"]) < IMPORT_MAX_ERRORS:
+                summary["errors"].append({"line": line_no, "error": _validation_message(e)})
+            continue
+
+        if row.image and await foreign_images(session, user_id, [row.image]):
+            # 접두사가 맞는 키는 DB 조회 없이 통과 (이전 키만 본인 일기 참조 여부 조회)
+            summary["invalid"] += 1
+            if len(summary["errors"]) < IMPORT_MAX_ERRORS:
+                summary["errors"].append({"line": line_no, "error": "image: 본인이 업로드한 이미지만 사용할 수 있습니다."})
+            continue
+
+        if row.diary_date in seen_dates:
+            summary["skipped_duplicates"] += 1
+            continue
+        seen_dates.add(row.diary_date)
+        batch.append(row)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _insert_batch(session, user_id, batch, summary)
+            batch = []
+
+    if batch:
+        await _insert_batch(session, user_id, batch, summary)
+    return summary
+
+
+async def _insert_batch(session: AsyncSession, user_id: int, batch: list[DiaryCreate], summary: dict,
+                        retry: bool = True) -> None:
+    dates = [row.diary_date for row in batch]
+    existing = set((await session.exec(
+        select(Diary.diary_date).where(Diary.user_id == user_id, Diary.diary_date.in_(dates))
+    )).all())
+    rows = [row for row in batch if row.diary_date not in existing]
+    if not rows:
+        summary["skipped_duplicates"] += len(batch)
+        return
+
+    # 같은 내용의 분석 결과가 캐시에 있으면 바로 채우고, 없으면 pending 으로 넣고 작업 등록
+    digests = {row.diary_date: content_hash(row.content) for row in rows if row.content}
+    cached = await emotion_cache.get_many(session, digests.values())
+    emotions = {row.diary_date: cached.get(digests.get(row.diary_date)) for row in rows}
+    thumbnails = await find_thumbnails(session, [row.image for row in rows])
+    now = korea_now()
+    params = []
+    for row in rows:
+        emotion = emotions[row.diary_date]
+        params.append({
+            "title": row.title,
+            "content": row.content,
+            "image": row.image or "",
+            "thumbnail": thumbnails.get(row.image),
+            "state": row.state,
+            "diary_date": row.diary_date,
+            "user_id": user_id,
+            "created_at": now,
+            "version": 1,
+            "emotion": emotion,
+            "emotion_status": EMOTION_DONE if emotion else (EMOTION_PENDING if row.content else None),
+            "emotion_source": SOURCE_CLOVA if emotion else None,
+        })
+
+    try:
+        await session.exec(insert(Diary), params=params)
+    except IntegrityError as e:
+        await session.rollback()
+        if not is_duplicate_diary_date(e):
+            raise
+        if retry:
+            # 확인과 INSERT 사이에 같은 날짜 일기가 작성됨 → 다시 확인하고 한 번 더 시도
+            return await _insert_batch(session, user_id, batch, summary, retry=False)
+        # 앞 묶음은 이미 commit 됐으므로 409 로 끝내지 않고 충돌한 행만 건너뛴 요약을 돌려줌
+        if len(batch) == 1:
+            summary["skipped_duplicates"] += 1
+            return
+        for row in batch: # 충돌한 행을 찾기 위해 한 행씩 다시 저장
+            await _insert_batch(session, user_id, [row], summary, retry=False)
+        return
+
+    # executemany 는 생성된 id 를 돌려주지 않으므로 (user_id, diary_date) 유니크 인덱스로 다시 조회
+    ids = dict((await session.exec(
+        select(Diary.diary_date, Diary.id).where(Diary.user_id == user_id, Diary.diary_date.in_(dates))
+    )).all())
+    await index_new_diaries(session, [(ids[row.diary_date], row.title, row.content) for row in rows])
+    pending = [ids[row.diary_date] for row in rows if row.content and not emotions[row.diary_date]]
+    await enqueue_new_emotion_jobs(session, pending)
+    stat_delta = EmotionStatDelta()
+    for row in rows:
+        stat_delta.add(user_id, row.diary_date, emotions[row.diary_date])
+    await stat_delta.apply(session)
+    await session.commit()
+
+    summary["imported"] += len(rows)
+    summary["skipped_duplicates"] += len(batch) - len(rows)
+    summary["emotion_jobs"] += len(pending)
+    summary["public"] = summary["public"] or any(row.state for row in rows)
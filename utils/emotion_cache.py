@@ -0,0 +1,86 @@
+import hashlib
+import os
+import re
+import unicodedata
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database.upsert import upsert_statement
+from models.emotion_cache_model import EmotionCache
+from utils.cache import TTLCache
+
+EMOTION_CACHE_MEMORY_SIZE = int(os.getenv("EMOTION_CACHE_MEMORY_SIZE", "10000"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def content_hash(content: str) -> str:
+    """공백/유니코드 표기 차이를 무시한 내용 해시 (같은 문장이면 같은 키)"""
+    normalized = _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", content or "")).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# ───────────────────────────────────────
+# 감정 분석 결과 캐시
+#   - 1단계: 프로세스 내 LRU
+#   - 2단계: emotion_cache 테이블 (replica 간 공유, 재시작 후에도 유지)
+#   - Clova 결과만 저장 (로컬 분류기 결과는 나중에 재분석되어야 하므로 캐시하지 않음)
+# ───────────────────────────────────────
+class EmotionResultCache:
+    def __init__(self, maxsize: int = EMOTION_CACHE_MEMORY_SIZE):
+        self.memory = TTLCache(maxsize=maxsize)
+        self.db_hits = 0
+        self.db_misses = 0
+
+    async def get_many(self, session: AsyncSession, digests) -> dict[str, str]:
+        found = {}
+        missing = []
+        for digest in set(digests):
+            emotion = self.memory.get(digest)
+            if emotion is None:
+                missing.append(digest)
+            else:
+                found[digest] = emotion
+
+        if missing:
+            rows = (await session.exec(
+                select(EmotionCache.content_hash, EmotionCache.emotion)
+                .where(EmotionCache.content_hash.in_(missing))
+            )).all()
+            for digest, emotion in rows:
+                self.memory.set(digest, emotion)
+                found[digest] = emotion
+            self.db_hits += len(rows)
+            self.db_misses += len(missing) - len(rows)
+        return found
+
+    async def get(self, session: AsyncSession, digest: str) -> str | None:
+        return (await self.get_many(session, [digest])).get(digest)
+
+    async def put_many(self, session: AsyncSession, results: dict[str, str]) -> None:
+        """{해시: 감정} 저장 (호출 측에서 commit)"""
+        if not results:
+            return
+        await session.exec(upsert_statement(
+            session.bind.dialect.name,
+            EmotionCache,
+            [{"content_hash": digest, "emotion": emotion} for digest, emotion in results.items()],
+            ["content_hash"],
+            lambda new: {"emotion": new.emotion},
+        ))
+        for digest, emotion in results.items():
+            self.memory.set(digest, emotion)
+
+    def stats(self) -> dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + self.db_hits + self.db_misses
+        return {
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "hit_ratio": round((memory["hits"] + self.db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+emotion_cache = EmotionResultCache()
@@ -0,0 +1,55 @@
+import re
+import unicodedata
+
+# ───────────────────────────────────────
+# 로컬 감정 분류기 (Clova 장애/지연 시 대체용)
+#   - 감정별 어휘(어간)와 이모티콘이 본문에 몇 번 나오는지로 점수 계산
+#   - 한국어는 활용형이 다양하므로 단어 일치 대신 부분 문자열(문자 n-gram) 일치 사용
+#   - Clova 와 같은 다섯 가지 레이블만 반환
+# ───────────────────────────────────────
+POSITIVE = "긍정"
+NEGATIVE = "부정"
+NEUTRAL = "중립"
+SADNESS = "슬픔"
+SURPRISE = "놀람"
+
+EMOTION_LABELS = (POSITIVE, NEGATIVE, NEUTRAL, SADNESS, SURPRISE)
+
+LEXICON = {
+    POSITIVE: (
+        "좋", "행복", "기쁘", "기뻐", "신나", "신난", "즐거", "즐겁", "감사", "고마", "사랑",
+        "설레", "뿌듯", "만족", "최고", "재밌", "재미있", "웃", "편안", "맛있", "성공", "축하",
+        "ㅋㅋ", "ㅎㅎ", "^^", ":)",
+    ),
+    NEGATIVE: (
+        "짜증", "화나", "화가", "싫", "싫어", "열받", "빡치", "답답", "최악", "불안", "걱정",
+        "스트레스", "귀찮", "미워", "피곤", "힘들", "지겹", "실망", "억울", "후회",
+    ),
+    SADNESS: (
+        "슬프", "슬퍼", "슬픔", "눈물", "울었", "울고", "우울", "외로", "그립", "그리워",
+        "서운", "속상", "허전", "아프", "아파", "이별", "ㅠ", "ㅜ",
+    ),
+    SURPRISE: (
+        "놀라", "놀랐", "깜짝", "헐", "대박", "세상에", "어떻게", "믿을 수", "설마", "갑자기",
+        "?!", "!?",
+    ),
+}
+
+
+def classify_emotion_locally(content: str) -> str:
+    text = unicodedata.normalize("NFC", content or "").lower()
+    text = re.sub(r"\s+", " ", text)
+    scores = {
+        label: sum(text.count(word) for word in words)
+        for label, words in LEXICON.items()
+    }
+    label, score = max(scores.items(), key=lambda item: item[1])
+    return label if score > 0 else NEUTRAL
+
+
+def match_emotion_label(text: str) -> str | None:
+    """Clova 응답 문자열에서 다섯 가지 레이블 중 하나를 찾음"""
+    for label in EMOTION_LABELS:
+        if label in (text or ""):
+            return label
+    return None
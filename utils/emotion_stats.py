@@ -0,0 +1,237 @@
+"""
+사용자별 감정 통계 (diary_emotion_daily 집계 테이블)
+
+    python -m utils.emotion_stats backfill            # 기존 일기로 집계 다시 만들기
+    python -m utils.emotion_stats check [--repair]    # 집계와 전체 재계산 비교 (다르면 exit 1)
+
+--direct 를 주면 SSH 터널 없이 DATABASE_URL 로 바로 연결
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import delete, func, insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import connection
+from database.upsert import upsert_statement
+from models.diarys_model import Diary
+from models.emotion_stats_model import NO_EMOTION, DiaryEmotionDaily, EmotionDistribution, EmotionStats, EmotionStreak
+from models.users_model import User
+
+STATS_USER_BATCH = 500 # backfill/check 에서 한 트랜잭션에 처리하는 사용자 수
+
+
+# ───────────────────────────────────────
+# 증감 (일기 쓰기와 같은 트랜잭션에서 apply)
+#   - 트랜잭션 안에서 바뀐 (사용자, 날짜, 감정) 별 일기 수를 모아 upsert 한 번
+#   - 이전 감정은 일기 행을 잠근 상태 (FOR UPDATE) 에서 읽어야 동시 수정에도 정확
+# ───────────────────────────────────────
+class EmotionStatDelta:
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    def add(self, user_id: int | None, day: date, emotion: str | None, n: int = 1) -> None:
+        if user_id is not None:
+            self.counts[(user_id, day, emotion or NO_EMOTION)] += n
+
+    def remove(self, user_id: int | None, day: date, emotion: str | None, n: int = 1) -> None:
+        self.add(user_id, day, emotion, -n)
+
+    def move(self, user_id: int | None, day: date, old_emotion: str | None, new_emotion: str | None) -> None:
+        if (old_emotion or NO_EMOTION) != (new_emotion or NO_EMOTION):
+            self.remove(user_id, day, old_emotion)
+            self.add(user_id, day, new_emotion)
+
+    async def apply(self, session: AsyncSession) -> None:
+        """모은 증감을 반영 (호출 측에서 commit)"""
+        # 키 순서로 정렬해 여러 트랜잭션이 같은 행을 같은 순서로 잠그도록 (교착 방지)
+        rows = [
+            {"user_id": user_id, "day": day, "emotion": emotion, "count": n}
+            for (user_id, day, emotion), n in sorted(self.counts.items())
+            if n
+        ]
+        self.counts.clear()
+        if rows:
+            await session.exec(upsert_statement(
+                session.bind.dialect.name,
+                DiaryEmotionDaily,
+                rows,
+                ["user_id", "day", "emotion"],
+                lambda new: {"count": DiaryEmotionDaily.count + new.count},
+            ))
+
+
+# ───────────────────────────────────────
+# 조회 (일기 수가 아니라 기간 안의 (날짜, 감정) 행 수에 비례)
+# ───────────────────────────────────────
+def _period_bounds(day: date) -> dict[str, tuple[date, date]]:
+    week_start = day - timedelta(days=day.weekday()) # 월요일 시작
+    month_start = day.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return {
+        "week": (week_start, week_start + timedelta(days=6)),
+        "month": (month_start, next_month - timedelta(days=1)),
+        "year": (date(day.year, 1, 1), date(day.year, 12, 31)),
+    }
+
+
+def _streaks(days: list[date], reference: date) -> EmotionStreak:
+    longest = run = 0
+    previous = None
+    current = 0
+    for day in days:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        if day <= reference:
+            # 기준일 또는 전날에 끝나는 연속 구간만 "현재" (오늘 아직 안 썼어도 이어지는 중)
+            current = run if day >= reference - timedelta(days=1) else 0
+        previous = day
+    return EmotionStreak(current=current, longest=longest)
+
+
+async def emotion_stats(session: AsyncSession, user_id: int, reference: date) -> EmotionStats:
+    bounds = _period_bounds(reference)
+    low = min(start for start, _ in bounds.values())
+    high = max(end for _, end in bounds.values())
+    rows = (await session.exec(
+        select(DiaryEmotionDaily.day, DiaryEmotionDaily.emotion, DiaryEmotionDaily.count)
+        .where(
+            DiaryEmotionDaily.user_id == user_id,
+            DiaryEmotionDaily.day >= low,
+            DiaryEmotionDaily.day <= high,
+            DiaryEmotionDaily.count > 0,
+        )
+    )).all()
+
+    distributions = {}
+    for period, (start, end) in bounds.items():
+        emotions: Counter = Counter()
+        for day, emotion, count in rows:
+            if start <= day <= end:
+                emotions[emotion] += count
+        unanalyzed = emotions.pop(NO_EMOTION, 0)
+        distributions[period] = EmotionDistribution(
+            start=start,
+            end=end,
+            total=sum(emotions.values()) + unanalyzed,
+            emotions=dict(emotions.most_common()),
+            unanalyzed=unanalyzed,
+        )
+
+    days = (await session.exec(
+        select(DiaryEmotionDaily.day)
+        .where(DiaryEmotionDaily.user_id == user_id, DiaryEmotionDaily.count > 0)
+        .distinct()
+        .order_by(DiaryEmotionDaily.day)
+    )).all()
+    return EmotionStats(date=reference, streak=_streaks(days, reference), **distributions)
+
+
+# ───────────────────────────────────────
+# 재계산 / 일관성 확인 (사용자 묶음 단위)
+# ───────────────────────────────────────
+def _recount_statement(user_ids: list[int]):
+    emotion = func.coalesce(Diary.emotion, NO_EMOTION)
+    return (
+        select(Diary.user_id, Diary.diary_date, emotion, func.count())
+        .where(Diary.user_id.in_(user_ids))
+        .group_by(Diary.user_id, Diary.diary_date, emotion)
+    )
+
+
+async def rebuild_user_stats(session: AsyncSession, user_ids: list[int]) -> None:
+    """사용자들의 집계를 diary 에서 다시 계산 (호출 측에서 commit)"""
+    await session.exec(delete(DiaryEmotionDaily).where(DiaryEmotionDaily.user_id.in_(user_ids)))
+    await session.exec(insert(DiaryEmotionDaily).from_select(
+        ["user_id", "day", "emotion", "count"], _recount_statement(user_ids),
+    ))
+
+
+async def check_user_stats(session: AsyncSession, user_ids: list[int]) -> list[dict]:
+    """집계와 전체 재계산이 다른 (사용자, 날짜, 감정) 목록"""
+    # 같은 트랜잭션의 두 SELECT 는 같은 스냅샷을 봄 (InnoDB REPEATABLE READ)
+    expected = {
+        (user_id, day, emotion): count
+        for user_id, day, emotion, count in await session.exec(_recount_statement(user_ids))
+    }
+    actual = {
+        (user_id, day, emotion): count
+        for user_id, day, emotion, count in await session.exec(
+            select(DiaryEmotionDaily.user_id, DiaryEmotionDaily.day, DiaryEmotionDaily.emotion, DiaryEmotionDaily.count)
+            .where(DiaryEmotionDaily.user_id.in_(user_ids), DiaryEmotionDaily.count != 0)
+        )
+    }
+    return [
+        {"user_id": key[0], "day": key[1], "emotion": key[2],
+         "expected": expected.get(key, 0), "actual": actual.get(key, 0)}
+        for key in sorted(expected.keys() | actual.keys())
+        if expected.get(key, 0) != actual.get(key, 0)
+    ]
+
+
+async def _run(command: str, repair: bool) -> int:
+    rebuilt = checked = 0
+    mismatched_users = set()
+    try:
+        async with AsyncSession(connection.async_engine) as session:
+            last_id = 0
+            while True:
+                user_ids = (await session.exec(
+                    select(User.id).where(User.id > last_id).order_by(User.id).limit(STATS_USER_BATCH)
+                )).all()
+                if not user_ids:
+                    break
+                last_id = user_ids[-1]
+
+                if command == "backfill":
+                    await rebuild_user_stats(session, user_ids)
+                    await session.commit()
+                    rebuilt += len(user_ids)
+                    continue
+
+                mismatches = await check_user_stats(session, user_ids)
+                await session.commit()
+                checked += len(user_ids)
+                for mismatch in mismatches:
+                    print(f"불일치: {mismatch}")
+                users = sorted({mismatch["user_id"] for mismatch in mismatches})
+                mismatched_users.update(users)
+                if repair and users:
+                    await rebuild_user_stats(session, users)
+                    await session.commit()
+                    rebuilt += len(users)
+    finally:
+        await connection.dispose_async_engine()
+
+    if command == "backfill":
+        print(f"집계 재계산 완료: 사용자 {rebuilt}명")
+        return 0
+    print(f"확인한 사용자 {checked}명, 불일치 사용자 {len(mismatched_users)}명" + (f", 재계산 {rebuilt}명" if repair else ""))
+    return 1 if mismatched_users and not repair else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.emotion_stats", description="감정 통계 집계 관리")
+    parser.add_argument("command", choices=["backfill", "check"])
+    parser.add_argument("--repair", action="store_true", help="check: 불일치 사용자의 집계를 다시 계산")
+    parser.add_argument("--direct", action="store_true", help="SSH 터널 없이 DATABASE_URL 로 바로 연결")
+    args = parser.parse_args(argv)
+
+    if args.direct:
+        connection.connect_database(connection.settings.DATABASE_URL)
+    else:
+        connection.start_ssh_tunnel_and_connect()
+    connection.engine_url.echo = False
+    try:
+        return asyncio.run(_run(args.command, args.repair))
+    finally:
+        connection.stop_ssh_tunnel()
+
+
+if __name__ == "__main__":
+    import models # noqa: F401 (모든 테이블/관계 등록)
+    sys.exit(main())
@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import connection
+from models.diarys_model import Diary, korea_now
+from models.emotion_job_model import EmotionJob, JOB_FAILED, JOB_PENDING, JOB_RUNNING
+from utils.circuit_breaker import OPEN
+from utils.clova import SOURCE_CLOVA, SOURCE_LOCAL, analyze_emotion_with_fallback, clova_breaker
+from utils.emotion_cache import content_hash, emotion_cache
+from utils.emotion_stats import EmotionStatDelta
+from utils.response_cache import invalidate_diary_views
+
+logger = logging.getLogger("uvicorn.error")
+
+# 일기 감정 분석 상태 (Diary.emotion_status)
+EMOTION_PENDING = "pending"
+EMOTION_DONE = "done"
+EMOTION_FAILED = "failed"
+
+EMOTION_WORKER_CONCURRENCY = int(os.getenv("EMOTION_WORKER_CONCURRENCY", "4")) # 동시 Clova 호출 수
+EMOTION_WORKER_BATCH_SIZE = int(os.getenv("EMOTION_WORKER_BATCH_SIZE", "16")) # 한 번에 가져오는 작업 수
+EMOTION_WORKER_POLL_INTERVAL = float(os.getenv("EMOTION_WORKER_POLL_INTERVAL", "2")) # 초
+EMOTION_JOB_LEASE = timedelta(seconds=120) # running 작업을 다른 워커가 가져가기 전 대기 시간
+EMOTION_JOB_MAX_ATTEMPTS = 5
+EMOTION_UPGRADE_INTERVAL = 60.0 # 초, 로컬 분류기 결과를 Clova 로 재분석할 대상 탐색 주기
+
+
+# ───────────────────────────────────────
+# 작업 등록/정리 (일기 쓰기와 같은 트랜잭션에서 호출)
+# ───────────────────────────────────────
+async def enqueue_emotion_job(session: AsyncSession, diary: Diary) -> None:
+    """diary 를 분석 대기 상태로 만들고 작업 등록 (호출 측에서 commit 후 emotion_worker.notify())"""
+    # 아직 시작하지 않았거나 실패한 이전 작업은 새 작업으로 대체
+    await session.exec(
+        delete(EmotionJob).where(
+            EmotionJob.diary_id == diary.id,
+            EmotionJob.status.in_([JOB_PENDING, JOB_FAILED]),
+        )
+    )
+    diary.emotion_status = EMOTION_PENDING
+    session.add(diary)
+    session.add(EmotionJob(diary_id=diary.id))
+
+
+async def enqueue_new_emotion_jobs(session: AsyncSession, diary_ids) -> None:
+    """새로 추가된 (pending 상태로 INSERT 된) 일기 묶음의 작업 등록"""
+    now = korea_now()
+    rows = [
+        {"diary_id": diary_id, "status": JOB_PENDING, "attempts": 0, "available_at": now, "created_at": now}
+        for diary_id in diary_ids
+    ]
+    if rows:
+        await session.exec(insert(EmotionJob), params=rows)
+
+
+async def remove_emotion_jobs(session: AsyncSession, *diary_ids: int) -> None:
+    if diary_ids:
+        await session.exec(delete(EmotionJob).where(EmotionJob.diary_id.in_(diary_ids)))
+
+
+# ───────────────────────────────────────
+# 워커 풀
+#   - DB 큐에서 처리 가능한 작업을 묶음으로 가져와(lease) 제한된 동시성으로 분석
+#   - 결과는 묶음 단위로 한 트랜잭션에 기록
+#   - 같은 프로세스의 쓰기는 notify()로 즉시 깨우고, 다른 replica 의 작업은 polling 으로 처리
+# ───────────────────────────────────────
+class EmotionWorkerPool:
+    def __init__(self, concurrency: int = EMOTION_WORKER_CONCURRENCY,
+                 batch_size: int = EMOTION_WORKER_BATCH_SIZE,
+                 poll_interval: float = EMOTION_WORKER_POLL_INTERVAL):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_upgrade_scan = 0.0
+
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.upgrades_enqueued = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                logger.exception(f"감정 분석 워커 오류: {e}")
+                handled = 0
+            if handled:
+                continue
+            try:
+                await self._enqueue_upgrades()
+            except Exception as e:
+                logger.exception(f"감정 재분석 대상 등록 실패: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """처리 가능한 작업 한 묶음을 처리하고 처리한 작업 수를 반환"""
+        async with AsyncSession(connection.async_engine, expire_on_commit=False) as session:
+            jobs, contents, owners, exhausted = await self._claim(session)
+            if exhausted:
+                await invalidate_diary_views(user_ids=exhausted)
+            if not jobs:
+                return len(exhausted)
+
+            # 같은 내용이 이미 분석된 적 있으면 캐시 결과 사용
+            digests = {diary_id: content_hash(content) for diary_id, content in contents.items()}
+            cached = await emotion_cache.get_many(session, digests.values())
+            await session.commit()
+
+            # 분석하는 동안에는 트랜잭션/커넥션을 잡고 있지 않음
+            # 같은 일기(또는 같은 내용)에 대한 작업이 여러 개면 한 번만 분석
+            to_analyze = {
+                digests[diary_id]: content
+                for diary_id, content in contents.items()
+                if content and digests[diary_id] not in cached
+            }
+            analyzed = dict(zip(to_analyze, await asyncio.gather(
+                *(self._analyze(content) for content in to_analyze.values()),
+                return_exceptions=True,
+            )))
+
+            results = {}
+            for diary_id, content in contents.items():
+                digest = digests[diary_id]
+                if digest in cached:
+                    results[diary_id] = (cached[digest], SOURCE_CLOVA)
+                else:
+                    results[diary_id] = analyzed.get(digest, (None, None))
+
+            await self._write_results(session, jobs, contents, results)
+            await emotion_cache.put_many(session, {
+                digest: result[0] for digest, result in analyzed.items()
+                if not isinstance(result, Exception) and result[1] == SOURCE_CLOVA
+            })
+            await session.commit()
+            # 목록/공개 피드/캘린더에 감정 결과가 보이므로 캐시된 응답과 ETag 무효화
+            await invalidate_diary_views(user_ids=[owners[job.diary_id] for job in jobs if job.diary_id in owners])
+            return len(jobs) + len(exhausted)
+
+    async def _claim(self, session: AsyncSession) -> tuple[list[EmotionJob], dict[int, str], dict[int, int], list[int]]:
+        """처리할 작업을 lease 로 가져옴 → (작업, 일기 내용, 일기 작성자, 실패 처리한 작업의 작성자)"""
+        now = korea_now()
+        statement = (
+            select(EmotionJob)
+            .where(
+                EmotionJob.status.in_([JOB_PENDING, JOB_RUNNING]),
+                EmotionJob.available_at <= now,
+            )
+            .order_by(EmotionJob.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True) # 여러 replica 가 같은 작업을 가져가지 않도록 (MySQL)
+        )
+        jobs, expired = [], []
+        for job in (await session.exec(statement)).all():
+            # lease 가 만료된 running 작업 = 처리 중 워커가 죽음 (재배포/OOM 등)
+            # 같은 일기가 워커를 계속 죽이는 경우 무한히 다시 가져가지 않도록 시도 횟수 제한
+            if job.status == JOB_RUNNING and job.attempts >= EMOTION_JOB_MAX_ATTEMPTS:
+                job.status = JOB_FAILED
+                job.last_error = "lease 만료 (처리 중 워커 중단)"
+                expired.append(job)
+            else:
+                job.status = JOB_RUNNING
+                job.attempts += 1
+                job.available_at = now + EMOTION_JOB_LEASE
+                jobs.append(job)
+            session.add(job)
+
+        contents, owners = {}, {}
+        if jobs or expired:
+            for diary_id, content, user_id in await session.exec(
+                select(Diary.id, Diary.content, Diary.user_id)
+                .where(Diary.id.in_({job.diary_id for job in jobs + expired}))
+            ):
+                contents[diary_id] = content
+                owners[diary_id] = user_id
+
+        exhausted = []
+        for job in expired:
+            if job.diary_id in contents:
+                await self._update_diary(session, EmotionStatDelta(), job.diary_id, contents[job.diary_id],
+                                         emotion_status=EMOTION_FAILED)
+                exhausted.append(owners[job.diary_id])
+                self.failed += 1
+            else: # 일기가 삭제됨
+                await session.delete(job)
+        # 같은 일기의 새 작업이 함께 가져와졌을 수 있으므로 분석 대상은 가져간 작업의 일기만
+        claimed = {job.diary_id for job in jobs}
+        contents = {diary_id: content for diary_id, content in contents.items() if diary_id in claimed}
+        await session.commit()
+        return jobs, contents, owners, exhausted
+
+    async def _analyze(self, content: str) -> tuple[str, str]:
+        async with self._semaphore:
+            # 지연 예산을 넘기거나 서킷이 열려 있으면 로컬 분류기 결과가 반환됨
+            return await analyze_emotion_with_fallback(content)
+
+    async def _write_results(self, session: AsyncSession, jobs, contents: dict, results: dict):
+        now = korea_now()
+        stat_delta = EmotionStatDelta()
+        for job in jobs:
+            if job.diary_id not in contents: # 분석 중 일기가 삭제됨
+                await session.delete(job)
+                continue
+
+            result = results[job.diary_id]
+            if isinstance(result, Exception):
+                job.last_error = str(result)[:255]
+                if job.attempts >= EMOTION_JOB_MAX_ATTEMPTS:
+                    job.status = JOB_FAILED
+                    self.failed += 1
+                    await self._update_diary(session, stat_delta, job.diary_id, contents[job.diary_id],
+                                             emotion_status=EMOTION_FAILED)
+                else:
+                    job.status = JOB_PENDING
+                    job.available_at = now + timedelta(seconds=2 ** job.attempts)
+                    self.retried += 1
+                session.add(job)
+                continue
+
+            emotion, source = result
+            await self._update_diary(session, stat_delta, job.diary_id, contents[job.diary_id],
+                                     emotion=emotion, emotion_status=EMOTION_DONE,
+                                     emotion_source=source)
+            await session.delete(job)
+            self.processed += 1
+        await stat_delta.apply(session)
+
+    async def _update_diary(self, session: AsyncSession, stat_delta: EmotionStatDelta,
+                            diary_id: int, content: str, **values):
+        # 분석하는 동안 내용이 바뀌었다면 새 작업이 결과를 기록하므로 덮어쓰지 않음
+        # 감정 통계 증감을 위해 이전 감정을 행을 잠근 채로 읽음
+        row = (await session.exec(
+            select(Diary.user_id, Diary.diary_date, Diary.emotion)
+            .where(Diary.id == diary_id, Diary.content == content)
+            .with_for_update()
+        )).first()
+        if row is None:
+            return
+        await session.exec(
+            update(Diary)
+            .where(Diary.id == diary_id)
+            .values(**values, version=Diary.version + 1)
+        )
+        if "emotion" in values:
+            stat_delta.move(row.user_id, row.diary_date, row.emotion, values["emotion"])
+
+    async def _enqueue_upgrades(self):
+        """서킷이 열려 있지 않을 때 로컬 분류기로 저장된 결과를 재분석 작업으로 등록"""
+        now = asyncio.get_running_loop().time()
+        if now - self._last_upgrade_scan < EMOTION_UPGRADE_INTERVAL or clova_breaker.state == OPEN:
+            return
+        self._last_upgrade_scan = now
+
+        async with AsyncSession(connection.async_engine) as session:
+            diary_ids = (await session.exec(
+                select(Diary.id)
+                .where(
+                    Diary.emotion_source == SOURCE_LOCAL,
+                    Diary.id.not_in(select(EmotionJob.diary_id)),
+                )
+                .limit(self.batch_size)
+            )).all()
+            if not diary_ids:
+                return
+            # emotion_status 는 done 으로 유지 (기존 결과를 보여주다가 조용히 교체)
+            await session.exec(insert(EmotionJob), params=[
+                {"diary_id": diary_id, "status": JOB_PENDING, "attempts": 0,
+                 "available_at": korea_now(), "created_at": korea_now()}
+                for diary_id in diary_ids
+            ])
+            await session.commit()
+            self.upgrades_enqueued += len(diary_ids)
+            self.notify()
+
+    async def stats(self, session: AsyncSession) -> dict:
+        backlog = dict((await session.exec(
+            select(EmotionJob.status, func.count()).group_by(EmotionJob.status)
+        )).all())
+        return {
+            "concurrency": self.concurrency,
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "upgrades_enqueued": self.upgrades_enqueued,
+            "clova_breaker": clova_breaker.stats(),
+            "queue": backlog,
+        }
+
+
+emotion_worker = EmotionWorkerPool()
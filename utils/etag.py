@@ -0,0 +1,43 @@
+import hashlib
+
+from fastapi import Response, status
+
+# ───────────────────────────────────────
+# ETag / 조건부 GET (If-None-Match → 304)
+#   - 본문을 해시하지 않고 버전 값으로 ETag 를 만들어 조회 전에 비교
+# ───────────────────────────────────────
+PRIVATE_CACHE_CONTROL = "private, no-cache" # 매번 재검증, 공유 캐시에는 저장하지 않음
+PUBLIC_CACHE_CONTROL = "no-cache"
+
+
+def diary_etag(diary_id: int, version: int) -> str:
+    # 응답 압축(Content-Encoding)에 따라 바이트가 달라지므로 weak ETag
+    return f'W/"d{diary_id}-{version}"'
+
+
+def list_etag(version: str, *parts) -> str:
+    """목록 버전 ("{epoch}.{카운터}") + 요청 조건(보는 사람, 필터, 커서 등)으로 만든 weak ETag"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+    return f'W/"l{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match 는 weak 비교 (W/ 접두사 무시), 여러 값 또는 * 가능
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str, cache_control: str = PRIVATE_CACHE_CONTROL) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def set_etag(response: Response, etag: str, cache_control: str = PRIVATE_CACHE_CONTROL) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -0,0 +1,50 @@
+from fastapi import HTTPException, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.diarys_model import Diary
+from utils.s3 import is_user_upload, owned_object_key, uploaded_object_url
+
+
+# ───────────────────────────────────────
+# 일기 이미지 소유 확인 (작성/수정/가져오기/업로드 완료 알림)
+#   - 다른 사용자의 객체 키를 일기에 연결하면 그 일기를 지울 때 남의 객체가 정리 대상이 되므로 거절
+#   - 새 업로드 키는 업로더 접두사로 확인 (DB 조회 없음)
+#   - 접두사가 없는 이전 키는 본인 일기가 이미 참조하고 있을 때만 허용 (내보낸 일기 다시 가져오기 등)
+# ───────────────────────────────────────
+async def referenced_object_keys(session: AsyncSession, keys, user_id: int | None = None) -> set[str]:
+    """일기가 참조하고 있는 객체 키 (user_id 가 있으면 그 사용자의 일기만)"""
+    images = {}
+    for key in keys:
+        # Diary.image 는 키 또는 서버 업로드 URL
+        images[key] = key
+        images[uploaded_object_url(key)] = key
+    if not images:
+        return set()
+    statement = select(Diary.image).where(Diary.image.in_(list(images))).distinct()
+    if user_id is not None:
+        statement = statement.where(Diary.user_id == user_id)
+    return {images[image] for image in (await session.exec(statement)).all()}
+
+
+async def foreign_images(session: AsyncSession, user_id: int, images) -> set[str]:
+    """user_id 가 일기에 연결할 수 없는 Diary.image 값 (다른 곳의 URL, 다른 사용자의 업로드)"""
+    foreign, legacy = set(), {}
+    for image in set(images):
+        if not image:
+            continue
+        key = owned_object_key(image)
+        if key is None:
+            # 다른 호스트 URL 도 경로가 이 버킷 키로 서명되므로 (image_download_urls) 받지 않음
+            foreign.add(image)
+        elif not is_user_upload(key, user_id):
+            legacy[image] = key
+    if legacy:
+        referenced = await referenced_object_keys(session, legacy.values(), user_id=user_id)
+        foreign |= {image for image, key in legacy.items() if key not in referenced}
+    return foreign
+
+
+async def ensure_image_owner(session: AsyncSession, user_id: int, images) -> None:
+    if await foreign_images(session, user_id, images):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="본인이 업로드한 이미지만 사용할 수 있습니다.")
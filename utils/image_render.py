@@ -0,0 +1,35 @@
+import io
+
+from PIL import Image, ImageOps
+
+# ───────────────────────────────────────
+# 썸네일 렌더링 (프로세스 풀에서 실행)
+#   - 자식 프로세스가 이 모듈만 import 하도록 앱 설정/DB/boto 를 import 하지 않음
+# ───────────────────────────────────────
+MAX_SOURCE_PIXELS = 50_000_000 # 이보다 큰 이미지는 거부 (decompression bomb)
+Image.MAX_IMAGE_PIXELS = MAX_SOURCE_PIXELS
+
+
+def render_webp_thumbnails(data: bytes, widths: tuple[int, ...], quality: int) -> dict[int, bytes]:
+    """원본 바이트 → {너비: WebP 바이트} (원본보다 큰 너비는 원본 크기로)"""
+    with Image.open(io.BytesIO(data)) as source:
+        if source.width * source.height > MAX_SOURCE_PIXELS:
+            raise Image.DecompressionBombError(f"이미지가 너무 큽니다: {source.width}x{source.height}")
+        # JPEG 는 필요한 크기에 가깝게 축소 디코딩 (가장 큰 썸네일보다 작아지지 않는 범위)
+        largest = max(widths)
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        renditions = {}
+        # 큰 너비부터 만들고 작은 너비는 직전 결과에서 줄여 리샘플링 비용을 줄임
+        for width in sorted(set(widths), reverse=True):
+            target = min(width, image.width)
+            if target != image.width:
+                height = max(1, round(image.height * target / image.width))
+                image = image.resize((target, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            buffer = io.BytesIO()
+            image.save(buffer, "WEBP", quality=quality, method=4)
+            renditions[width] = buffer.getvalue()
+        return renditions
@@ -0,0 +1,27 @@
+from typing import AsyncIterator, Callable
+
+import orjson
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import connection
+
+JSON_STREAM_FETCH_SIZE = 500 # server-side cursor 에서 한 번에 가져오는 행 수
+
+
+# ───────────────────────────────────────
+# JSON 배열 스트리밍
+#   - SELECT 결과를 DB 커서에서 묶음씩 읽어 바로 인코딩/전송 → 전체 목록을 메모리에 올리지 않음
+#   - 응답을 보내는 동안 쓰는 세션이므로 요청 의존성 세션과 별개로 엶
+# ───────────────────────────────────────
+async def stream_json_array(statement, transform: Callable[[list], list[dict]]) -> AsyncIterator[bytes]:
+    """transform: 행 묶음 → 응답 dict 목록"""
+    async with AsyncSession(connection.async_engine) as session:
+        result = await session.stream(statement.execution_options(yield_per=JSON_STREAM_FETCH_SIZE))
+        separator = b"["
+        async for rows in result.partitions():
+            items = transform(rows)
+            if not items:
+                continue
+            yield separator + b",".join(orjson.dumps(item) for item in items)
+            separator = b","
+        yield b"]" if separator == b"," else b"[]"
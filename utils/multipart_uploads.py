@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import connection
+from models.diarys_model import korea_now
+from models.multipart_upload_model import MultipartPartUrl, MultipartUpload, MultipartUploadedPart, MultipartUploadStatus
+from utils.s3 import (
+    S3_MULTIPART_MAX_BYTES, S3_UPLOAD_CONTENT_TYPES, abort_multipart_upload, complete_multipart_upload,
+    create_multipart_upload, list_multipart_uploads, list_uploaded_parts, multipart_part_size,
+    new_upload_key, presign_upload_part_urls,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+S3_MULTIPART_UPLOAD_TTL = timedelta(seconds=int(os.getenv("S3_MULTIPART_UPLOAD_TTL", str(24 * 3600)))) # 시작 후 이 시간이 지나면 중단
+S3_MULTIPART_JANITOR_INTERVAL = float(os.getenv("S3_MULTIPART_JANITOR_INTERVAL", "60")) # 초
+S3_MULTIPART_SWEEP_INTERVAL = float(os.getenv("S3_MULTIPART_SWEEP_INTERVAL", "3600")) # 버킷 전체 확인 주기 (초)
+S3_MULTIPART_JANITOR_BATCH = 100
+S3_MULTIPART_RETRY = timedelta(seconds=600) # 중단 실패 시 다시 시도하기 전 대기 시간
+
+
+# ───────────────────────────────────────
+# 클라이언트 직접 multipart 업로드
+#   - 시작: S3 업로드를 만들고 모든 part 의 PUT URL 을 한 번에 발급 (클라이언트가 동시에 올림)
+#   - 실패한 part 는 상태 조회로 빠진 번호를 확인하고 그 part 의 URL 만 다시 받아 올림
+#   - 완료: ListParts 로 모든 part 가 올라왔는지 확인한 뒤 S3 에서 합침
+#   - 정리: 만료된 업로드를 중단 (S3 는 중단/완료 전까지 올라간 part 를 저장 비용으로 계속 청구)
+# ───────────────────────────────────────
+class MultipartUploads:
+    def __init__(self, poll_interval: float = S3_MULTIPART_JANITOR_INTERVAL,
+                 sweep_interval: float = S3_MULTIPART_SWEEP_INTERVAL):
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self._task: asyncio.Task | None = None
+        self._next_sweep = 0.0
+
+        self.started = 0
+        self.completed = 0
+        self.aborted = 0
+        self.expired = 0
+        self.swept = 0
+        self.bytes_completed = 0
+
+    # ─── API ───
+    async def begin(self, session: AsyncSession, user_id: int, content_type: str, size: int) -> MultipartUploadStatus:
+        """업로드 시작 → 전체 part URL (호출 측에서 commit)"""
+        content_type = content_type.split(";")[0].strip().lower()
+        if content_type not in S3_UPLOAD_CONTENT_TYPES:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="지원하지 않는 이미지 형식입니다.")
+        if size > S3_MULTIPART_MAX_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="이미지가 너무 큽니다.")
+
+        key = new_upload_key(user_id, S3_UPLOAD_CONTENT_TYPES[content_type])
+        part_size, part_count = multipart_part_size(size)
+        try:
+            upload_id = await asyncio.to_thread(create_multipart_upload, key, content_type)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"업로드 시작 실패: {str(e)}")
+
+        now = korea_now()
+        upload = MultipartUpload(
+            object_key=key, upload_id=upload_id, user_id=user_id, content_type=content_type, size=size,
+            part_size=part_size, part_count=part_count, created_at=now, expires_at=now + S3_MULTIPART_UPLOAD_TTL,
+        )
+        session.add(upload)
+        await session.flush()
+        self.started += 1
+        return self._status(upload, {}, range(1, part_count + 1))
+
+    async def get(self, session: AsyncSession, user_id: int, key: str, for_update: bool = False) -> MultipartUpload:
+        statement = select(MultipartUpload).where(MultipartUpload.object_key == key, MultipartUpload.user_id == user_id)
+        if for_update:
+            statement = statement.with_for_update()
+        upload = (await session.exec(statement)).first()
+        if upload is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="진행 중인 업로드를 찾을 수 없습니다.")
+        return upload
+
+    async def status(self, session: AsyncSession, upload: MultipartUpload) -> MultipartUploadStatus:
+        """올라간 part 와 빠진 part 번호 (URL 은 part_urls 로 따로 발급)"""
+        parts = await self._uploaded_parts(session, upload)
+        return self._status(upload, parts, ())
+
+    def part_urls(self, upload: MultipartUpload, part_numbers: list[int]) -> list[MultipartPartUrl]:
+        invalid = [number for number in part_numbers if not 1 <= number <= upload.part_count]
+        if invalid:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"잘못된 part 번호입니다: {invalid}")
+        urls = presign_upload_part_urls(upload.object_key, upload.upload_id, sorted(set(part_numbers)))
+        return [MultipartPartUrl(part_number=number, url=url) for number, url in urls.items()]
+
+    async def complete(self, session: AsyncSession, upload: MultipartUpload) -> int:
+        """모든 part 가 올라왔으면 합치고 행 삭제 → 파일 크기 (호출 측에서 commit, upload 는 FOR UPDATE 로 읽은 행)"""
+        parts = await self._uploaded_parts(session, upload)
+        missing = [number for number in range(1, upload.part_count + 1) if number not in parts]
+        if missing:
+            # 클라이언트는 빠진 part 만 다시 올린 뒤 다시 완료 요청
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "아직 올라오지 않은 part 가 있습니다.", "missing": missing},
+            )
+        # 시작할 때 알린 크기와 다른 파일이 되지 않도록 part 크기 확인 (마지막 part 는 남은 크기)
+        last_size = upload.size - (upload.part_count - 1) * upload.part_size
+        wrong = [
+            number for number in range(1, upload.part_count + 1)
+            if parts[number]["Size"] != (last_size if number == upload.part_count else upload.part_size)
+        ]
+        if wrong:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"message": "part 크기가 올바르지 않습니다. 해당 part 를 다시 올려 주세요.", "parts": wrong},
+            )
+
+        # part_count 보다 큰 번호로 올라간 part 는 합치지 않음 (중단/완료 시 S3 가 함께 삭제)
+        parts = {number: parts[number] for number in range(1, upload.part_count + 1)}
+        try:
+            await asyncio.to_thread(complete_multipart_upload, upload.object_key, upload.upload_id, parts)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"업로드 완료 실패: {str(e)}")
+        await session.delete(upload)
+        size = sum(part["Size"] for part in parts.values())
+        self.completed += 1
+        self.bytes_completed += size
+        return size
+
+    async def abort(self, session: AsyncSession, upload: MultipartUpload) -> None:
+        """S3 업로드 중단 후 행 삭제 (호출 측에서 commit)"""
+        try:
+            await asyncio.to_thread(abort_multipart_upload, upload.object_key, upload.upload_id)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"업로드 중단 실패: {str(e)}")
+        await session.delete(upload)
+        self.aborted += 1
+
+    async def _uploaded_parts(self, session: AsyncSession, upload: MultipartUpload) -> dict[int, dict]:
+        try:
+            parts = await asyncio.to_thread(list_uploaded_parts, upload.object_key, upload.upload_id)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"업로드 상태 확인 실패: {str(e)}")
+        if parts is None:
+            # S3 에서 이미 중단된 업로드 (lifecycle 규칙 등) → 행도 정리
+            await session.delete(upload)
+            await session.commit()
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="만료되었거나 중단된 업로드입니다. 다시 시작해 주세요.")
+        return parts
+
+    def _status(self, upload: MultipartUpload, parts: dict[int, dict], url_parts) -> MultipartUploadStatus:
+        return MultipartUploadStatus(
+            key=upload.object_key,
+            part_size=upload.part_size,
+            part_count=upload.part_count,
+            expires_at=upload.expires_at,
+            uploaded=[
+                MultipartUploadedPart(part_number=number, size=part["Size"], etag=part["ETag"])
+                for number, part in sorted(parts.items())
+            ],
+            missing=[number for number in range(1, upload.part_count + 1) if number not in parts],
+            urls=self.part_urls(upload, list(url_parts)) if url_parts else [],
+        )
+
+    # ─── 정리 워커 ───
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                logger.exception(f"multipart 업로드 정리 오류: {e}")
+                handled = 0
+            if not handled:
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self) -> int:
+        """만료된 업로드 한 묶음을 중단하고 처리한 수를 반환 (주기마다 버킷 전체도 확인)"""
+        handled = await self._abort_expired()
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + self.sweep_interval
+            handled += await self._sweep_bucket()
+        return handled
+
+    async def _abort_expired(self) -> int:
+        async with AsyncSession(connection.async_engine, expire_on_commit=False) as session:
+            now = korea_now()
+            uploads = (await session.exec(
+                select(MultipartUpload)
+                .where(MultipartUpload.expires_at <= now)
+                .order_by(MultipartUpload.expires_at)
+                .limit(S3_MULTIPART_JANITOR_BATCH)
+                .with_for_update(skip_locked=True) # 여러 replica 가 같은 업로드를 가져가지 않도록 (MySQL)
+            )).all()
+            if not uploads:
+                return 0
+            for upload in uploads:
+                upload.expires_at = now + S3_MULTIPART_RETRY # 처리 중 lease
+                session.add(upload)
+            await session.commit()
+
+            # S3 호출 동안에는 트랜잭션/커넥션을 잡고 있지 않음
+            results = await asyncio.gather(
+                *(asyncio.to_thread(abort_multipart_upload, upload.object_key, upload.upload_id) for upload in uploads),
+                return_exceptions=True,
+            )
+            done_ids = [upload.id for upload, result in zip(uploads, results) if not isinstance(result, Exception)]
+            if done_ids:
+                await session.exec(delete(MultipartUpload).where(MultipartUpload.id.in_(done_ids)))
+            for upload, result in zip(uploads, results):
+                if isinstance(result, Exception):
+                    upload.last_error = str(result)[:255] or type(result).__name__
+                    session.add(upload)
+            await session.commit()
+            self.expired += len(done_ids)
+            return len(uploads)
+
+    async def _sweep_bucket(self) -> int:
+        # 행 없이 남은 업로드 (업로드 생성 후 commit 전에 실패, 서버 경유 업로드의 중단 실패 등)
+        # 행이 있는 업로드는 그보다 먼저 만료되므로 TTL 이 지난 업로드는 모두 중단해도 됨
+        initiated_before = datetime.now(timezone.utc) - S3_MULTIPART_UPLOAD_TTL
+        uploads = await asyncio.to_thread(list_multipart_uploads, initiated_before)
+        for key, upload_id in uploads:
+            try:
+                await asyncio.to_thread(abort_multipart_upload, key, upload_id)
+                self.swept += 1
+            except Exception as e:
+                logger.warning(f"multipart 업로드 중단 실패 ({key}): {e}")
+        return len(uploads)
+
+    async def stats(self, session: AsyncSession) -> dict:
+        in_progress = (await session.exec(select(func.count()).select_from(MultipartUpload))).one()
+        return {
+            "started": self.started,
+            "completed": self.completed,
+            "aborted": self.aborted,
+            "expired": self.expired,
+            "swept": self.swept,
+            "bytes_completed": self.bytes_completed,
+            "in_progress": in_progress,
+        }
+
+
+multipart_uploads = MultipartUploads()
@@ -0,0 +1,38 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+# ───────────────────────────────────────
+# 키셋(커서) 페이지네이션
+#   - 커서는 마지막 행의 (created_at, id)를 base64url로 감싼 불투명 문자열
+#   - 클라이언트는 내용을 해석하지 않고 next_cursor를 그대로 돌려보내면 됨
+# ───────────────────────────────────────
+def encode_cursor(created_at: datetime, diary_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), diary_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, diary_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(diary_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="잘못된 커서 값입니다."
+        )
+
+
+def apply_keyset(statement, created_at_column, id_column, cursor: str | None):
+    """(created_at, id) 내림차순 정렬과 커서 이후 조건을 statement에 적용"""
+    if cursor:
+        created_at, diary_id = decode_cursor(cursor)
+        statement = statement.where(
+            (created_at_column < created_at)
+            | ((created_at_column == created_at) & (id_column < diary_id))
+        )
+    return statement.order_by(created_at_column.desc(), id_column.desc())
@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import os
+import secrets
+from typing import Awaitable, Callable
+
+from utils.cache import TTLCache
+
+logger = logging.getLogger("uvicorn.error")
+
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL") # redis://host:6379/0, 비어 있으면 프로세스 내 캐시
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30")) # 초, 무효화를 놓쳐도 이 시간 뒤엔 갱신
+RESPONSE_CACHE_MEMORY_SIZE = int(os.getenv("RESPONSE_CACHE_MEMORY_SIZE", "1024"))
+RESPONSE_CACHE_PREFIX = "mini3:"
+# 저장소가 새로 시작될 때마다 바뀌는 값 (버전 카운터가 0 부터 다시 세어도 이전 ETag 와 겹치지 않도록)
+EPOCH_KEY = f"{RESPONSE_CACHE_PREFIX}epoch"
+
+
+# ───────────────────────────────────────
+# 저장소 (backend)
+#   - get_many / set / incr / set_if_absent / close 만 구현하면 교체 가능
+#   - 여러 replica 가 같은 캐시/버전을 봐야 하면 Redis 프로토콜 backend 사용
+# ───────────────────────────────────────
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_MEMORY_SIZE):
+        self._values = TTLCache(maxsize=maxsize)
+        self._counters: dict[str, int] = {}
+
+    async def get_many(self, keys: list[str]) -> list:
+        return [self._counters.get(key, self._values.get(key)) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._values.set(key, value, ttl=ttl)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def set_if_absent(self, key: str, value: bytes) -> bytes:
+        return self._counters.setdefault(key, value)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisBackend:
+    name = "redis"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis # Redis 를 쓰는 배포에서만 필요
+        self._client = redis.from_url(url)
+
+    async def get_many(self, keys: list[str]) -> list:
+        return await self._client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(key)
+
+    async def set_if_absent(self, key: str, value: bytes) -> bytes:
+        await self._client.set(key, value, nx=True)
+        return await self._client.get(key)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_backend(url: str | None = RESPONSE_CACHE_URL):
+    if url:
+        try:
+            return RedisBackend(url)
+        except ImportError:
+            logger.warning("redis 패키지가 없어 프로세스 내 응답 캐시를 사용합니다.")
+    return MemoryBackend()
+
+
+# ───────────────────────────────────────
+# 버전 카운터 (ETag/캐시 무효화 기준)
+#   - 프로세스 내 backend 는 replica 마다 따로 세므로 단일 replica 에서만 정확
+#   - 카운터는 재시작(프로세스 내) 또는 Redis 데이터 유실 시 0 부터 다시 세므로
+#     ETag 에는 저장소 epoch 를 함께 넣어 이전 ETag 가 다른 데이터에 304 로 맞지 않게 함
+#     (epoch 와 카운터는 TTL 이 없으므로 Redis 는 noeviction 또는 volatile-* 정책 사용)
+# ───────────────────────────────────────
+class VersionCounter:
+    def __init__(self, name: str, backend):
+        self.key = f"{RESPONSE_CACHE_PREFIX}{name}:version"
+        self.backend = backend
+
+    async def get(self) -> str | None:
+        """ETag 용 현재 버전 "{epoch}.{카운터}" (조회 실패 시 None → 호출 측은 조건부 응답을 건너뜀)"""
+        try:
+            epoch, raw = await self.backend.get_many([EPOCH_KEY, self.key])
+            if epoch is None:
+                # 새 저장소 (재시작/데이터 유실) → 먼저 만든 replica 의 값을 모두 사용
+                epoch = await self.backend.set_if_absent(EPOCH_KEY, secrets.token_hex(4).encode())
+        except Exception as e:
+            logger.warning(f"버전 조회 실패: {e}")
+            return None
+        return f"{epoch.decode()}.{int(raw or 0)}"
+
+    async def bump(self) -> bool:
+        try:
+            await self.backend.incr(self.key)
+            return True
+        except Exception as e:
+            logger.warning(f"버전 갱신 실패: {e}")
+            return False
+
+
+# ───────────────────────────────────────
+# 버전 카운터로 무효화하는 응답 캐시
+#   - 항목은 "{버전}:{본문}" 으로 저장하고, 현재 버전과 다르면 miss
+#     (버전과 항목을 MGET 한 번으로 읽음)
+#   - 쓰기 쪽은 invalidate() 로 버전만 올리면 기존 항목이 모두 무효
+#   - 같은 키의 동시 miss 는 하나의 계산으로 합침 (single-flight, 프로세스 단위)
+#   - scope 를 주면 scope 마다 버전을 따로 둠 (예: 사용자별 무효화)
+# ───────────────────────────────────────
+class VersionedResponseCache:
+    def __init__(self, namespace: str, backend=None, ttl: float = RESPONSE_CACHE_TTL):
+        self.namespace = namespace
+        self.backend = backend or create_backend()
+        self.ttl = ttl
+        self.counter = VersionCounter(namespace, self.backend)
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0 # 다른 요청의 계산 결과를 기다린 횟수
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def version_key(self) -> str:
+        return self.counter.key
+
+    def _counter(self, scope=None) -> VersionCounter:
+        if scope is None:
+            return self.counter
+        return VersionCounter(f"{self.namespace}:{scope}", self.backend)
+
+    async def version(self, scope=None) -> str | None:
+        return await self._counter(scope).get()
+
+    def _entry_key(self, key: str) -> str:
+        return f"{RESPONSE_CACHE_PREFIX}{self.namespace}:{key}"
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[bytes]], scope=None) -> bytes:
+        entry_key = self._entry_key(key if scope is None else f"{scope}:{key}")
+        try:
+            raw_version, cached = await self.backend.get_many([self._counter(scope).key, entry_key])
+        except Exception as e:
+            # 캐시 장애가 요청 실패로 이어지지 않도록 바로 계산
+            self.errors += 1
+            logger.warning(f"응답 캐시 조회 실패: {e}")
+            return await compute()
+
+        version = int(raw_version or 0)
+        if cached is not None:
+            cached_version, _, body = cached.partition(b":")
+            if int(cached_version) == version:
+                self.hits += 1
+                return body
+        self.misses += 1
+
+        flight_key = f"{entry_key}@{version}"
+        future = self._inflight.get(flight_key)
+        if future is not None:
+            self.collapsed += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 먼저 계산하던 요청이 취소됨 → 직접 계산
+                return await compute()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            body = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # 기다리는 요청이 없어도 경고가 남지 않도록
+            raise
+        finally:
+            self._inflight.pop(flight_key, None)
+        future.set_result(body)
+
+        try:
+            await self.backend.set(entry_key, str(version).encode() + b":" + body, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"응답 캐시 저장 실패: {e}")
+        return body
+
+    async def invalidate(self, scope=None) -> None:
+        """데이터가 바뀐 뒤 (commit 후) 호출"""
+        # 놓친 무효화는 TTL 이 지나면 반영됨
+        if await self._counter(scope).bump():
+            self.invalidations += 1
+        else:
+            self.errors += 1
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "collapsed": self.collapsed,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+# 응답 캐시, 버전 카운터, 토큰 폐기 목록(auth.jwt_handler) 이 함께 쓰는 저장소
+shared_backend = create_backend()
+# 익명 사용자용 공개 피드 (GET /diarys/) - 공개 일기가 바뀔 때만 버전 증가
+feed_cache = VersionedResponseCache("diary:feed", shared_backend)
+# 로그인 사용자 목록 ETag 용 - 비공개 포함 모든 일기 쓰기에서 증가
+diary_list_version = VersionCounter("diary:list", shared_backend)
+# 캘린더 월 보기 (GET /diarys/calendar) - 사용자별 버전, 항목은 사용자-월 단위
+calendar_cache = VersionedResponseCache("diary:calendar", shared_backend)
+
+
+async def invalidate_diary_views(public: bool = True, user_ids=()) -> None:
+    """일기 쓰기 commit 후 호출 (public: 공개 피드에 보이거나 보였던 일기인지, user_ids: 일기 작성자)"""
+    await diary_list_version.bump()
+    if public:
+        await feed_cache.invalidate()
+    for user_id in set(user_ids):
+        await calendar_cache.invalidate(scope=user_id)
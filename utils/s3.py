@@ -1,9 +1,24 @@
+import asyncio
+import hashlib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import AsyncIterator
 from uuid import uuid4
 from pathlib import Path
 
 import boto3
+from botocore.auth import S3SigV4QueryAuth
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
 from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile, status
+from urllib.parse import quote, unquote, urlparse
+
+from utils.cache import TTLCache
 
 # ───────────────────────────────────────
 # 0) 환경 변수 로드
@@ -16,22 +31,175 @@ BUCKET_NAME  = os.getenv("AWS_S3_BUCKET")
 ROLE_ARN     = os.getenv("ROLE_ARN")
 
 # ───────────────────────────────────────
-# 1) STS AssumeRole → 임시 자격증명 획득
+# 1) STS AssumeRole → 임시 자격증명 획득 (프로세스 전체 공유)
+#   - 시작 시 (lifespan) 스레드에서 한 번 받고, 만료 전에 백그라운드 타이머로만 갱신
+#   - 만료 전이면 갱신 여유 시간 안이어도 기존 클라이언트를 그대로 반환 (요청 경로에서 STS 호출 없음)
+#   - 갱신 실패 시 지수 backoff (STS throttle 한도를 재시도로 소모하지 않도록)
+#   - 유효한 자격증명이 아예 없을 때만 호출 스레드에서 갱신 (락 안에서 한 번, backoff 중이면 바로 실패)
+#     이벤트 루프에서 쓰는 로컬 서명 함수는 block=False 로 기다리지 않음
+#   - boto3 클라이언트는 thread-safe 이므로 모든 요청이 같은 클라이언트 사용
 # ───────────────────────────────────────
+class S3CredentialsUnavailable(RuntimeError):
+    pass
+
+
+class S3ClientProvider:
+    def __init__(self, role_arn: str, region: str,
+                 session_name: str = "presigner",
+                 refresh_margin: timedelta = timedelta(minutes=5),
+                 retry_interval: float = 30.0,
+                 max_retry_interval: float = 600.0):
+        self.role_arn = role_arn
+        self.region = region
+        self.session_name = session_name
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+
+        self._lock = threading.Lock() # 갱신 (STS 호출) 은 한 번에 하나
+        self._timer_lock = threading.Lock()
+        self._sts = None
+        self._client = None
+        self._credentials: Credentials | None = None
+        self._expiration: datetime | None = None
+        self._timer: threading.Timer | None = None
+        self._next_attempt_at = 0.0 # monotonic, 이 전에는 STS 를 다시 호출하지 않음
+        self._consecutive_failures = 0
+
+        # 동작 확인용 카운터
+        self.hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.unavailable = 0 # 유효한 자격증명 없이 바로 실패한 횟수
+
+    @property
+    def expiration(self) -> datetime | None:
+        return self._expiration
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._client is not None
+            and datetime.now(timezone.utc) < self._expiration - self.refresh_margin
+        )
+
+    def _is_valid(self) -> bool:
+        return self._client is not None and datetime.now(timezone.utc) < self._expiration
+
+    def get_client(self, block: bool = True):
+        if self._is_valid():
+            if not self._is_fresh():
+                # 갱신 여유 시간 안: 만료 전까지 기존 클라이언트 사용, 갱신은 백그라운드에서만
+                self._ensure_refresh_scheduled()
+            self.hits += 1
+            return self._client
+        if not block:
+            self._ensure_refresh_scheduled()
+            self.unavailable += 1
+            raise S3CredentialsUnavailable("S3 자격증명을 갱신하는 중입니다.")
+        with self._lock:
+            # 락을 기다리는 동안 다른 스레드가 이미 갱신했으면 그대로 사용
+            if self._is_valid():
+                self.hits += 1
+                return self._client
+            if time.monotonic() < self._next_attempt_at:
+                self.unavailable += 1
+                raise S3CredentialsUnavailable("S3 자격증명 갱신 재시도 대기 중입니다.")
+            self._refresh_locked()
+            return self._client
+
+    def get_credentials(self, block: bool = True) -> Credentials:
+        """로컬 서명(SigV4)에 사용할 현재 임시 자격증명"""
+        self.get_client(block=block)
+        return self._credentials
+
+    async def start(self):
+        # 첫 AssumeRole 은 이벤트 루프 밖에서 (실패해도 시작은 계속, 백그라운드에서 재시도)
+        try:
+            await asyncio.to_thread(self.get_client)
+        except Exception as e:
+            print("❌ [ERROR] STS 자격증명 준비 실패:", e)
+
+    def stop(self):
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _refresh_locked(self):
+        if self._sts is None:
+            self._sts = boto3.client("sts", region_name=self.region)
+        try:
+            creds = self._sts.assume_role(
+                RoleArn=self.role_arn,
+                RoleSessionName=self.session_name
+            )["Credentials"]
+        except Exception:
+            self.refresh_failures += 1
+            self._consecutive_failures += 1
+            delay = min(self.max_retry_interval, self.retry_interval * 2 ** (self._consecutive_failures - 1))
+            self._next_attempt_at = time.monotonic() + delay
+            self._schedule_refresh(delay)
+            # 아직 만료되지 않은 자격증명이 있으면 계속 사용
+            if self._is_valid():
+                return
+            raise
+
+        self._client = boto3.client(
+            "s3",
+            region_name = self.region,
+            aws_access_key_id = creds["AccessKeyId"],
+            aws_secret_access_key=creds["SecretAccessKey"],
+            aws_session_token=creds["SessionToken"]
+        )
+        self._credentials = Credentials(
+            creds["AccessKeyId"], creds["SecretAccessKey"], creds["SessionToken"]
+        )
+        self._expiration = creds["Expiration"]
+        self._consecutive_failures = 0
+        self._next_attempt_at = 0.0
+        self.refreshes += 1
+
+        delay = (self._expiration - self.refresh_margin - datetime.now(timezone.utc)).total_seconds()
+        self._schedule_refresh(max(delay, self.retry_interval))
+
+    def _ensure_refresh_scheduled(self):
+        """예약된 (또는 진행 중인) 백그라운드 갱신이 없으면 backoff 가 끝나는 시각에 예약"""
+        self._schedule_refresh(max(0.0, self._next_attempt_at - time.monotonic()), replace=False)
+
+    def _schedule_refresh(self, delay: float, replace: bool = True):
+        with self._timer_lock:
+            if self._timer is not None:
+                if not replace and self._timer.is_alive():
+                    return
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._background_refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            if self._is_fresh():
+                return
+            try:
+                self._refresh_locked() # 실패하면 backoff 후 다시 예약됨
+            except Exception as e:
+                print("❌ [ERROR] STS 자격증명 갱신 실패:", e)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "unavailable": self.unavailable,
+            "retry_in": round(max(0.0, self._next_attempt_at - time.monotonic()), 1),
+            "expiration": self._expiration.isoformat() if self._expiration else None,
+        }
+
+
+s3_provider = S3ClientProvider(ROLE_ARN, AWS_REGION)
+
 def get_s3_client():
-    sts = boto3.client("sts", region_name=AWS_REGION)
-    creds = sts.assume_role(
-    RoleArn=ROLE_ARN,
-    RoleSessionName="presigner"
-    )["Credentials"]
-
-    return boto3.client(
-        "s3",
-        region_name = AWS_REGION,
-        aws_access_key_id = creds["AccessKeyId"],
-        aws_secret_access_key=creds["SecretAccessKey"],
-        aws_session_token=creds["SessionToken"]
-    )
+    return s3_provider.get_client()
 
 
 # ───────────────────────────────────────
@@ -42,34 +210,233 @@ print("✅ [DEBUG] BUCKET_NAME =", BUCKET_NAME)
 print("✅ [DEBUG] REGION      =", AWS_REGION)
 
 # ───────────────────────────────────────
-# 3) 파일 직접 업로드 (옵션)
+# 3) 파일 직접 업로드 (서버 경유)
+#   - 본문을 part 크기만큼 모아 multipart 로 올리고, S3 호출은 전용 스레드 풀에서 실행
+#     (STS 갱신/업로드가 이벤트 루프를 막지 않고, 동시에 쓰는 스레드 수에 상한)
+#   - 업로드 하나가 동시에 올리는 part 수를 제한해 메모리는 part 크기 × (동시 part + 1) 이하
+#   - part 크기보다 작은 파일은 PutObject 한 번
 # ───────────────────────────────────────
-def upload_file_to_s3(file, filename: str | None = None) -> str:
-    """FastAPI UploadFile 같은 file 객체를 바로 S3로 업로드"""
-    s3 = get_s3_client()
-    ext      = file.filename.split('.')[-1]
-    filename = filename or f"{uuid4()}.{ext}"
-
-    s3.upload_fileobj(
-        Fileobj=file.file,
-        Bucket=BUCKET_NAME,
-        Key=filename,
-        ExtraArgs={"ContentType": file.content_type}
-    )
+S3_UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", "8")) # 모든 업로드가 공유하는 S3 호출 스레드 수
+S3_UPLOAD_PART_SIZE = max(5 * 1024 * 1024, int(os.getenv("S3_UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))) # S3 최소 5MiB
+S3_UPLOAD_PARTS_IN_FLIGHT = int(os.getenv("S3_UPLOAD_PARTS_IN_FLIGHT", "4")) # 업로드 하나의 동시 part 수
+S3_UPLOAD_MAX_BYTES = int(os.getenv("S3_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+S3_UPLOAD_READ_SIZE = 256 * 1024 # UploadFile 에서 한 번에 읽는 크기
+# 허용하는 Content-Type → 저장할 확장자
+S3_UPLOAD_CONTENT_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/heic": "heic",
+}
+
+
+class S3StreamUploader:
+    def __init__(self, max_workers: int = S3_UPLOAD_WORKERS,
+                 part_size: int = S3_UPLOAD_PART_SIZE,
+                 parts_in_flight: int = S3_UPLOAD_PARTS_IN_FLIGHT,
+                 max_bytes: int = S3_UPLOAD_MAX_BYTES):
+        self.max_workers = max_workers
+        self.part_size = part_size
+        self.parts_in_flight = parts_in_flight
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-upload")
+        self._progress: dict[str, dict] = {} # 진행 중인 업로드 (키 → 받은/올린 바이트)
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.multipart = 0
+        self.bytes_uploaded = 0
+        self.upload_seconds = 0.0
 
-    return f"https://{BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{filename}"
+    def check(self, content_type: str | None, declared_size: int | None = None) -> str:
+        """본문을 읽기 전 검사 → 저장할 확장자 (허용되지 않으면 415/413)"""
+        content_type = (content_type or "").split(";")[0].strip().lower()
+        if content_type not in S3_UPLOAD_CONTENT_TYPES:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="지원하지 않는 이미지 형식입니다.")
+        if declared_size is not None and declared_size > self.max_bytes:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="이미지가 너무 큽니다.")
+        return S3_UPLOAD_CONTENT_TYPES[content_type]
+
+    async def _call(self, func, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(func, **kwargs))
+
+    @staticmethod
+    def _client_call(method: str, **kwargs):
+        # 자격증명 갱신(STS)도 업로드 스레드에서 일어나도록 호출 시점에 클라이언트를 가져옴
+        return getattr(get_s3_client(), method)(**kwargs)
+
+    async def upload(self, chunks: AsyncIterator[bytes], key: str, content_type: str,
+                     declared_size: int | None = None) -> dict:
+        """chunks 를 key 로 업로드 → {"key", "size", "sha256", "parts", "seconds"}"""
+        self.check(content_type, declared_size)
+        content_type = content_type.split(";")[0].strip().lower()
+        started = time.perf_counter()
+        progress = self._progress[key] = {"received": 0, "uploaded": 0}
+        digest = hashlib.sha256()
+        upload_id = None
+        part_number = 0
+        parts: list[dict] = []
+        in_flight: set[asyncio.Task] = set()
+        buffer = bytearray()
+
+        async def send_part(number: int, data: bytes):
+            response = await self._call(
+                self._client_call, method="upload_part",
+                Bucket=BUCKET_NAME, Key=key, UploadId=upload_id, PartNumber=number, Body=data,
+            )
+            parts.append({"PartNumber": number, "ETag": response["ETag"]})
+            progress["uploaded"] += len(data)
+
+        async def flush_part():
+            nonlocal upload_id, part_number
+            if upload_id is None:
+                upload_id = (await self._call(
+                    self._client_call, method="create_multipart_upload",
+                    Bucket=BUCKET_NAME, Key=key, ContentType=content_type,
+                ))["UploadId"]
+            # 동시 part 수가 상한이면 하나가 끝날 때까지 본문을 더 읽지 않음 (backpressure)
+            while len(in_flight) >= self.parts_in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                in_flight.difference_update(done)
+                for task in done:
+                    task.result()
+            data = bytes(buffer[:self.part_size])
+            del buffer[:self.part_size]
+            part_number += 1
+            in_flight.add(asyncio.create_task(send_part(part_number, data)))
+
+        try:
+            async for chunk in chunks:
+                progress["received"] += len(chunk)
+                if progress["received"] > self.max_bytes:
+                    self.rejected += 1
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="이미지가 너무 큽니다.")
+                digest.update(chunk)
+                buffer += chunk
+                while len(buffer) >= self.part_size:
+                    await flush_part()
+
+            checksum = digest.hexdigest()
+            if not progress["received"]:
+                self.rejected += 1
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="이미지 본문이 비어 있습니다.")
+            if upload_id is None:
+                # part 하나보다 작은 파일은 PutObject 한 번 (체크섬은 메타데이터로 저장)
+                await self._call(
+                    self._client_call, method="put_object",
+                    Bucket=BUCKET_NAME, Key=key, Body=bytes(buffer), ContentType=content_type,
+                    Metadata={"sha256": checksum},
+                )
+                progress["uploaded"] += len(buffer)
+            else:
+                if buffer:
+                    await flush_part()
+                if in_flight:
+                    await asyncio.gather(*in_flight)
+                    in_flight.clear()
+                await self._call(
+                    self._client_call, method="complete_multipart_upload",
+                    Bucket=BUCKET_NAME, Key=key, UploadId=upload_id,
+                    MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+                )
+                self.multipart += 1
+        except BaseException as e:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            if upload_id is not None:
+                # 올라간 part 가 저장 비용으로 남지 않도록 중단 (실패해도 lifecycle 규칙으로 정리됨)
+                try:
+                    await self._call(self._client_call, method="abort_multipart_upload",
+                                     Bucket=BUCKET_NAME, Key=key, UploadId=upload_id)
+                except Exception as abort_error: # 바깥의 e (원래 실패 원인) 를 가리지 않도록 다른 이름
+                    print("❌ [ERROR] multipart 업로드 중단 실패:", abort_error)
+            if not isinstance(e, HTTPException): # 크기/형식 거절은 rejected 로 따로 셈
+                self.failed += 1
+            raise
+        finally:
+            self._progress.pop(key, None)
+
+        elapsed = time.perf_counter() - started
+        self.completed += 1
+        self.bytes_uploaded += progress["received"]
+        self.upload_seconds += elapsed
+        return {
+            "key": key,
+            "size": progress["received"],
+            "sha256": checksum,
+            "parts": len(parts) or 1,
+            "seconds": round(elapsed, 3),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "part_size": self.part_size,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "multipart": self.multipart,
+            "bytes": self.bytes_uploaded,
+            # 업로드 하나하나의 처리량 평균 (동시 업로드는 합산하지 않음)
+            "bytes_per_sec": round(self.bytes_uploaded / self.upload_seconds) if self.upload_seconds else 0,
+            "in_progress": [{"key": key, **values} for key, values in self._progress.items()],
+        }
+
+
+s3_uploader = S3StreamUploader()
+
+
+# 업로드 키는 업로더 user_id 를 접두사로 (일기에 연결/삭제할 수 있는 객체를 키만으로 확인)
+# "/" 를 넣지 않아 /images/multipart/{key} 경로 파라미터로 그대로 쓸 수 있음
+def upload_key_prefix(user_id: int) -> str:
+    return f"u{user_id}-"
+
+
+def new_upload_key(user_id: int, ext: str) -> str:
+    return f"{upload_key_prefix(user_id)}{uuid4()}.{ext}"
+
+
+def is_user_upload(key: str | None, user_id: int) -> bool:
+    return bool(key) and key.startswith(upload_key_prefix(user_id))
+
+
+async def upload_file_to_s3(file: UploadFile, user_id: int, filename: str | None = None) -> str:
+    """FastAPI UploadFile 을 스레드 풀에서 multipart 로 스트리밍 업로드 → Diary.image 용 URL"""
+    ext = s3_uploader.check(file.content_type, file.size)
+    filename = filename or new_upload_key(user_id, ext)
+
+    async def chunks():
+        while data := await file.read(S3_UPLOAD_READ_SIZE):
+            yield data
+
+    await s3_uploader.upload(chunks(), filename, file.content_type, file.size)
+    return uploaded_object_url(filename)
+
+
+def uploaded_object_url(key: str) -> str:
+    """서버 업로드 시 Diary.image 에 저장되는 URL 형식"""
+    return f"https://{BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
 
 
 # ───────────────────────────────────────
 # 4) PUT presigned-URL 발급
 # ───────────────────────────────────────
-def get_presigned_url(file_type: str) -> dict:
+def get_presigned_url(file_type: str, user_id: int) -> dict:
     try:
         if not file_type:
             raise ValueError("file_type is required")
 
-        s3 = get_s3_client()
-        key = f"{uuid4()}.{file_type}"
+        s3 = s3_provider.get_client(block=False) # 로컬 서명만 하므로 이벤트 루프에서 STS 를 기다리지 않음
+        key = new_upload_key(user_id, file_type)
 
         url = s3.generate_presigned_url(
             ClientMethod="put_object",
@@ -89,9 +456,217 @@ def get_presigned_url(file_type: str) -> dict:
 
 # utils/s3.py 내부
 def generate_presigned_download_url(file_key: str) -> str:
-    s3 = get_s3_client()
+    s3 = s3_provider.get_client(block=False)
     return s3.generate_presigned_url(
         ClientMethod='get_object',
         Params={'Bucket': BUCKET_NAME, 'Key': file_key},
         ExpiresIn=3600
     )
+
+
+# ───────────────────────────────────────
+# 5) 목록 응답용 GET presigned-URL 일괄 발급
+#   - botocore 클라이언트를 거치지 않고 SigV4 쿼리 서명을 로컬에서 바로 계산 (네트워크 없음)
+#   - 같은 객체 키는 만료가 가까워질 때까지 캐시된 URL 재사용
+# ───────────────────────────────────────
+DOWNLOAD_URL_TTL = 3600 # 발급 URL 유효기간 (초)
+DOWNLOAD_URL_REUSE_MARGIN = 600 # 남은 유효기간이 이보다 짧으면 새로 서명
+download_url_cache = TTLCache(maxsize=20000)
+
+
+def image_object_key(image: str | None) -> str | None:
+    """Diary.image 값(객체 키 또는 업로드 URL)을 S3 객체 키로 변환"""
+    if not image:
+        return None
+    if image.startswith(("http://", "https://")):
+        return unquote(urlparse(image).path.lstrip("/")) or None
+    return image
+
+
+def _object_url(key: str) -> str:
+    return f"https://{BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{quote(key)}"
+
+
+def _sign_get_url(credentials: Credentials, key: str, expires_in: int) -> str:
+    request = AWSRequest(method="GET", url=_object_url(key))
+    S3SigV4QueryAuth(credentials, "s3", AWS_REGION, expires=expires_in).add_auth(request)
+    return request.url
+
+
+def presign_download_urls(keys) -> dict[str, str]:
+    """객체 키 목록 → {키: GET URL}"""
+    urls = {}
+    missing = []
+    for key in set(keys):
+        url = download_url_cache.get(key)
+        if url is None:
+            missing.append(key)
+        else:
+            urls[key] = url
+
+    if missing:
+        credentials = s3_provider.get_credentials(block=False)
+        # 세션 토큰이 만료되면 URL도 쓸 수 없으므로 자격증명 남은 시간으로 제한
+        remaining = (s3_provider.expiration - datetime.now(timezone.utc)).total_seconds()
+        expires_in = int(min(DOWNLOAD_URL_TTL, remaining))
+        for key in missing:
+            url = _sign_get_url(credentials, key, expires_in)
+            urls[key] = url
+            if expires_in > DOWNLOAD_URL_REUSE_MARGIN:
+                download_url_cache.set(key, url, ttl=expires_in - DOWNLOAD_URL_REUSE_MARGIN)
+    return urls
+
+
+# ───────────────────────────────────────
+# 6) 객체 일괄 삭제 (삭제된 일기의 이미지 정리)
+#   - DeleteObjects 한 번에 최대 1000 개, 없는 키는 성공으로 처리됨
+# ───────────────────────────────────────
+S3_DELETE_BATCH = 1000
+
+
+def owned_object_key(image: str | None) -> str | None:
+    """이 버킷의 객체일 때만 키 반환 (다른 곳의 URL 경로로 이 버킷 객체를 지우지 않도록)"""
+    if not image:
+        return None
+    if image.startswith(("http://", "https://")):
+        host = urlparse(image).netloc.lower()
+        if not host.startswith(f"{BUCKET_NAME}.s3.".lower()):
+            return None
+    return image_object_key(image)
+
+
+def delete_objects(keys: list[str]) -> dict[str, str]:
+    """키 목록 삭제 → 실패한 키와 오류 메시지 (호출 전체가 실패하면 예외)"""
+    s3 = get_s3_client()
+    errors = {}
+    for i in range(0, len(keys), S3_DELETE_BATCH):
+        batch = keys[i:i + S3_DELETE_BATCH]
+        response = s3.delete_objects(
+            Bucket=BUCKET_NAME,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+        )
+        for error in response.get("Errors", []):
+            errors[error["Key"]] = f"{error.get('Code')}: {error.get('Message')}"
+    return errors
+
+
+# ───────────────────────────────────────
+# 7) 썸네일 (원본 키에서 결정되는 키, 객체 읽기/쓰기)
+# ───────────────────────────────────────
+THUMBNAIL_WIDTHS = tuple(sorted(int(w) for w in os.getenv("THUMBNAIL_WIDTHS", "320,640,1280").split(",")))
+THUMBNAIL_LIST_WIDTH = int(os.getenv("THUMBNAIL_LIST_WIDTH", "640")) # 목록 응답이 참조하는 너비 (THUMBNAIL_WIDTHS 중 하나)
+THUMBNAIL_PREFIX = "thumbnails/"
+
+
+def thumbnail_key(key: str, width: int) -> str:
+    stem = key.rsplit(".", 1)[0] if "." in key.rsplit("/", 1)[-1] else key
+    return f"{THUMBNAIL_PREFIX}{stem}-w{width}.webp"
+
+
+def thumbnail_keys(key: str) -> list[str]:
+    return [thumbnail_key(key, width) for width in THUMBNAIL_WIDTHS]
+
+
+def head_object(key: str) -> dict | None:
+    """객체 메타데이터 (없으면 None)"""
+    s3 = get_s3_client()
+    try:
+        return s3.head_object(Bucket=BUCKET_NAME, Key=key)
+    except s3.exceptions.ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+
+
+def read_object(key: str, max_bytes: int) -> bytes:
+    """객체 전체를 읽음 (max_bytes 보다 크면 ValueError, 읽기 전에 확인)"""
+    response = get_s3_client().get_object(Bucket=BUCKET_NAME, Key=key)
+    body = response["Body"]
+    try:
+        if response["ContentLength"] > max_bytes:
+            raise ValueError(f"객체가 너무 큽니다: {response['ContentLength']} bytes")
+        return body.read()
+    finally:
+        body.close()
+
+
+def put_object(key: str, data: bytes, content_type: str, cache_control: str | None = None) -> None:
+    extra = {"CacheControl": cache_control} if cache_control else {}
+    get_s3_client().put_object(Bucket=BUCKET_NAME, Key=key, Body=data, ContentType=content_type, **extra)
+
+
+# ───────────────────────────────────────
+# 8) 클라이언트 직접 multipart 업로드 (part 별 presigned PUT URL)
+#   - 클라이언트가 part 들을 동시에 올리고, 실패한 part 만 새 URL 로 다시 올림
+#   - part URL 서명은 5) 와 같이 로컬에서 계산 (part 수만큼 네트워크 왕복 없음)
+#   - 어떤 part 가 올라갔는지는 S3 ListParts 가 기준 (서버는 part 상태를 저장하지 않음)
+# ───────────────────────────────────────
+S3_MULTIPART_PART_SIZE = max(int(os.getenv("S3_MULTIPART_PART_SIZE", str(8 * 1024 * 1024))), 5 * 1024 * 1024)
+S3_MULTIPART_MAX_BYTES = int(os.getenv("S3_MULTIPART_MAX_BYTES", str(100 * 1024 * 1024)))
+S3_MULTIPART_MAX_PARTS = 10000 # S3 제한
+S3_MULTIPART_URL_TTL = int(os.getenv("S3_MULTIPART_URL_TTL", "3600")) # part URL 유효기간 (초)
+
+
+def multipart_part_size(size: int) -> tuple[int, int]:
+    """파일 크기 → (part 크기, part 수) (마지막 part 만 작을 수 있음)"""
+    part_size = max(S3_MULTIPART_PART_SIZE, -(-size // S3_MULTIPART_MAX_PARTS))
+    return part_size, max(1, -(-size // part_size))
+
+
+def create_multipart_upload(key: str, content_type: str) -> str:
+    return get_s3_client().create_multipart_upload(Bucket=BUCKET_NAME, Key=key, ContentType=content_type)["UploadId"]
+
+
+def presign_upload_part_urls(key: str, upload_id: str, part_numbers) -> dict[int, str]:
+    """part 번호 목록 → {part 번호: PUT URL}"""
+    credentials = s3_provider.get_credentials(block=False)
+    remaining = (s3_provider.expiration - datetime.now(timezone.utc)).total_seconds()
+    expires_in = int(min(S3_MULTIPART_URL_TTL, remaining))
+    urls = {}
+    for number in part_numbers:
+        request = AWSRequest(
+            method="PUT",
+            url=f"{_object_url(key)}?partNumber={number}&uploadId={quote(upload_id, safe='')}",
+        )
+        S3SigV4QueryAuth(credentials, "s3", AWS_REGION, expires=expires_in).add_auth(request)
+        urls[number] = request.url
+    return urls
+
+
+def list_uploaded_parts(key: str, upload_id: str) -> dict[int, dict] | None:
+    """올라간 part → {part 번호: {"ETag", "Size"}} (업로드가 없으면 None)"""
+    s3 = get_s3_client()
+    parts = {}
+    try:
+        for page in s3.get_paginator("list_parts").paginate(Bucket=BUCKET_NAME, Key=key, UploadId=upload_id):
+            for part in page.get("Parts", []):
+                parts[part["PartNumber"]] = {"ETag": part["ETag"], "Size": part["Size"]}
+    except s3.exceptions.NoSuchUpload:
+        return None
+    return parts
+
+
+def complete_multipart_upload(key: str, upload_id: str, parts: dict[int, dict]) -> None:
+    get_s3_client().complete_multipart_upload(
+        Bucket=BUCKET_NAME, Key=key, UploadId=upload_id,
+        MultipartUpload={"Parts": [{"PartNumber": number, "ETag": parts[number]["ETag"]} for number in sorted(parts)]},
+    )
+
+
+def abort_multipart_upload(key: str, upload_id: str) -> None:
+    """업로드 중단 (이미 끝났거나 중단된 업로드는 성공으로 처리)"""
+    s3 = get_s3_client()
+    try:
+        s3.abort_multipart_upload(Bucket=BUCKET_NAME, Key=key, UploadId=upload_id)
+    except s3.exceptions.NoSuchUpload:
+        pass
+
+
+def list_multipart_uploads(initiated_before: datetime) -> list[tuple[str, str]]:
+    """이 시각 이전에 시작되어 아직 완료/중단되지 않은 업로드 → [(키, UploadId)]"""
+    uploads = []
+    for page in get_s3_client().get_paginator("list_multipart_uploads").paginate(Bucket=BUCKET_NAME):
+        for upload in page.get("Uploads", []):
+            if upload["Initiated"] < initiated_before:
+                uploads.append((upload["Key"], upload["UploadId"]))
+    return uploads
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import math
+import os
+from datetime import timedelta
+
+from sqlalchemy import case, delete, func, insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import connection
+from models.diarys_model import korea_now
+from models.s3_cleanup_model import S3OrphanObject
+from utils.image_owner import referenced_object_keys
+from utils.s3 import S3_DELETE_BATCH, THUMBNAIL_PREFIX, THUMBNAIL_WIDTHS, delete_objects, owned_object_key, thumbnail_keys
+
+logger = logging.getLogger("uvicorn.error")
+
+# 한 번에 가져오는 원본 키 수 (썸네일까지 DeleteObjects 한 번에 들어가도록)
+S3_CLEANUP_BATCH_SIZE = int(os.getenv("S3_CLEANUP_BATCH_SIZE", str(S3_DELETE_BATCH // (1 + len(THUMBNAIL_WIDTHS)))))
+S3_CLEANUP_POLL_INTERVAL = float(os.getenv("S3_CLEANUP_POLL_INTERVAL", "10")) # 초
+S3_CLEANUP_LEASE = timedelta(seconds=300) # 처리 중인 키를 다른 워커가 가져가기 전 대기 시간
+S3_CLEANUP_MAX_ATTEMPTS = 8 # 이후에는 테이블에 남겨 두고 수동 확인
+S3_CLEANUP_MAX_BACKOFF = 3600 # 초
+
+
+# ───────────────────────────────────────
+# 정리 대상 등록 (일기 삭제와 같은 트랜잭션에서 호출)
+# ───────────────────────────────────────
+async def queue_object_cleanup(session: AsyncSession, images) -> int:
+    """Diary.image 값 목록을 정리 대상으로 등록 (호출 측에서 commit 후 s3_cleanup_worker.notify())"""
+    # 같은 객체를 다른 일기도 참조할 수 있음 (내보낸 일기 다시 가져오기 등)
+    # → 여기서는 원본 키만 등록하고, 참조 확인과 썸네일 삭제는 워커가 삭제 직전에 처리
+    keys = {owned_object_key(image) for image in images} - {None}
+    if keys:
+        now = korea_now()
+        await session.exec(insert(S3OrphanObject), params=[
+            {"object_key": key, "attempts": 0, "available_at": now, "created_at": now}
+            for key in keys
+        ])
+    return len(keys)
+
+
+# ───────────────────────────────────────
+# 정리 워커
+#   - 처리 가능한 키를 묶음으로 가져와(lease) 원본과 썸네일을 DeleteObjects 한 번으로 삭제
+#   - 아직 다른 일기가 참조하는 원본은 지우지 않고 정리 대상에서만 제거
+#   - 실패한 키만 backoff 후 재시도
+# ───────────────────────────────────────
+class S3CleanupWorker:
+    def __init__(self, batch_size: int = S3_CLEANUP_BATCH_SIZE,
+                 poll_interval: float = S3_CLEANUP_POLL_INTERVAL):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self.deleted = 0
+        self.retried = 0
+        self.referenced = 0
+        self.s3_calls = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                logger.exception(f"S3 정리 워커 오류: {e}")
+                handled = 0
+            if handled:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """정리 대상 한 묶음을 처리하고 처리한 행 수를 반환"""
+        async with AsyncSession(connection.async_engine, expire_on_commit=False) as session:
+            rows = await self._claim(session)
+            if not rows:
+                return 0
+
+            keys = {row.object_key for row in rows}
+            referenced = await referenced_object_keys(session, keys)
+            await session.commit() # S3 호출 동안에는 트랜잭션/커넥션을 잡고 있지 않음
+
+            # 원본 → 함께 지울 키 (썸네일은 만들어지지 않았으면 없는 키 삭제로 성공 처리됨)
+            # 이전 버전에서 따로 등록된 썸네일 키는 그대로 삭제
+            targets = {
+                key: [key] if key.startswith(THUMBNAIL_PREFIX) else [key, *thumbnail_keys(key)]
+                for key in keys - referenced
+            }
+            delete_keys = [target for group in targets.values() for target in group]
+            errors = {}
+            if delete_keys:
+                try:
+                    failed = await asyncio.to_thread(delete_objects, delete_keys)
+                except Exception as e:
+                    failed = {target: str(e) for target in delete_keys}
+                self.s3_calls += math.ceil(len(delete_keys) / S3_DELETE_BATCH)
+                # 원본이나 썸네일 중 하나라도 실패하면 그 원본을 다시 시도
+                for key, group in targets.items():
+                    messages = [failed[target] for target in group if target in failed]
+                    if messages:
+                        errors[key] = messages[0]
+
+            now = korea_now()
+            done_ids = [row.id for row in rows if row.object_key not in errors]
+            if done_ids:
+                await session.exec(delete(S3OrphanObject).where(S3OrphanObject.id.in_(done_ids)))
+            for row in rows:
+                if row.object_key in errors:
+                    row.last_error = errors[row.object_key][:255]
+                    row.available_at = now + timedelta(seconds=min(S3_CLEANUP_MAX_BACKOFF, 10 * 2 ** row.attempts))
+                    session.add(row)
+            await session.commit()
+
+            skipped = sum(1 for row in rows if row.object_key in referenced)
+            self.referenced += skipped
+            self.deleted += len(done_ids) - skipped
+            self.retried += len(rows) - len(done_ids)
+            return len(rows)
+
+    async def _claim(self, session: AsyncSession) -> list[S3OrphanObject]:
+        now = korea_now()
+        statement = (
+            select(S3OrphanObject)
+            .where(
+                S3OrphanObject.available_at <= now,
+                S3OrphanObject.attempts < S3_CLEANUP_MAX_ATTEMPTS,
+            )
+            .order_by(S3OrphanObject.available_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True) # 여러 replica 가 같은 키를 가져가지 않도록 (MySQL)
+        )
+        rows = (await session.exec(statement)).all()
+        for row in rows:
+            row.attempts += 1
+            row.available_at = now + S3_CLEANUP_LEASE
+            session.add(row)
+        await session.commit()
+        return rows
+
+    async def stats(self, session: AsyncSession) -> dict:
+        abandoned = S3OrphanObject.attempts >= S3_CLEANUP_MAX_ATTEMPTS
+        total, abandoned = (await session.exec(
+            select(func.count(), func.coalesce(func.sum(case((abandoned, 1), else_=0)), 0))
+            .select_from(S3OrphanObject)
+        )).one()
+        return {
+            "deleted": self.deleted,
+            "retried": self.retried,
+            "referenced": self.referenced,
+            "s3_calls": self.s3_calls,
+            "pending": total - abandoned,
+            "abandoned": abandoned,
+        }
+
+
+s3_cleanup_worker = S3CleanupWorker()
@@ -0,0 +1,117 @@
+import re
+import unicodedata
+from collections import Counter
+
+from sqlalchemy import case, delete, distinct, func, insert, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.search_model import DiarySearchToken
+
+# ───────────────────────────────────────
+# 일기 전문 검색 (제목 + 본문)
+#   - 한국어는 띄어쓰기/조사 때문에 형태소 분석 없이는 단어 단위 매칭이 어려움
+#     → 어절을 문자 2-gram 으로 잘라 역색인 (MySQL ngram parser 와 같은 방식)
+#   - 검색은 질의 2-gram 의 posting list 만 읽으므로 비용이 테이블 크기가 아니라
+#     매칭되는 행 수에 비례
+#   - 한 글자 검색어 (좋, 꽃, 비 ...) 는 그 글자로 시작하는 토큰을 앞부분 일치로 찾음
+#     어절 마지막 글자는 어떤 토큰의 첫 글자도 아니므로 한 글자 토큰으로 따로 색인
+# ───────────────────────────────────────
+NGRAM_SIZE = 2
+TITLE_WEIGHT = 3 # 제목에 나온 토큰은 본문보다 가중
+MAX_QUERY_TOKENS = 16 # 너무 긴 검색어로 IN 절이 커지는 것 방지
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def tokenize(text: str) -> Counter:
+    """텍스트를 문자 n-gram 토큰 빈도로 변환 (n 보다 짧은 어절은 그대로 토큰)"""
+    tokens: Counter = Counter()
+    for word in _WORD_RE.findall(_normalize(text)):
+        if len(word) <= NGRAM_SIZE:
+            tokens[word] += 1
+            continue
+        for i in range(len(word) - NGRAM_SIZE + 1):
+            tokens[word[i:i + NGRAM_SIZE]] += 1
+    return tokens
+
+
+def tail_tokens(text: str) -> Counter:
+    """두 글자 이상 어절의 마지막 글자 (색인에만 사용, 검색어에는 넣지 않음)"""
+    return Counter(word[-1] for word in _WORD_RE.findall(_normalize(text)) if len(word) > 1)
+
+
+def diary_tokens(title: str, content: str) -> Counter:
+    tokens = tokenize(content) + tail_tokens(content)
+    for token, count in (tokenize(title) + tail_tokens(title)).items():
+        tokens[token] += count * TITLE_WEIGHT
+    return tokens
+
+
+# ───────────────────────────────────────
+# 색인 유지 (일기 생성/수정/삭제와 같은 트랜잭션에서 호출)
+# ───────────────────────────────────────
+async def remove_diary_index(session: AsyncSession, *diary_ids: int) -> None:
+    if diary_ids:
+        await session.exec(delete(DiarySearchToken).where(DiarySearchToken.diary_id.in_(diary_ids)))
+
+
+async def index_diary(session: AsyncSession, diary_id: int, title: str, content: str) -> None:
+    """기존 토큰을 지우고 다시 색인 (호출 측에서 commit)"""
+    await remove_diary_index(session, diary_id)
+    rows = [
+        {"token": token, "diary_id": diary_id, "tf": tf}
+        for token, tf in diary_tokens(title, content).items()
+    ]
+    if rows:
+        await session.exec(insert(DiarySearchToken), params=rows)
+
+
+async def index_new_diaries(session: AsyncSession, diaries) -> None:
+    """새로 추가된 일기 묶음 색인 ((id, title, content) 목록, 기존 토큰 삭제 없이 한 번에 INSERT)"""
+    rows = [
+        {"token": token, "diary_id": diary_id, "tf": tf}
+        for diary_id, title, content in diaries
+        for token, tf in diary_tokens(title, content).items()
+    ]
+    if rows:
+        await session.exec(insert(DiarySearchToken), params=rows)
+
+
+# ───────────────────────────────────────
+# 검색
+# ───────────────────────────────────────
+def query_tokens(search: str) -> list[str]:
+    tokens = list(tokenize(search))
+    # 다른 질의 토큰의 첫 글자인 한 글자 토큰은 그 토큰이 맞으면 항상 맞으므로 제외
+    firsts = {token[0] for token in tokens if len(token) >= NGRAM_SIZE}
+    return [token for token in tokens if len(token) >= NGRAM_SIZE or token not in firsts][:MAX_QUERY_TOKENS]
+
+
+def _token_condition(token: str):
+    if len(token) < NGRAM_SIZE:
+        # 앞부분 일치도 (token, diary_id) PK 범위 스캔 ("_" 는 \w 에 포함되므로 이스케이프)
+        pattern = token.replace("/", "//").replace("%", "/%").replace("_", "/_") + "%"
+        return DiarySearchToken.token.like(pattern, escape="/")
+    return DiarySearchToken.token == token
+
+
+def ranked_match_subquery(tokens: list[str]):
+    """모든 질의 토큰을 포함하는 일기 id 와 점수(가중 빈도 합)"""
+    conditions = [_token_condition(token) for token in tokens]
+    # 한 글자 질의 토큰은 여러 색인 토큰과 맞을 수 있으므로 맞은 질의 토큰 수를 셈
+    matched = case(*((condition, i) for i, condition in enumerate(conditions)))
+    return (
+        select(
+            DiarySearchToken.diary_id.label("diary_id"),
+            func.sum(DiarySearchToken.tf).label("score"),
+        )
+        .where(or_(*conditions))
+        .group_by(DiarySearchToken.diary_id)
+        .having(func.count(distinct(matched)) == len(tokens))
+        .subquery()
+    )
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from PIL import Image, UnidentifiedImageError
+from sqlalchemy import case, func, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import connection
+from database.upsert import upsert_statement
+from models.diarys_model import Diary, korea_now
+from models.thumbnail_model import THUMBNAIL_DONE, THUMBNAIL_FAILED, THUMBNAIL_PENDING, ThumbnailJob
+from utils.image_render import render_webp_thumbnails
+from utils.response_cache import invalidate_diary_views
+from utils.s3 import (
+    THUMBNAIL_LIST_WIDTH, THUMBNAIL_WIDTHS, owned_object_key, put_object, read_object,
+    thumbnail_key, uploaded_object_url,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2")) # 렌더링 프로세스 수 (CPU 코어 수 이하)
+THUMBNAIL_MAX_SOURCE_BYTES = int(os.getenv("THUMBNAIL_MAX_SOURCE_BYTES", str(20 * 1024 * 1024)))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+THUMBNAIL_POLL_INTERVAL = float(os.getenv("THUMBNAIL_POLL_INTERVAL", "10")) # 초
+THUMBNAIL_LEASE = timedelta(seconds=300) # 처리 중인 작업을 다른 워커가 가져가기 전 대기 시간
+THUMBNAIL_MAX_ATTEMPTS = 5
+THUMBNAIL_CACHE_CONTROL = "public, max-age=31536000, immutable" # 키가 원본마다 고유하므로 변하지 않음
+# 다시 시도해도 같은 결과인 오류 (이미지가 아님 / 너무 큼)
+PERMANENT_ERRORS = (ValueError, UnidentifiedImageError, Image.DecompressionBombError)
+
+
+# ───────────────────────────────────────
+# 작업 등록 / 조회
+# ───────────────────────────────────────
+async def request_thumbnails(session: AsyncSession, image: str) -> str | None:
+    """업로드 완료된 원본의 썸네일 작업 등록 → 목록용 썸네일 키 (호출 측에서 commit 후 thumbnail_worker.notify())"""
+    key = owned_object_key(image)
+    if key is None:
+        return None
+    now = korea_now()
+    # 이미 완료된 작업은 그대로 두고, 실패/대기 중이면 다시 처리
+    await session.exec(upsert_statement(
+        session.bind.dialect.name,
+        ThumbnailJob,
+        [{"object_key": key, "status": THUMBNAIL_PENDING, "attempts": 0, "available_at": now, "created_at": now}],
+        ["object_key"],
+        lambda new: {
+            "status": case((ThumbnailJob.status == THUMBNAIL_DONE, THUMBNAIL_DONE), else_=new.status),
+            "attempts": case((ThumbnailJob.status == THUMBNAIL_DONE, ThumbnailJob.attempts), else_=0),
+            "available_at": case((ThumbnailJob.status == THUMBNAIL_DONE, ThumbnailJob.available_at), else_=new.available_at),
+        },
+    ))
+    return thumbnail_key(key, THUMBNAIL_LIST_WIDTH)
+
+
+async def find_thumbnails(session: AsyncSession, images) -> dict[str, str]:
+    """Diary.image 값 → 이미 만들어진 목록용 썸네일 키"""
+    keys = {image: owned_object_key(image) for image in images if image}
+    keys = {image: key for image, key in keys.items() if key}
+    if not keys:
+        return {}
+    # 워커가 완료 처리하는 동안에는 잠금을 기다림
+    # → 먼저 완료되면 여기서 보이고, 나중에 완료되면 워커의 UPDATE 가 이 일기를 봄
+    done = set((await session.exec(
+        select(ThumbnailJob.object_key)
+        .where(ThumbnailJob.object_key.in_(set(keys.values())), ThumbnailJob.status == THUMBNAIL_DONE)
+        .with_for_update()
+    )).all())
+    return {image: thumbnail_key(key, THUMBNAIL_LIST_WIDTH) for image, key in keys.items() if key in done}
+
+
+# ───────────────────────────────────────
+# 썸네일 워커
+#   - 원본 다운로드/업로드는 스레드, 디코딩/리사이즈/WebP 인코딩은 프로세스 풀
+#     (Pillow 는 CPU 를 오래 쓰므로 이벤트 루프와 같은 프로세스에서 돌리지 않음)
+#   - 완료되면 같은 원본을 쓰는 일기에 썸네일 키를 기록하고 목록 캐시 무효화
+# ───────────────────────────────────────
+class ThumbnailWorker:
+    def __init__(self, workers: int = THUMBNAIL_WORKERS, poll_interval: float = THUMBNAIL_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._pool: ProcessPoolExecutor | None = None
+
+        self.rendered = 0
+        self.retried = 0
+        self.failed = 0
+        self.source_bytes = 0
+        self.thumbnail_bytes = 0
+        self.render_seconds = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._pool = self._create_pool()
+            self._task = asyncio.create_task(self._run())
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # fork 는 이벤트 루프/스레드 상태를 복사하므로 spawn (자식은 utils.image_render 만 import)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=100,
+        )
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def notify(self):
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                logger.exception(f"썸네일 워커 오류: {e}")
+                handled = 0
+            if handled:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """처리 가능한 작업 한 묶음 (프로세스 수만큼) 을 처리하고 처리한 작업 수를 반환"""
+        if self._pool is None:
+            self._pool = self._create_pool()
+        async with AsyncSession(connection.async_engine, expire_on_commit=False) as session:
+            jobs = await self._claim(session)
+            if not jobs:
+                return 0
+
+            # 렌더링 동안에는 트랜잭션/커넥션을 잡고 있지 않음 (_claim 에서 commit)
+            results = await asyncio.gather(*(self._render(job.object_key) for job in jobs), return_exceptions=True)
+            if any(isinstance(result, BrokenProcessPool) for result in results):
+                # 자식 프로세스가 비정상 종료되면 풀을 다시 만들고 작업은 재시도
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._create_pool()
+
+            now = korea_now()
+            done_keys = []
+            for job, result in zip(jobs, results):
+                if not isinstance(result, Exception):
+                    job.status = THUMBNAIL_DONE
+                    job.last_error = None
+                    done_keys.append(job.object_key)
+                    self.rendered += 1
+                else:
+                    job.last_error = str(result)[:255] or type(result).__name__
+                    if job.attempts >= THUMBNAIL_MAX_ATTEMPTS or isinstance(result, PERMANENT_ERRORS):
+                        job.status = THUMBNAIL_FAILED
+                        self.failed += 1
+                    else:
+                        job.available_at = now + timedelta(seconds=10 * 2 ** job.attempts)
+                        self.retried += 1
+                session.add(job)
+            await session.flush()
+
+            owners, public = await self._attach_to_diaries(session, done_keys)
+            await session.commit()
+            if owners:
+                await invalidate_diary_views(public=public, user_ids=owners)
+            return len(jobs)
+
+    async def _render(self, key: str) -> None:
+        data = await asyncio.to_thread(read_object, key, THUMBNAIL_MAX_SOURCE_BYTES)
+        started = time.perf_counter()
+        renditions = await asyncio.get_running_loop().run_in_executor(
+            self._pool, render_webp_thumbnails, data, THUMBNAIL_WIDTHS, THUMBNAIL_QUALITY,
+        )
+        self.render_seconds += time.perf_counter() - started
+        await asyncio.gather(*(
+            asyncio.to_thread(put_object, thumbnail_key(key, width), body, "image/webp", THUMBNAIL_CACHE_CONTROL)
+            for width, body in renditions.items()
+        ))
+        self.source_bytes += len(data)
+        self.thumbnail_bytes += sum(len(body) for body in renditions.values())
+
+    async def _attach_to_diaries(self, session: AsyncSession, keys: list[str]) -> tuple[list[int], bool]:
+        """원본을 참조하는 일기에 썸네일 키 기록 → (작성자 목록, 공개 일기 포함 여부)"""
+        owners, public = [], False
+        for key in keys:
+            images = [key, uploaded_object_url(key)] # Diary.image 는 키 또는 서버 업로드 URL
+            rows = (await session.exec(
+                select(Diary.user_id, Diary.state).where(Diary.image.in_(images))
+            )).all()
+            if not rows:
+                continue
+            await session.exec(
+                update(Diary)
+                .where(Diary.image.in_(images))
+                .values(thumbnail=thumbnail_key(key, THUMBNAIL_LIST_WIDTH), version=Diary.version + 1)
+            )
+            owners.extend(row.user_id for row in rows if row.user_id is not None)
+            public = public or any(row.state for row in rows)
+        return owners, public
+
+    async def _claim(self, session: AsyncSession) -> list[ThumbnailJob]:
+        now = korea_now()
+        statement = (
+            select(ThumbnailJob)
+            .where(ThumbnailJob.status == THUMBNAIL_PENDING, ThumbnailJob.available_at <= now)
+            .order_by(ThumbnailJob.available_at)
+            .limit(self.workers)
+            .with_for_update(skip_locked=True) # 여러 replica 가 같은 작업을 가져가지 않도록 (MySQL)
+        )
+        jobs = (await session.exec(statement)).all()
+        for job in jobs:
+            job.attempts += 1
+            job.available_at = now + THUMBNAIL_LEASE
+            session.add(job)
+        await session.commit()
+        return jobs
+
+    async def stats(self, session: AsyncSession) -> dict:
+        pending, failed = (await session.exec(
+            select(
+                func.coalesce(func.sum(case((ThumbnailJob.status == THUMBNAIL_PENDING, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((ThumbnailJob.status == THUMBNAIL_FAILED, 1), else_=0)), 0),
+            )
+        )).one()
+        return {
+            "workers": self.workers,
+            "rendered": self.rendered,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_render_ms": round(self.render_seconds / self.rendered * 1000, 1) if self.rendered else 0.0,
+            "source_bytes": self.source_bytes,
+            "thumbnail_bytes": self.thumbnail_bytes,
+            "pending": pending,
+            "failed_total": failed,
+        }
+
+
+thumbnail_worker = ThumbnailWorker()